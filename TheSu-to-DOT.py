@@ -45,7 +45,7 @@ from config.runtime_settings import (
 
 # --- Core pipeline: DOT build, postprocess, Gephi, render ---
 from dot import create_dot
-from dot.postprocess import fix_arrow_directions
+from dot.postprocess import fix_arrow_directions, load_original_xml
 from gephi import create_gephi_dot
 from render import save_dot_as_svg, save_dot_as_pdf, save_dot_as_png
 
@@ -65,6 +65,9 @@ def _open_svg_in_browser(svg_path: str) -> None:
 
 
 if __name__ == "__main__":
+    # --- Unfiltered input XML for edge validation, parsed once for both DOT passes ---
+    original_xml_root = load_original_xml(xml_filename)
+
     # --- Step 1: Build DOT from XML (with full filter config) ---
     create_dot(xml_filename, dot_filename, sources_to_select=sources_to_select,
                filter_propositions=filter_propositions,
@@ -74,10 +77,12 @@ if __name__ == "__main__":
                custom_prop_filters=custom_prop_filters_to_apply,
                custom_seq_phase_filters=custom_seq_phase_filters_to_apply,
                thesis_focus_id=thesis_focus_id,
-               elements_to_exclude=elements_to_exclude)
+               elements_to_exclude=elements_to_exclude,
+               original_xml_root=original_xml_root)
 
     # --- Step 2: Rebuild DOT (simplified filters) and generate Gephi DOT ---
-    create_dot(xml_filename, dot_filename, sources_to_select)
+    create_dot(xml_filename, dot_filename, sources_to_select,
+               original_xml_root=original_xml_root)
     gephi_dot_path = dot_filename[:-4] + "_gephi.dot"
     create_gephi_dot(dot_filename, gephi_dot_path)
 
@@ -9,16 +9,18 @@ from bootstrap.primary_imports import os, urllib
 from bootstrap.delayed_imports import ET
 from config.runtime_settings import BASE_DIR
 from xml_processing import retrieve_text_and_locus
-from dot.propositions import process_referenced_propositions
-from dot.thesis import process_thesis_element
+from dot.propositions import process_referenced_propositions, WrittenPropPhases
+from dot.thesis import process_thesis_element, ThesisIndexes
 from dot.support import process_support_element
 from dot.misc import process_misc_element
+from dot.pseudo_nodes import WrittenLines
 
 def initialize_elements_clusters(xml_root, filtered_elements, namespaces, all_propositions, dot_file):
     """Process all source elements and referenced propositions, building DOT clusters and nodes."""
-    written_lines = []
+    written_lines = WrittenLines()
     stored_edges = []
-    written_prop_phases = {}
+    written_prop_phases = WrittenPropPhases()
+    thesis_indexes = ThesisIndexes()
     processed_elements = set()
     processed_propositions = set()
     
@@ -83,7 +85,7 @@ def initialize_elements_clusters(xml_root, filtered_elements, namespaces, all_pr
             written_lines, stored_edges, processed_propositions = process_filtered_elements(
                 source_element, filtered_elements, namespaces, all_propositions, 
                 dot_file, written_lines, stored_edges, written_prop_phases, 
-                processed_elements, processed_propositions, source_id  # Add source_id here
+                processed_elements, processed_propositions, source_id, thesis_indexes  # Add source_id here
             )
             
             dot_file.write('}\n\n')
@@ -97,7 +99,7 @@ def initialize_elements_clusters(xml_root, filtered_elements, namespaces, all_pr
         written_lines, stored_edges, processed_propositions = process_filtered_elements(
             source_xml, filtered_elements, namespaces, all_propositions, 
             dot_file, written_lines, stored_edges, written_prop_phases, 
-            processed_elements, processed_propositions, source_id  # Add source_id here
+            processed_elements, processed_propositions, source_id, thesis_indexes  # Add source_id here
         )
         
         dot_file.write('}\n\n')
@@ -106,7 +108,7 @@ def initialize_elements_clusters(xml_root, filtered_elements, namespaces, all_pr
     written_lines, stored_edges, processed_propositions = process_filtered_elements(
         xml_root, filtered_elements, namespaces, all_propositions, 
         dot_file, written_lines, stored_edges, written_prop_phases, 
-        processed_elements, processed_propositions, None
+        processed_elements, processed_propositions, None, thesis_indexes
     )
     
     # Process referenced propositions
@@ -117,8 +119,13 @@ def initialize_elements_clusters(xml_root, filtered_elements, namespaces, all_pr
     
     return written_lines, stored_edges, written_prop_phases, processed_elements, processed_propositions
 
-def process_filtered_elements(source_xml, filtered_elements, namespaces, all_propositions, dot_file, written_lines, stored_edges, written_prop_phases, processed_elements, processed_propositions, source_id=None):
-    """Dispatch THESIS, SUPPORT, and MISC elements to their respective processors."""
+def process_filtered_elements(source_xml, filtered_elements, namespaces, all_propositions, dot_file, written_lines, stored_edges, written_prop_phases, processed_elements, processed_propositions, source_id=None, thesis_indexes=None):
+    """
+    Dispatch THESIS, SUPPORT, and MISC elements to their respective processors.
+    thesis_indexes is the run's ThesisIndexes (a fresh one is used when not given).
+    """
+    if thesis_indexes is None:
+        thesis_indexes = ThesisIndexes()
     # If source_xml is a source element, get its children
     if source_xml.tag == '{http://alchemeast.eu/thesu/ns/1.0}source':
         elements_to_process = source_xml.findall('.//*')
@@ -170,7 +177,7 @@ def process_filtered_elements(source_xml, filtered_elements, namespaces, all_pro
         
         if element.tag == '{http://alchemeast.eu/thesu/ns/1.0}THESIS':
             element_type = "THESIS"
-            written_lines, processed_propositions = process_thesis_element(element, element_type, namespaces, all_propositions, dot_file, written_lines, stored_edges, written_prop_phases, retrieved_text, retrieved_text_snippet, locus, processed_propositions, actual_source_id)
+            written_lines, processed_propositions = process_thesis_element(element, element_type, namespaces, all_propositions, dot_file, written_lines, stored_edges, written_prop_phases, retrieved_text, retrieved_text_snippet, locus, processed_propositions, actual_source_id, thesis_indexes)
         elif element.tag == '{http://alchemeast.eu/thesu/ns/1.0}SUPPORT':
             element_type = "SUPPORT"
             written_lines, processed_propositions = process_support_element(element, element_type, namespaces, dot_file, written_lines, retrieved_text, retrieved_text_snippet, locus, processed_propositions, actual_source_id)
@@ -3,8 +3,16 @@
 Key function: process_misc_element
 """
 from bootstrap.primary_imports import re
+from bootstrap.delayed_imports import ET
+from config.runtime_settings import XML_NAMESPACE
 from xml_processing.extractors import extract_paraphrasis_text
-from utils.text import pad_short_string
+from utils.text import pad_short_string, parse_rank
+
+_WRAP_RE = re.compile(r'(.{1,50})(?:\s|$)')
+
+_XP_NAMESPACES = {'thesu': XML_NAMESPACE}
+_XP_SPEAKERS = ET.XPath('.//thesu:speakersGroup/thesu:speaker', namespaces=_XP_NAMESPACES)
+_XP_PARAPHRASIS = ET.XPath('./thesu:paraphrasis', namespaces=_XP_NAMESPACES)
 
 def process_misc_element(element, namespaces, dot_file, written_lines, retrieved_text, retrieved_text_snippet, locus, processed_propositions, source_id=None):
     """Process a MISC element: write its DOT node with speaker, locus, paraphrasis, and styling."""
@@ -13,7 +21,7 @@ def process_misc_element(element, namespaces, dot_file, written_lines, retrieved
         element_id = element.get('{http://www.w3.org/XML/1998/namespace}id')
 
     # Get all speakers from speakersGroup
-    speaker_elements = element.findall('.//thesu:speakersGroup/thesu:speaker', namespaces=namespaces)
+    speaker_elements = _XP_SPEAKERS(element)
     
     # Process speakers according to rank
     element_speaker = ""
@@ -23,9 +31,8 @@ def process_misc_element(element, namespaces, dot_file, written_lines, retrieved
         for spk in speaker_elements:
             name_val = spk.get('{http://alchemeast.eu/thesu/ns/1.0}name')
             if name_val:
-                speaker_name = name_val.split('#')[-1]
-                rank_val = spk.get('{http://alchemeast.eu/thesu/ns/1.0}rank')
-                rank = int(rank_val) if rank_val and rank_val.isdigit() else 1
+                speaker_name = name_val.rpartition('#')[2]
+                rank = parse_rank(spk.get('{http://alchemeast.eu/thesu/ns/1.0}rank'))
                 speakers_with_rank.append((speaker_name, rank))
         
         if speakers_with_rank:
@@ -39,12 +46,12 @@ def process_misc_element(element, namespaces, dot_file, written_lines, retrieved
             element_speaker = ", ".join(top_speakers)
     
     # Get paraphrasis text; if missing, default to "/"
-    paraphrasis_elem = element.find("./thesu:paraphrasis", namespaces=namespaces)
-    if paraphrasis_elem is not None:
-        paraphrasis = extract_paraphrasis_text(paraphrasis_elem)
+    paraphrasis_match = _XP_PARAPHRASIS(element)
+    if paraphrasis_match:
+        paraphrasis = extract_paraphrasis_text(paraphrasis_match[0])
         if paraphrasis is not None: 
-            paraphrasis = re.sub(r'\s+', ' ', paraphrasis)
-            paraphrasis = re.sub(r'(.{1,50})(?:\s|$)', r'\1<br/>', paraphrasis)
+            # extract_paraphrasis_text already collapses whitespace
+            paraphrasis = _WRAP_RE.sub(r'\1<br/>', paraphrasis)
             paraphrasis = paraphrasis.replace('"', r'\"')
         else:
             paraphrasis = "/"
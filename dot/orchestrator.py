@@ -34,6 +34,9 @@ from dot.postprocess import (
     prune_and_connect_filtered_nodes,
 )
 
+# The DOT is built from many small writes; a 1 MiB buffer turns them into few large OS writes
+_DOT_WRITE_BUFFER_SIZE = 1 << 20
+
 
 def create_dot(xml_filename, dot_filename, sources_to_select=sources_to_select,
                    filter_propositions=filter_propositions,
@@ -43,7 +46,8 @@ def create_dot(xml_filename, dot_filename, sources_to_select=sources_to_select,
                    custom_prop_filters=custom_prop_filters_to_apply,
                    custom_seq_phase_filters=custom_seq_phase_filters_to_apply,
                    thesis_focus_id=thesis_focus_id,
-                   elements_to_exclude=elements_to_exclude):
+                   elements_to_exclude=elements_to_exclude,
+                   original_xml_root=None):
     """
     Main orchestrator function that creates a DOT file from XML input.
     
@@ -53,6 +57,10 @@ def create_dot(xml_filename, dot_filename, sources_to_select=sources_to_select,
     - Custom filter application
     - DOT file generation (via dot.elements)
     - Post-processing cleanup (via dot.postprocess)
+
+    original_xml_root is the unfiltered input document used for ancestor lookups
+    during edge validation; pass the same root to every create_dot call of a run
+    so it is parsed once (see dot.postprocess.load_original_xml).
     """
     try:
         # Use lxml's parser
@@ -219,7 +227,7 @@ def create_dot(xml_filename, dot_filename, sources_to_select=sources_to_select,
 
     # Ensure the rest of the DOT generation functions exist and are called correctly
     try:
-        with open(dot_filename, 'w', encoding='utf-8') as dot_file:
+        with open(dot_filename, 'w', encoding='utf-8', buffering=_DOT_WRITE_BUFFER_SIZE) as dot_file:
             write_dot_file_header(dot_file) 
 
             elements = xml_root.xpath('.//thesu:AEsystem/*', namespaces=namespaces)
@@ -227,11 +235,7 @@ def create_dot(xml_filename, dot_filename, sources_to_select=sources_to_select,
 
             written_lines, stored_edges, written_prop_phases, processed_elements, processed_propositions = initialize_elements_clusters(xml_root, filtered_elements, namespaces, all_propositions, dot_file)
             
-            for edge in stored_edges:
-                if "_to_" in edge:
-                    dot_file.write(edge)
-
-            dot_file.write('}\n\n\n')
+            dot_file.write(''.join([edge for edge in stored_edges if "_to_" in edge]) + '}\n\n\n')
 
         replace_original_xml_ids(dot_filename)
         detect_and_fix_tuple_node_ids(dot_filename)  
@@ -244,7 +248,8 @@ def create_dot(xml_filename, dot_filename, sources_to_select=sources_to_select,
         if elements_to_exclude:
             remove_excluded_node_definitions(dot_filename, elements_to_exclude)
         redirect_or_remove_invalid_edges(dot_filename, xml_filename, namespaces,
-                                        elements_to_exclude=elements_to_exclude)
+                                        elements_to_exclude=elements_to_exclude,
+                                        original_xml_root=original_xml_root)
         if elements_to_exclude:
             prune_and_connect_filtered_nodes(dot_filename, elements_to_exclude)
         remove_duplicate_definitions(dot_filename)
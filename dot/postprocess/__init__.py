@@ -15,7 +15,7 @@ Individual functions are organized into:
 # Re-export functions from specialized modules
 from .id_cleanup import replace_original_xml_ids
 from .reorganization import reorganize_dot_file
-from .edge_validation import redirect_or_remove_invalid_edges
+from .edge_validation import redirect_or_remove_invalid_edges, load_original_xml
 from .excluded_filter import remove_excluded_node_definitions
 from .filtered_pruning import prune_and_connect_filtered_nodes
 from .deduplication import remove_duplicate_definitions
@@ -27,6 +27,7 @@ __all__ = [
     'replace_original_xml_ids',
     'reorganize_dot_file',
     'redirect_or_remove_invalid_edges',
+    'load_original_xml',
     'remove_excluded_node_definitions',
     'prune_and_connect_filtered_nodes',
     'remove_duplicate_definitions',
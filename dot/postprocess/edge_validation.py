@@ -9,6 +9,10 @@ instead of being redirected or removed.
 from bootstrap.primary_imports import re
 from bootstrap.delayed_imports import ET
 
+# Precompiled xml:id lookups; the id is bound as an XPath variable rather than interpolated
+_XP_DESC_BY_XML_ID = ET.XPath('.//*[@xml:id=$sid]')
+_XP_ANY_BY_XML_ID = ET.XPath('//*[@xml:id=$sid]')
+
 # Styling for filtered pseudo-nodes (mirrors omitted nodes from dot/support.py)
 _FILTERED_NODE_STYLES = {
     "THESIS": {"fill": "#f0faf0", "border": "#82b366", "shape": "box", "style": "rounded,filled", "gephi_label": "THES"},
@@ -27,17 +31,17 @@ def _infer_element_type_from_id(node_id):
     return "THESIS"  # Default fallback
 
 
-def _get_excluded_element_type(elem_id, xml_root, namespaces):
+def _get_excluded_element_type(elem_id, xml_root):
     """Get element type (THESIS/SUPPORT) from XML, or infer from ID."""
     if xml_root is None:
         return _infer_element_type_from_id(elem_id)
     try:
-        elements = xml_root.xpath(f'.//*[@xml:id="{elem_id}"]', namespaces=namespaces)
+        elements = _XP_DESC_BY_XML_ID(xml_root, sid=elem_id)
         if not elements:
             # Try with just the local part (e.g. T190127 from tlg0007_tlg112.T190127)
             id_parts = elem_id.split(".")
             if len(id_parts) > 1:
-                elements = xml_root.xpath(f'.//*[@xml:id="{id_parts[-1]}"]', namespaces=namespaces)
+                elements = _XP_DESC_BY_XML_ID(xml_root, sid=id_parts[-1])
         if elements:
             tag = elements[0].tag
             if "THESIS" in tag:
@@ -66,28 +70,37 @@ def _make_filtered_node_line(excluded_id, element_type):
     )
 
 
-def redirect_or_remove_invalid_edges(dot_filename, xml_filename, namespaces, elements_to_exclude=None):
+def load_original_xml(xml_filename):
     """
-    Removes edges where one or both referenced nodes do not have an explicit definition
-    in the DOT file. Before removing:
-    - If the missing node is in elements_to_exclude, substitutes it with a "filtered" pseudo-node.
-    - Otherwise, tries to preserve edges by redirecting missing nodes to their ancestor
-      THESIS elements if the ancestor exists as a defined node in the DOT.
-    Uses strict line-by-line parsing based on DOT syntax.
-    Re-parses the original XML file to ensure ancestor lookups are accurate.
+    Parses the original (unfiltered) XML file for ancestor lookups in
+    redirect_or_remove_invalid_edges. Returns its root, or None if it cannot be parsed.
     """
-    # --- Re-parse the original XML file ---
-    xml_root_original = None
     try:
-        xml_tree_original = ET.parse(xml_filename)
-        xml_root_original = xml_tree_original.getroot()
-        # Successfully re-parsed original XML
+        return ET.parse(xml_filename).getroot()
     except ET.ParseError as e:
         print(f"ERROR: Failed to re-parse original XML file '{xml_filename}': {e}")
         print("WARNING: Ancestor redirection for missing nodes will be skipped.")
     except FileNotFoundError:
         print(f"ERROR: Original XML file not found at '{xml_filename}'")
         print("WARNING: Ancestor redirection for missing nodes will be skipped.")
+    return None
+
+
+def redirect_or_remove_invalid_edges(dot_filename, xml_filename, namespaces, elements_to_exclude=None,
+                                     original_xml_root=None):
+    """
+    Removes edges where one or both referenced nodes do not have an explicit definition
+    in the DOT file. Before removing:
+    - If the missing node is in elements_to_exclude, substitutes it with a "filtered" pseudo-node.
+    - Otherwise, tries to preserve edges by redirecting missing nodes to their ancestor
+      THESIS elements if the ancestor exists as a defined node in the DOT.
+    Uses strict line-by-line parsing based on DOT syntax.
+    Ancestor lookups use original_xml_root, the unfiltered document parsed once per run
+    by the caller; when it is not given, the original XML file is re-parsed here.
+    """
+    # --- Original (unfiltered) XML for ancestor lookups ---
+    if original_xml_root is None:
+        original_xml_root = load_original_xml(xml_filename)
 
     # Read the DOT file lines
     with open(dot_filename, 'r', encoding='utf-8') as f:
@@ -150,7 +163,7 @@ def redirect_or_remove_invalid_edges(dot_filename, xml_filename, namespaces, ele
     if elements_to_exclude:
         excluded_set = set(str(x).strip() for x in elements_to_exclude if x)
     for elem_id in excluded_set:
-        excluded_type_cache[elem_id] = _get_excluded_element_type(elem_id, xml_root_original, namespaces)
+        excluded_type_cache[elem_id] = _get_excluded_element_type(elem_id, original_xml_root)
 
     # Track filtered nodes we create (to avoid duplicates and to add definitions)
     filtered_nodes_to_add = {}  # excluded_id -> node_definition_line
@@ -169,8 +182,7 @@ def redirect_or_remove_invalid_edges(dot_filename, xml_filename, namespaces, ele
             for lookup_id in [node_id, extracted_id]:
                 if not lookup_id: continue
                 # Use the provided xml_root_to_search and local_namespaces
-                xpath_query = f'//*[@xml:id="{lookup_id}"]'
-                elements = xml_root_to_search.xpath(xpath_query, namespaces=local_namespaces)
+                elements = _XP_ANY_BY_XML_ID(xml_root_to_search, sid=lookup_id)
                 if elements and len(elements) > 0:
                     found_element = elements[0]
                     # print(f"    Found XML element with ID '{lookup_id}', tag: {found_element.tag}")
@@ -228,7 +240,7 @@ def redirect_or_remove_invalid_edges(dot_filename, xml_filename, namespaces, ele
                     elem_type = excluded_type_cache.get(source_node, _infer_element_type_from_id(source_node))
                     filtered_nodes_to_add[source_node] = _make_filtered_node_line(source_node, elem_type)
             else:
-                ancestor = find_thesis_ancestor(source_node, defined_nodes, xml_root_original, namespaces)
+                ancestor = find_thesis_ancestor(source_node, defined_nodes, original_xml_root, namespaces)
                 if ancestor:
                     final_source = ancestor
                     needs_modification = True
@@ -244,7 +256,7 @@ def redirect_or_remove_invalid_edges(dot_filename, xml_filename, namespaces, ele
                     elem_type = excluded_type_cache.get(target_node, _infer_element_type_from_id(target_node))
                     filtered_nodes_to_add[target_node] = _make_filtered_node_line(target_node, elem_type)
             else:
-                ancestor = find_thesis_ancestor(target_node, defined_nodes, xml_root_original, namespaces)
+                ancestor = find_thesis_ancestor(target_node, defined_nodes, original_xml_root, namespaces)
                 if ancestor:
                     final_target = ancestor
                     needs_modification = True
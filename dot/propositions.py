@@ -1,12 +1,60 @@
 """Proposition-related DOT building functions.
 
-Key functions: process_referenced_propositions, get_proposition_sequences,
-parse_phases_ref, process_proposition_sequences
+Key classes: WrittenPropPhases
+Key functions: process_referenced_propositions, get_proposition_node_line,
+get_proposition_sequences, parse_phases_ref, process_proposition_sequences
 """
+from functools import lru_cache
+from types import MappingProxyType
 from bootstrap.primary_imports import re, random
+from config.runtime_settings import XML_NAMESPACE
 from xml_processing.extractors import extract_paraphrasis_text
 from xml_processing.selectors import get_all_proposition_ids
 
+_PARAPHRASIS_TAG = f'{{{XML_NAMESPACE}}}paraphrasis'
+_WRAP50 = re.compile(r'(.{1,50})(?:\s|$)')
+
+# PROPOSITION node lines by prop_id, stored with the element they were built from so
+# that entries from a previously loaded document are rebuilt rather than reused
+_PROP_LINE_CACHE = {}
+
+class WrittenPropPhases(dict):
+    """Mapping of written PROPOSITION phase_id -> phase_data, indexed by the phases' sequence_id."""
+
+    def __init__(self):
+        super().__init__()
+        self.by_sequence = {}  # sequence_id -> [phase_id, ...] in first-insertion order
+        self._position = {}    # phase_id -> first-insertion index
+
+    def __setitem__(self, phase_id, phase_data):
+        if phase_id not in self._position:
+            self._position[phase_id] = len(self._position)
+            self.by_sequence.setdefault(phase_data.get('sequence_id', ''), []).append(phase_id)
+        super().__setitem__(phase_id, phase_data)
+
+    def phases_for_sequence(self, sequence_id):
+        """Return [(phase_id, phase_data)] whose sequence_id contains sequence_id, in insertion order."""
+        phase_ids = []
+        matched_sequences = 0
+        for written_sequence_id, sequence_phase_ids in self.by_sequence.items():
+            if sequence_id in written_sequence_id:
+                phase_ids.extend(sequence_phase_ids)
+                matched_sequences += 1
+        if matched_sequences > 1:
+            phase_ids.sort(key=self._position.__getitem__)
+        return [(phase_id, self[phase_id]) for phase_id in phase_ids]
+
+def get_proposition_node_line(prop_id, proposition_element):
+    """Return the DOT node line for a PROPOSITION, built once per proposition element."""
+    cached = _PROP_LINE_CACHE.get(prop_id)
+    if cached is not None and cached[0] is proposition_element:
+        return cached[1]
+    # extract_paraphrasis_text already collapses whitespace
+    paraphrasis = _WRAP50.sub(r'\1<br/>', extract_paraphrasis_text(proposition_element.find(_PARAPHRASIS_TAG)))
+    node_line = f'"{prop_id}" [label=<<b>PROPOSITION</b><br/><i>{paraphrasis}</i>>, gephi_label="PROP", shape="doubleoctagon", style="rounded,filled", fillcolor="#f9edff", color="#9673a6"];\n\n'
+    _PROP_LINE_CACHE[prop_id] = (proposition_element, node_line)
+    return node_line
+
 def process_referenced_propositions(filtered_elements, namespaces, all_propositions, dot_file, written_lines, written_prop_phases, processed_propositions):
     """Process all propositions referenced in filtered elements, writing DOT nodes and sequences."""
     all_proposition_ids = get_all_proposition_ids(filtered_elements, namespaces)
@@ -20,11 +68,7 @@ def process_referenced_propositions(filtered_elements, namespaces, all_propositi
             # Mark as processed
             processed_propositions.add(prop_id)
             
-            paraphrasis_elem = proposition_element.find("./thesu:paraphrasis", namespaces=namespaces)
-            paraphrasis = extract_paraphrasis_text(paraphrasis_elem)
-            paraphrasis = re.sub(r'\s+', ' ', paraphrasis)
-            paraphrasis = re.sub(r'(.{1,50})(?:\s|$)', r'\1<br/>', paraphrasis)
-            node_line = f'"{prop_id}" [label=<<b>PROPOSITION</b><br/><i>{paraphrasis}</i>>, gephi_label="PROP", shape="doubleoctagon", style="rounded,filled", fillcolor="#f9edff", color="#9673a6"];\n\n'
+            node_line = get_proposition_node_line(prop_id, proposition_element)
             dot_file.write(node_line)
             written_lines.append(node_line)
             
@@ -83,7 +127,7 @@ def get_proposition_sequences(element, namespaces, element_id):
                             if child.tail:
                                 phase_paraphrasis += child.tail
                                 
-                        phase_paraphrasis = re.sub(r'\s+', ' ', phase_paraphrasis).strip()
+                        phase_paraphrasis = ' '.join(phase_paraphrasis.split())
                     else:
                         # Try to find microThemedFreeText and then freeText
                         micro_themed = phase.find('./thesu:microThemedFreeText', namespaces=namespaces)
@@ -98,7 +142,7 @@ def get_proposition_sequences(element, namespaces, element_id):
                                     if child.tail:
                                         phase_paraphrasis += child.tail
                                         
-                                phase_paraphrasis = re.sub(r'\s+', ' ', phase_paraphrasis).strip()
+                                phase_paraphrasis = ' '.join(phase_paraphrasis.split())
                             else:
                                 phase_paraphrasis = "/"  # No freeText element found
                         else:
@@ -117,21 +161,25 @@ def get_proposition_sequences(element, namespaces, element_id):
     
     return sequences_dict
 
+_EMPTY_PHASES_REF = MappingProxyType({})
+
+@lru_cache(maxsize=8192)
 def parse_phases_ref(phases_ref):
     """
     Parse a phasesRef string like "1.1,1.4-5,2.1" into structured data.
-    Returns a dictionary where:
+    Results are cached per string and shared between callers, so they are returned read-only.
+    Returns a mapping where:
     - keys are phase group numbers
-    - values are lists of specific phase numbers within that group
+    - values are tuples of specific phase numbers within that group
     
     For example, "1.1,1.4-5,2.1" would return:
     {
-        1: [1, 4, 5],
-        2: [1]
+        1: (1, 4, 5),
+        2: (1,)
     }
     """
     if not phases_ref or phases_ref == "/":
-        return {}
+        return _EMPTY_PHASES_REF
     
     result = {}
     # Split by commas to get individual references
@@ -177,13 +225,13 @@ def parse_phases_ref(phases_ref):
             # Skip any invalid reference parts
             continue
     
-    return result
+    return MappingProxyType({group_num: tuple(phase_nums) for group_num, phase_nums in result.items()})
 
 def process_proposition_sequences(sequences_dict, element_id, dot_file, written_lines, written_prop_phases):
     """Write DOT nodes and edges for proposition sequences to the dot file."""
     if sequences_dict:
         # Get unique sequence IDs
-        unique_sequence_ids = set([value['sequence_id'] for value in sequences_dict.values()])
+        unique_sequence_ids = {value['sequence_id'] for value in sequences_dict.values()}
         
         for sequence_id in unique_sequence_ids:
             # Filter the phases belonging to the same sequence_id
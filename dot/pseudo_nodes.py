@@ -1,55 +1,85 @@
 """Pseudo-node ID generation for DOT graphs.
 
+Key classes: WrittenLines
 Key functions: pseudo_node_exists, generate_unique_pseudo_node_id_*
 """
+from bootstrap.primary_imports import re
 
+# Double-quoted DOT IDs/values, honouring backslash-escaped quotes inside them
+_QUOTED_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+class WrittenLines:
+    """Record of the DOT lines written so far, kept as an index of their quoted tokens.
+
+    Only the quoted tokens are needed (for O(1) pseudo-node ID lookups), so the lines
+    themselves are not retained unless capture=True, e.g. for debugging.
+    id_cursors remembers, per pseudo-node ID sequence, how far the last uniqueness probe
+    got, so repeated allocations for the same element pair do not re-probe taken suffixes.
+    """
+    __slots__ = ('quoted_ids', 'id_cursors', 'lines')
+
+    def __init__(self, lines=(), capture=False):
+        self.quoted_ids = set()
+        self.id_cursors = {}
+        self.lines = [] if capture else None
+        self.extend(lines)
+
+    def append(self, line):
+        if self.lines is not None:
+            self.lines.append(line)
+        self.quoted_ids.update(_QUOTED_RE.findall(line))
+
+    def extend(self, lines):
+        if self.lines is not None:
+            lines = list(lines)
+            self.lines.extend(lines)
+        quoted_ids = self.quoted_ids
+        for line in lines:
+            quoted_ids.update(_QUOTED_RE.findall(line))
 
 def pseudo_node_exists(written_lines, unique_id):
     """Return True if a pseudo-node with the given unique_id already exists in written_lines."""
+    quoted_ids = getattr(written_lines, 'quoted_ids', None)
+    if quoted_ids is not None:
+        return unique_id in quoted_ids
     for line in written_lines:
         if f'"{unique_id}"' in line:
             return True
     return False
 
+def _unique_pseudo_node_id(written_lines, base_id, suffix):
+    """Return the first unused ID of the form base_id_<suffix> (numeric) or base_id_<suffix>[_<n>] (string)."""
+    first_id = f"{base_id}_{suffix}"
+    numeric = not isinstance(suffix, str) or suffix.isdigit()
+    if numeric:
+        suffix = int(suffix)
+    
+    # Every ID probed before the cursor was taken then and still is, so resume from there
+    cursors = getattr(written_lines, 'id_cursors', None)
+    key = (base_id, suffix)
+    position = cursors.get(key, 0) if cursors is not None else 0
+    while True:
+        if position == 0:
+            unique_id = first_id
+        elif numeric:
+            unique_id = f"{base_id}_{suffix + position}"
+        else:
+            unique_id = f"{base_id}_{suffix}_{position}"
+        if not pseudo_node_exists(written_lines, unique_id):
+            break
+        position += 1
+    
+    if cursors is not None:
+        cursors[key] = position
+    return unique_id
+
 def generate_unique_pseudo_node_id_targets(written_lines, element_id, target_ref, suffix):
     """Generate a unique ID for target pseudo-nodes, avoiding collisions with existing written lines."""
-    unique_id = f"{element_id}_to_{target_ref}_{suffix}"
-    
-    # If the suffix is a string like "unspecified", we need to handle differently
-    if isinstance(suffix, str) and not suffix.isdigit():
-        counter = 1
-        temp_unique_id = unique_id
-        while pseudo_node_exists(written_lines, temp_unique_id):
-            temp_unique_id = f"{element_id}_to_{target_ref}_{suffix}_{counter}"
-            counter += 1
-        return temp_unique_id
-    else:
-        # Original logic for numeric suffixes
-        numeric_suffix = int(suffix) if isinstance(suffix, str) else suffix
-        while pseudo_node_exists(written_lines, unique_id):
-            numeric_suffix += 1
-            unique_id = f"{element_id}_to_{target_ref}_{numeric_suffix}"
-        return unique_id
+    return _unique_pseudo_node_id(written_lines, f"{element_id}_to_{target_ref}", suffix)
 
 def generate_unique_pseudo_node_id_entailments(written_lines, entailed_by_ref, element_id, suffix):
     """Generate a unique ID for entailment pseudo-nodes, avoiding collisions with existing written lines."""
-    unique_id = f"{entailed_by_ref}_to_{element_id}_{suffix}"
-    
-    # If the suffix is a string like "unspecified", we need to handle differently
-    if isinstance(suffix, str) and not suffix.isdigit():
-        counter = 1
-        temp_unique_id = unique_id
-        while pseudo_node_exists(written_lines, temp_unique_id):
-            temp_unique_id = f"{entailed_by_ref}_to_{element_id}_{suffix}_{counter}"
-            counter += 1
-        return temp_unique_id
-    else:
-        # Original logic for numeric suffixes
-        numeric_suffix = int(suffix) if isinstance(suffix, str) else suffix
-        while pseudo_node_exists(written_lines, unique_id):
-            numeric_suffix += 1
-            unique_id = f"{entailed_by_ref}_to_{element_id}_{numeric_suffix}"
-        return unique_id
+    return _unique_pseudo_node_id(written_lines, f"{entailed_by_ref}_to_{element_id}", suffix)
 
 def generate_unique_pseudo_node_id_etiologies(written_lines, referenced_id, element_id, suffix):
     """
@@ -64,11 +94,7 @@ def generate_unique_pseudo_node_id_etiologies(written_lines, referenced_id, elem
     Returns:
         str: A unique ID for the pseudo-node
     """
-    base_id = f"{referenced_id}_in_etiology_in_{element_id}_{suffix}"
-    while any(base_id in line for line in written_lines):
-        suffix += 1
-        base_id = f"{referenced_id}_in_etiology_in_{element_id}_{suffix}"
-    return base_id
+    return _unique_pseudo_node_id(written_lines, f"{referenced_id}_in_etiology_in_{element_id}", suffix)
 
 def generate_unique_pseudo_node_id_analogies(written_lines, referenced_id, element_id, suffix):
     """
@@ -83,23 +109,7 @@ def generate_unique_pseudo_node_id_analogies(written_lines, referenced_id, eleme
     Returns:
         str: A unique ID for the pseudo-node
     """
-    unique_id = f"{referenced_id}_analogy_to_{element_id}_{suffix}"
-    
-    # If the suffix is a string like "unspecified", we need to handle differently
-    if isinstance(suffix, str) and not suffix.isdigit():
-        counter = 1
-        temp_unique_id = unique_id
-        while pseudo_node_exists(written_lines, temp_unique_id):
-            temp_unique_id = f"{referenced_id}_analogy_to_{element_id}_{suffix}_{counter}"
-            counter += 1
-        return temp_unique_id
-    else:
-        # Original logic for numeric suffixes
-        numeric_suffix = int(suffix) if isinstance(suffix, str) else suffix
-        while pseudo_node_exists(written_lines, unique_id):
-            numeric_suffix += 1
-            unique_id = f"{referenced_id}_analogy_to_{element_id}_{numeric_suffix}"
-        return unique_id
+    return _unique_pseudo_node_id(written_lines, f"{referenced_id}_analogy_to_{element_id}", suffix)
 
 def generate_unique_pseudo_node_id_references(written_lines, element_id, referenced_id, suffix):
     """
@@ -114,80 +124,16 @@ def generate_unique_pseudo_node_id_references(written_lines, element_id, referen
     Returns:
         str: A unique ID for the pseudo-node
     """
-    unique_id = f"{referenced_id}_referenced-in_{element_id}_{suffix}"
-    
-    # If the suffix is a string like "unspecified", we need to handle differently
-    if isinstance(suffix, str) and not suffix.isdigit():
-        counter = 1
-        temp_unique_id = unique_id
-        while pseudo_node_exists(written_lines, temp_unique_id):
-            temp_unique_id = f"{referenced_id}_referenced-in_{element_id}_{suffix}_{counter}"
-            counter += 1
-        return temp_unique_id
-    else:
-        # Original logic for numeric suffixes
-        numeric_suffix = int(suffix) if isinstance(suffix, str) else suffix
-        while pseudo_node_exists(written_lines, unique_id):
-            numeric_suffix += 1
-            unique_id = f"{referenced_id}_referenced-in_{element_id}_{numeric_suffix}"
-        return unique_id
+    return _unique_pseudo_node_id(written_lines, f"{referenced_id}_referenced-in_{element_id}", suffix)
 
 def generate_unique_pseudo_node_id_matching_propositions(written_lines, prop_ref, element_id, suffix):
     """Generate a unique ID for matching-proposition pseudo-nodes, avoiding collisions with existing written lines."""
-    unique_id = f"{prop_ref}_to_{element_id}_{suffix}"
-    
-    # If the suffix is a string like "unspecified", we need to handle differently
-    if isinstance(suffix, str) and not suffix.isdigit():
-        counter = 1
-        temp_unique_id = unique_id
-        while pseudo_node_exists(written_lines, temp_unique_id):
-            temp_unique_id = f"{prop_ref}_to_{element_id}_{suffix}_{counter}"
-            counter += 1
-        return temp_unique_id
-    else:
-        # Original logic for numeric suffixes
-        numeric_suffix = int(suffix) if isinstance(suffix, str) else suffix
-        while pseudo_node_exists(written_lines, unique_id):
-            numeric_suffix += 1
-            unique_id = f"{prop_ref}_to_{element_id}_{numeric_suffix}"
-        return unique_id
+    return _unique_pseudo_node_id(written_lines, f"{prop_ref}_to_{element_id}", suffix)
 
 def generate_unique_pseudo_node_id_matching_sequences(written_lines, cluster_id, prop_cluster_id, suffix):
     """Generate a unique ID for matching-sequence pseudo-nodes, avoiding collisions with existing written lines."""
-    unique_id = f"{cluster_id}_to_{prop_cluster_id}_{suffix}"
-    
-    # If the suffix is a string like "unspecified", we need to handle differently
-    if isinstance(suffix, str) and not suffix.isdigit():
-        counter = 1
-        temp_unique_id = unique_id
-        while pseudo_node_exists(written_lines, temp_unique_id):
-            temp_unique_id = f"{cluster_id}_to_{prop_cluster_id}_{suffix}_{counter}"
-            counter += 1
-        return temp_unique_id
-    else:
-        # Original logic for numeric suffixes
-        numeric_suffix = int(suffix) if isinstance(suffix, str) else suffix
-        while pseudo_node_exists(written_lines, unique_id):
-            numeric_suffix += 1
-            unique_id = f"{cluster_id}_to_{prop_cluster_id}_{numeric_suffix}"
-        return unique_id
+    return _unique_pseudo_node_id(written_lines, f"{cluster_id}_to_{prop_cluster_id}", suffix)
 
 def generate_unique_pseudo_node_id_matching_phases(written_lines, prop_phase_ref, current_phase, suffix):
     """Generate a unique ID for matching-phase pseudo-nodes, avoiding collisions with existing written lines."""
-    unique_id = f"{prop_phase_ref}_to_{current_phase}_{suffix}"
-    
-    # If the suffix is a string like "unspecified", we need to handle differently
-    if isinstance(suffix, str) and not suffix.isdigit():
-        counter = 1
-        temp_unique_id = unique_id
-        while pseudo_node_exists(written_lines, temp_unique_id):
-            temp_unique_id = f"{prop_phase_ref}_to_{current_phase}_{suffix}_{counter}"
-            counter += 1
-        return temp_unique_id
-    else:
-        # Original logic for numeric suffixes
-        numeric_suffix = int(suffix) if isinstance(suffix, str) else suffix
-        while pseudo_node_exists(written_lines, unique_id):
-            numeric_suffix += 1
-            unique_id = f"{prop_phase_ref}_to_{current_phase}_{numeric_suffix}"
-        return unique_id
+    return _unique_pseudo_node_id(written_lines, f"{prop_phase_ref}_to_{current_phase}", suffix)
@@ -3,18 +3,103 @@
 Key functions: process_support_element, get_function_and_aim, process_support_targets,
 process_explicit_targets, process_omitted_targets, process_employed_elements
 """
-from bootstrap.primary_imports import re
+from io import StringIO
+from collections import namedtuple
+from itertools import chain
+from bootstrap.primary_imports import re, sys
+from bootstrap.delayed_imports import ET
 from xml_processing.extractors import extract_paraphrasis_text
-from utils.text import pad_short_string
+from utils.text import pad_short_string, parse_rank
 from config.runtime_settings import XML_NAMESPACE
 from dot.pseudo_nodes import generate_unique_pseudo_node_id_targets
 
+# Namespace-qualified thesu attribute names
+_NS = f'{{{XML_NAMESPACE}}}'
+_NS_ID = _NS + 'id'
+_NS_NAME = _NS + 'name'
+_NS_RANK = _NS + 'rank'
+_NS_REF = _NS + 'ref'
+_NS_NUMBER = _NS + 'number'
+_NS_FORMTAG = _NS + 'formTag'
+_NS_EXTRINSIC = _NS + 'extrinsic'
+_NS_IMPLICIT = _NS + 'implicit'
+
+# Precompiled XPath lookups on SUPPORT elements
+_XP_NAMESPACES = {'thesu': XML_NAMESPACE}
+_XP_SPEAKERS = ET.XPath('.//thesu:speakersGroup/thesu:speaker', namespaces=_XP_NAMESPACES)
+_XP_PARAPHRASIS = ET.XPath('./thesu:paraphrasis', namespaces=_XP_NAMESPACES)
+_XP_FORM = ET.XPath('.//thesu:supportType/thesu:supportForm[1]', namespaces=_XP_NAMESPACES)
+
+# Interned implicit flags and styles shared by every SUPPORT
+_TRUE = sys.intern('true')
+_FALSE = sys.intern('false')
+_FILLED = sys.intern('filled')
+_DASHED_FILLED = sys.intern('dashed,filled')
+
+# Tokens dropped from the locus attribute (after ' (of ' becomes '_')
+_LOCUS_DELETE_RE = re.compile(r'<i>|</i>|\)')
+
+# Function attribute mappings for SUPPORT styling, keyed by function then implicit flag
+_FUNCTION_ATTRIBUTES = {
+    'JUSTIFIES': {'false': {'gephi_label':'jus','fill': '#dae8fc', 'peripheries': '#7c9ac7', 'shape': 'diamond'},
+                  'true':  {'gephi_label':'(jus)','fill': '#f5f8fd', 'peripheries': '#949ebf', 'shape': 'diamond'}},
+    'REFUTES': {'false': {'gephi_label':'ref','fill': '#f8cecc', 'peripheries': '#b95753', 'shape': 'diamond'},
+                'true':  {'gephi_label':'(ref)','fill': '#fdf6f6', 'peripheries': '#a89794', 'shape': 'diamond'}},
+    'DISCUSSES': {'false': {'gephi_label':'dis','fill': '#ffff99', 'peripheries': '#b3b300', 'shape': 'diamond'},
+                  'true':  {'gephi_label':'(dis)','fill': '#ffffe6', 'peripheries': '#999966', 'shape': 'diamond'}},
+    'EXPLAINS': {'false': {'gephi_label':'exp','fill': '#edffc4', 'peripheries': '#927b89', 'shape': 'parallelogram'},
+                 'true':  {'gephi_label':'(exp)','fill': '#f9facb', 'peripheries': '#a59ba1', 'shape': 'parallelogram'}},
+    'EXPANDS ON': {'false': {'gephi_label':'exc','fill': '#999999', 'peripheries': '#4d4d4d', 'shape': 'invhouse'},
+                   'true':  {'gephi_label':'(exc)','fill': '#cccccc', 'peripheries': '#828282', 'shape': 'invhouse'}},
+    'CONTEXTUALIZES': {'false': {'gephi_label':'con','fill': '#ecd4bb', 'peripheries': '#b39c84', 'shape': 'cylinder'},
+                       'true':  {'gephi_label':'(con)','fill': '#f6ede6', 'peripheries': '#b3a89a', 'shape': 'cylinder'}}
+}
+
+# Flat (function, implicit flag) -> style view of _FUNCTION_ATTRIBUTES: one hash lookup per access
+_FnStyle = namedtuple('_FnStyle', 'gephi_label fill peripheries shape')
+_FN_STYLES = {(function, implicit): _FnStyle(**values)
+              for function, by_implicit in _FUNCTION_ATTRIBUTES.items()
+              for implicit, values in by_implicit.items()}
+
+# Fixed styling of omitted THESIS and MISC nodes (MISCs styled like explicit CONTEXTUALIZES),
+# keyed by the omitted element's local name
+_OmittedStyle = namedtuple('_OmittedStyle', 'display_type fill border shape style')
+_OMITTED_TYPE_STYLES = {
+    "omittedTHESES": _OmittedStyle("THESIS", "#f0faf0", "#82b366", "box", "rounded,filled"),
+    "omittedMISCS": _OmittedStyle("MISC", "#ecd4bb", "#b39c84", "cylinder", "filled"),
+}
+
+# Omitted-support rank attributes mapped to the function they stand for
+_OMITTED_RANK_ATTRS = (
+    (_NS + 'omittedArgumentationRank', "JUSTIFIES"),
+    (_NS + 'omittedExpositionRank', "EXPLAINS"),
+    (_NS + 'omittedExpansionRank', "EXPANDS ON"),
+    (_NS + 'omittedContextualisationRank', "CONTEXTUALIZES"),
+)
+
+def _resolve_omitted_support_style(child, function_styles, namespaces):
+    """Return (fill, border, style, shape) for an omittedSUPPORTS element based on its dominant function."""
+    func_elem = child.find('.//thesu:omittedSupportsFunctions', namespaces=namespaces)
+    # Default all functions to rank 4
+    ranks = {"JUSTIFIES": 4, "EXPLAINS": 4, "EXPANDS ON": 4, "CONTEXTUALIZES": 4}
+    if func_elem is not None:
+        for attr, key in _OMITTED_RANK_ATTRS:
+            value = func_elem.get(attr)
+            if value and value.isdigit():
+                ranks[key] = int(value)
+    dominant_function = min(ranks, key=ranks.get)
+    explicit_style = function_styles.get((dominant_function, 'false'))
+    # Omitted SUPPORT nodes are always ellipses
+    if explicit_style is not None:
+        return explicit_style.fill, explicit_style.peripheries, "rounded,filled", "ellipse"
+    return "#dae8fc", "#7c9ac7", "rounded,filled", "ellipse"
+
 def get_function_and_aim(support_element, namespaces):
     """Extract the primary support function (JUSTIFIES, EXPLAINS, etc.) and aim from a SUPPORT element."""
     support_functions_group = support_element.find('.//thesu:supportFunctionsGroup', namespaces=namespaces)
     
     functions = list(support_functions_group)
-    functions_with_rank = [(function, int(function.get(f'{{{XML_NAMESPACE}}}rank')) if function.get(f'{{{XML_NAMESPACE}}}rank') is not None and function.get(f'{{{XML_NAMESPACE}}}rank').isdigit() else float('inf')) for function in functions]
+    functions_with_rank = [(function, int(function.get(_NS_RANK)) if function.get(_NS_RANK) is not None and function.get(_NS_RANK).isdigit() else float('inf')) for function in functions]
     top_function = min(functions_with_rank, key=lambda x: x[1])
 
     element, rank = top_function
@@ -39,10 +124,55 @@ def get_function_and_aim(support_element, namespaces):
 
     return function, aim
 
-def process_support_targets(element, function, implicit_style, function_attributes,
+# Fixed attribute runs of omitted pseudo-node lines, joined around the varying fields
+_OMITTED_FLAGS = '", gephi_omitted="true", fontsize="11", fillcolor="'
+_OMITTED_UNSPECIFIED_FLAGS = '", gephi_omitted="true", gephi_unspecified="true", fontsize="11", fillcolor="'
+
+def _format_omitted_node(pseudo_node_id, label, gephi_label, fill, border, style, shape, source_attr, unspecified=False):
+    """Build the DOT line for an omitted pseudo-node."""
+    return ''.join(('"', pseudo_node_id, '" [label=<', label, '>, gephi_label="', gephi_label,
+                    _OMITTED_UNSPECIFIED_FLAGS if unspecified else _OMITTED_FLAGS,
+                    fill, '", color="', border, '", style="', style, '", shape="', shape, '"',
+                    source_attr, '];\n\n'))
+
+def _ensure_func_node(func_node_id, element_id, function, t_gephi_label,
+                      support_fill, support_border, support_style, dot_file, written_lines):
+    """Write the SUPPORT function node and its SUPPORT edge the first time it is needed."""
+    if func_node_id is not None:
+        return func_node_id
+    func_node_id = f"{element_id}_func"
+    line_to_write = (f'"{func_node_id}" [label="{function}", gephi_label="{t_gephi_label}", '
+                     f'gephi_omitted="false", fontsize="11", fillcolor="{support_fill}", '
+                     f'color="{support_border}", style="{support_style}", shape="ellipse"];\n\n')
+    dot_file.write(line_to_write)
+    written_lines.append(line_to_write)
+
+    # Connect SUPPORT to function node
+    line_to_write = f'"{element_id}" -> "{func_node_id}" [dir=none, color="{support_border}", style="{support_style}"];\n\n'
+    dot_file.write(line_to_write)
+    written_lines.append(line_to_write)
+    return func_node_id
+
+def _ensure_employed_node(employed_node_id, element_id, dot_file, written_lines):
+    """Write the common EMPLOYED IN node and its SUPPORT edge the first time it is needed."""
+    if employed_node_id is not None:
+        return employed_node_id
+    employed_node_id = f"{element_id}_employed"
+    # Create the common employed pseudo-node with fixed styling:
+    line_to_write = (f'"{employed_node_id}" [label="EMPLOYED IN", gephi_label="in", fontsize="11", '
+                     f'fillcolor="#ffe6cc", color="#d79c02", gephi_omitted="false", shape="ellipse", style="filled"];\n\n')
+    dot_file.write(line_to_write)
+    written_lines.append(line_to_write)
+    # Connect employed node -> SUPPORT (to force vertical ordering)
+    line_to_write = f'"{employed_node_id}" -> "{element_id}" [color="#d79c02", style="solid"];\n\n'
+    dot_file.write(line_to_write)
+    written_lines.append(line_to_write)
+    return employed_node_id
+
+def process_support_targets(element, function, implicit_style, function_styles,
                            t_gephi_label, support_fill, support_border, support_style,
                            t_border,
-                           namespaces, dot_file, written_lines, element_id, processed_propositions, source_id=None):
+                           namespaces, dot_file, written_lines, element_id, source_id=None):
     """
     Process all the targets referred to by a SUPPORT.
     
@@ -59,84 +189,77 @@ def process_support_targets(element, function, implicit_style, function_attribut
     # === PROCESS TARGETS (things the SUPPORT refers to) ===
     
     # 1. Process explicit targets
-    func_node_id, processed_propositions = process_explicit_targets(
+    func_node_id = process_explicit_targets(
         element, element_id, function, t_gephi_label, support_fill, support_border, 
         support_style, t_border, implicit_style, namespaces, dot_file, 
-        written_lines, func_node_id, processed_propositions
+        written_lines, func_node_id
     )
     
     # 2. Process omitted targets
-    func_node_id, processed_propositions = process_omitted_targets(
+    func_node_id = process_omitted_targets(
         element, element_id, function, t_gephi_label, support_fill, support_border, 
         support_style, t_border, implicit_style, 
-        function_attributes, namespaces, dot_file, written_lines, func_node_id, processed_propositions, source_id
+        function_styles, namespaces, dot_file, written_lines, func_node_id, source_id
     )
     
     # === PROCESS EMPLOYED ELEMENTS (things used within the SUPPORT) ===
     
     # 3. Process employed elements (both explicit and omitted)
-    employed_node_id, processed_propositions = process_employed_elements(
-        element, element_id, function_attributes, namespaces, 
-        dot_file, written_lines, employed_node_id, processed_propositions, source_id
+    employed_node_id = process_employed_elements(
+        element, element_id, function_styles, namespaces, 
+        dot_file, written_lines, employed_node_id, source_id
     )
 
-    return func_node_id, written_lines, processed_propositions
+    return func_node_id, written_lines
 
 def process_explicit_targets(element, element_id, function, t_gephi_label, 
                             support_fill, support_border, support_style, 
                             t_border, implicit_style, namespaces, 
-                            dot_file, written_lines, func_node_id, processed_propositions):
+                            dot_file, written_lines, func_node_id):
     """
     Process explicit targets (things the SUPPORT refers to).
     
     This creates the function node (if needed) and connects it to explicit targets.
     """
-    # Find all explicit targets
-    explicit_targets = element.findall('.//thesu:targetsGroup/thesu:target', namespaces=namespaces)
-    
-    # Only process if we have explicit targets
-    if explicit_targets:
-        for target_element in explicit_targets:
-            target_ref = target_element.get('{http://alchemeast.eu/thesu/ns/1.0}ref').split('#')[-1]           
-            
-            # Create the function node if it doesn't exist yet
-            if func_node_id is None:
-                func_node_id = f"{element_id}_func"
-                line_to_write = (f'"{func_node_id}" [label="{function}", gephi_label="{t_gephi_label}", '
-                                 f'gephi_omitted="false", fontsize="11", fillcolor="{support_fill}", '
-                                 f'color="{support_border}", style="{support_style}", shape="ellipse"];\n\n')
-                dot_file.write(line_to_write)
-                written_lines.append(line_to_write)
-                
-                # Connect SUPPORT to function node
-                line_to_write = f'"{element_id}" -> "{func_node_id}" [dir=none, color="{support_border}", style="{support_style}"];\n\n'
-                dot_file.write(line_to_write)
-                written_lines.append(line_to_write)
-            
-            # Connect function node to target
-            line_to_write = f'"{func_node_id}" -> "{target_ref}" [color="{t_border}", style="{implicit_style}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
+    targets = element.iterfind('.//thesu:targetsGroup/thesu:target', namespaces=namespaces)
+    first_target = next(targets, None)
+    if first_target is None:
+        return func_node_id
+
+    # Create the function node once, before the first target edge
+    func_node_id = _ensure_func_node(func_node_id, element_id, function, t_gephi_label,
+                                     support_fill, support_border, support_style, dot_file, written_lines)
+
+    for target_element in chain((first_target,), targets):
+        target_ref = target_element.get(_NS_REF).rsplit('#', 1)[-1]
+
+        # Connect function node to target
+        line_to_write = f'"{func_node_id}" -> "{target_ref}" [color="{t_border}", style="{implicit_style}"];\n\n'
+        dot_file.write(line_to_write)
+        written_lines.append(line_to_write)
     
-    return func_node_id, processed_propositions
+    return func_node_id
 
 def process_omitted_targets(element, element_id, function, t_gephi_label, 
                            support_fill, support_border, support_style, 
                            t_border, implicit_style,
-                           function_attributes, namespaces, dot_file, 
-                           written_lines, func_node_id, processed_propositions, source_id=None):
+                           function_styles, namespaces, dot_file, 
+                           written_lines, func_node_id, source_id=None):
     """
     Process omitted targets (things the SUPPORT refers to that are not explicit).
     
     This creates omitted target nodes and connects them to the function node.
     """
-    # Find all omitted targets elements
-    omitted_targets_elements = element.findall('.//thesu:targetsGroup/thesu:omittedTargets', namespaces=namespaces)
-    
+    # Bind the per-line emitters once; they are called for every node and edge
+    _write, _append = dot_file.write, written_lines.append
+
+    # Add source_id attribute if available
+    source_attr = f', source="{source_id}"' if source_id else ''
+
     # Process each omitted targets element
-    for omitted_targets_elem in omitted_targets_elements:
+    for omitted_targets_elem in element.iterfind('.//thesu:targetsGroup/thesu:omittedTargets', namespaces=namespaces):
         # Case 1: Empty omittedTargets tag (completely unspecified)
-        if len(list(omitted_targets_elem)) == 0:
+        if len(omitted_targets_elem) == 0:
             # Create a unique ID for this omitted element
             pseudo_node_id = generate_unique_pseudo_node_id_targets(
                 written_lines, element_id, "omitted_ELEMENTS", "unspecified"
@@ -150,32 +273,18 @@ def process_omitted_targets(element, element_id, function, t_gephi_label,
             
             # Create the node
             label = f"<b>ELEMENTS</b><br/><i>(unspecified,<br/>omitted,<br/>one or more)</i>"
-            source_attr = f', source="{source_id}"' if source_id else ''
-            node_line = (f'"{pseudo_node_id}" [label=<{label}>, gephi_label="ELEM", '
-                         f'gephi_omitted="true", gephi_unspecified="true", fontsize="11", '
-                         f'fillcolor="{o_fill}", color="{o_border}", style="{o_style}", '
-                         f'shape="{o_shape}"{source_attr}];\n\n')
-            dot_file.write(node_line)
-            written_lines.append(node_line)
+            node_line = _format_omitted_node(pseudo_node_id, label, "ELEM", o_fill, o_border, o_style, o_shape, source_attr, unspecified=True)
+            _write(node_line)
+            _append(node_line)
             
             # Ensure function node exists
-            if func_node_id is None:
-                func_node_id = f"{element_id}_func"
-                line_to_write = (f'"{func_node_id}" [label="{function}", gephi_label="{t_gephi_label}", '
-                                f'gephi_omitted="false", fontsize="11", fillcolor="{support_fill}", '
-                                f'color="{support_border}", style="{support_style}", shape="ellipse"];\n\n')
-                dot_file.write(line_to_write)
-                written_lines.append(line_to_write)
-                
-                # Connect SUPPORT to function node
-                line_to_write = f'"{element_id}" -> "{func_node_id}" [dir=none, color="{support_border}", style="{support_style}"];\n\n'
-                dot_file.write(line_to_write)
-                written_lines.append(line_to_write)
+            func_node_id = _ensure_func_node(func_node_id, element_id, function, t_gephi_label,
+                                             support_fill, support_border, support_style, dot_file, written_lines)
             
             # Connect function node to omitted element with proper color
             line_to_write = f'"{func_node_id}" -> "{pseudo_node_id}" [color="{t_border}", style="{implicit_style}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
+            _write(line_to_write)
+            _append(line_to_write)
             continue
         
         # Case 2: Specified omitted targets
@@ -183,54 +292,20 @@ def process_omitted_targets(element, element_id, function, t_gephi_label,
             local_name = child.tag.split('}')[-1]  # e.g. omittedTHESES, omittedMISCS, omittedSUPPORTS
             
             # Determine the type of omitted element and its styling
-            if local_name == "omittedTHESES":
-                display_type = "THESIS"
-                o_fill = "#f0faf0"       # THESIS fill
-                o_border = "#82b366"     # THESIS border
-                o_shape = "box"          # THESIS shape
-                o_style = "rounded,filled"
-            elif local_name == "omittedMISCS":
-                display_type = "MISC"
-                o_fill = "#ecd4bb"       # MISC fill
-                o_border = "#b39c84"     # MISC border
-                o_shape = "cylinder"     # MISC shape
-                o_style = "filled"
-            elif local_name == "omittedSUPPORTS":
+            if local_name == "omittedSUPPORTS":
                 display_type = "SUPPORT"
-                # For omitted SUPPORTS, determine styling based on functions
-                func_elem = child.find('.//thesu:omittedSupportsFunctions', namespaces=namespaces)
-                # Default all functions to rank 4
-                ranks = {"JUSTIFIES": 4, "EXPLAINS": 4, "EXPANDS ON": 4, "CONTEXTUALIZES": 4}
-                if func_elem is not None:
-                    arg_rank = func_elem.get('{http://alchemeast.eu/thesu/ns/1.0}omittedArgumentationRank')
-                    exp_rank = func_elem.get('{http://alchemeast.eu/thesu/ns/1.0}omittedExpositionRank')
-                    expa_rank = func_elem.get('{http://alchemeast.eu/thesu/ns/1.0}omittedExpansionRank')
-                    cont_rank = func_elem.get('{http://alchemeast.eu/thesu/ns/1.0}omittedContextualisationRank')
-                    if arg_rank and arg_rank.isdigit():
-                        ranks["JUSTIFIES"] = int(arg_rank)
-                    if exp_rank and exp_rank.isdigit():
-                        ranks["EXPLAINS"] = int(exp_rank)
-                    if expa_rank and expa_rank.isdigit():
-                        ranks["EXPANDS ON"] = int(expa_rank)
-                    if cont_rank and cont_rank.isdigit():
-                        ranks["CONTEXTUALIZES"] = int(cont_rank)
-                dominant_function = min(ranks, key=ranks.get)
-                explicit_mapping = function_attributes.get(dominant_function)
-                if explicit_mapping is not None:
-                    o_fill = explicit_mapping['false']['fill']
-                    o_border = explicit_mapping['false']['peripheries']
-                    o_style = "rounded,filled"
-                    o_shape = "ellipse"  # Omitted SUPPORT nodes are ellipses.
-                else:
-                    o_fill = "#dae8fc"
-                    o_border = "#7c9ac7"
-                    o_shape = "ellipse"
-                    o_style = "rounded,filled"
+                o_fill, o_border, o_style, o_shape = _resolve_omitted_support_style(
+                    child, function_styles, namespaces
+                )
             else:
-                continue  # Skip unrecognized element types
+                type_style = _OMITTED_TYPE_STYLES.get(local_name)
+                if type_style is None:
+                    continue  # Skip unrecognized element types
+                display_type, o_fill, o_border, o_shape, o_style = type_style
+            gephi_label = display_type[:4]
 
             # Handle based on whether count is specified
-            count_attr = child.get('{http://alchemeast.eu/thesu/ns/1.0}number')
+            count_attr = child.get(_NS_NUMBER)
             if count_attr and count_attr.isdigit():
                 # Case 2a: Specified number of omitted elements
                 count = int(count_attr)
@@ -242,30 +317,18 @@ def process_omitted_targets(element, element_id, function, t_gephi_label,
                     
                     # Create the node
                     label = f"<b>{display_type}</b><br/><i>(omitted)</i>"
-                    source_attr = f', source="{source_id}"' if source_id else ''
-                    node_line = (f'"{pseudo_node_id}" [label=<{label}>, gephi_label="{display_type[:4]}", '
-                                 f'gephi_omitted="true", fontsize="11", fillcolor="{o_fill}", '
-                                 f'color="{o_border}", style="{o_style}", shape="{o_shape}"{source_attr}];\n\n')
-                    dot_file.write(node_line)
-                    written_lines.append(node_line)
+                    node_line = _format_omitted_node(pseudo_node_id, label, gephi_label, o_fill, o_border, o_style, o_shape, source_attr)
+                    _write(node_line)
+                    _append(node_line)
                     
                     # Ensure function node exists
-                    if func_node_id is None:
-                        func_node_id = f"{element_id}_func"
-                        line_to_write = (f'"{func_node_id}" [label="{function}", gephi_label="{t_gephi_label}", '
-                                        f'gephi_omitted="false", fontsize="11", fillcolor="{support_fill}", '
-                                        f'color="{support_border}", style="{support_style}", shape="ellipse"];\n\n')
-                        dot_file.write(line_to_write)
-                        written_lines.append(line_to_write)
-                        # Connect SUPPORT to function node
-                        line_to_write = f'"{element_id}" -> "{func_node_id}" [dir=none, color="{support_border}", style="{support_style}"];\n\n'
-                        dot_file.write(line_to_write)
-                        written_lines.append(line_to_write)
-                    
+                    func_node_id = _ensure_func_node(func_node_id, element_id, function, t_gephi_label,
+                                                     support_fill, support_border, support_style, dot_file, written_lines)
+
                     # Connect function node to omitted element with proper color
-                    line_to_write = f'"{func_node_id}" -> "{pseudo_node_id}" [color="{t_border}", style="{implicit_style}"];\n\n'
-                    dot_file.write(line_to_write)
-                    written_lines.append(line_to_write)
+                    edge_line = f'"{func_node_id}" -> "{pseudo_node_id}" [color="{t_border}", style="{implicit_style}"];\n\n'
+                    _write(edge_line)
+                    _append(edge_line)
             else:
                 # Case 2b: Unspecified number of omitted elements
                 # Create node ID
@@ -276,67 +339,48 @@ def process_omitted_targets(element, element_id, function, t_gephi_label,
                 # Create the node
                 label = f"<b>{display_type}</b><br/><i>(omitted,<br/>one or more)</i>"
                 o_style = "dotted,filled"  # Dotted for unspecified quantity
-                source_attr = f', source="{source_id}"' if source_id else ''
-                node_line = (f'"{pseudo_node_id}" [label=<{label}>, gephi_label="{display_type[:4]}", '
-                             f'gephi_omitted="true", gephi_unspecified="true", fontsize="11", '
-                             f'fillcolor="{o_fill}", color="{o_border}", style="{o_style}", '
-                             f'shape="{o_shape}"{source_attr}];\n\n')
-                dot_file.write(node_line)
-                written_lines.append(node_line)
+                node_line = _format_omitted_node(pseudo_node_id, label, gephi_label, o_fill, o_border, o_style, o_shape, source_attr, unspecified=True)
+                _write(node_line)
+                _append(node_line)
                 
                 # Ensure function node exists
-                if func_node_id is None:
-                    func_node_id = f"{element_id}_func"
-                    line_to_write = (f'"{func_node_id}" [label="{function}", gephi_label="{t_gephi_label}", '
-                                    f'gephi_omitted="false", fontsize="11", fillcolor="{support_fill}", '
-                                    f'color="{support_border}", style="{support_style}", shape="ellipse"];\n\n')
-                    dot_file.write(line_to_write)
-                    written_lines.append(line_to_write)
-                    # Connect SUPPORT to function node
-                    line_to_write = f'"{element_id}" -> "{func_node_id}" [dir=none, color="{support_border}", style="{support_style}"];\n\n'
-                    dot_file.write(line_to_write)
-                    written_lines.append(line_to_write)
+                func_node_id = _ensure_func_node(func_node_id, element_id, function, t_gephi_label,
+                                                 support_fill, support_border, support_style, dot_file, written_lines)
                 
                 # Connect function node to omitted element with proper color
                 line_to_write = f'"{func_node_id}" -> "{pseudo_node_id}" [color="{t_border}", style="{implicit_style}"];\n\n'
-                dot_file.write(line_to_write)
-                written_lines.append(line_to_write)
+                _write(line_to_write)
+                _append(line_to_write)
     
-    return func_node_id, processed_propositions
+    return func_node_id
 
-def process_employed_elements(element, element_id, function_attributes, 
-                             namespaces, dot_file, written_lines, employed_node_id, processed_propositions, source_id=None):
+def process_employed_elements(element, element_id, function_styles, 
+                             namespaces, dot_file, written_lines, employed_node_id, source_id=None):
     """
     Process employed elements (things used within the SUPPORT).
     
     This creates employed nodes and connects them to the SUPPORT.
     This is completely separate from the target processing.
     """
+    # Bind the per-line emitters once; they are called for every node and edge
+    _write, _append = dot_file.write, written_lines.append
+
+    # Add source_id attribute if available
+    source_attr = f', source="{source_id}"' if source_id else ''
     
     # Process employed elements - This section needs to be preserved to maintain employed elements functionality
-    for employed_element in element.findall('.//thesu:employedElements/thesu:elementRef', namespaces=namespaces):
-        employed_element_ref = employed_element.get('{http://alchemeast.eu/thesu/ns/1.0}ref').split('#')[-1]
-        if employed_node_id is None:
-            employed_node_id = f"{element_id}_employed"
-            # Create the common employed pseudo-node with fixed styling:
-            line_to_write = (f'"{employed_node_id}" [label="EMPLOYED IN", gephi_label="in", fontsize="11", '
-                             f'fillcolor="#ffe6cc", color="#d79c02", gephi_omitted="false", shape="ellipse", style="filled"];\n\n')
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-            # Instead of connecting SUPPORT -> employed node, we now connect employed node -> SUPPORT
-            # (to force vertical ordering)
-            line_to_write = f'"{employed_node_id}" -> "{element_id}" [color="#d79c02", style="solid"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
+    for employed_element in element.iterfind('.//thesu:employedElements/thesu:elementRef', namespaces=namespaces):
+        employed_element_ref = employed_element.get(_NS_REF).rsplit('#', 1)[-1]
+        employed_node_id = _ensure_employed_node(employed_node_id, element_id, dot_file, written_lines)
         # Connect explicit employed element to the common employed node:
         line_to_write = f'"{employed_element_ref}" -> "{employed_node_id}" [dir=none, color="#d79c02", style="solid"];\n\n'
-        dot_file.write(line_to_write)
-        written_lines.append(line_to_write)
+        _write(line_to_write)
+        _append(line_to_write)
     
     # Process omitted employed elements
-    for omitted_employed_elem in element.findall('.//thesu:employedElements/thesu:omittedEmployedElements', namespaces=namespaces):
+    for omitted_employed_elem in element.iterfind('.//thesu:employedElements/thesu:omittedEmployedElements', namespaces=namespaces):
         # Check if this is an empty omittedEmployedElements tag (no children)
-        if len(list(omitted_employed_elem)) == 0:
+        if len(omitted_employed_elem) == 0:
             # Handle completely unspecified omitted employed elements
             pseudo_node_id = generate_unique_pseudo_node_id_targets(written_lines, element_id, "omitted_ELEMENTS", "unspecified")
             
@@ -348,145 +392,70 @@ def process_employed_elements(element, element_id, function_attributes,
             
             label = f"<b>ELEMENTS</b><br/><i>(unspecified,<br/>omitted,<br/>one or more)</i>"
             
-            source_attr = f', source="{source_id}"' if source_id else ''
-            node_line = (f'"{pseudo_node_id}" [label=<{label}>, gephi_label="ELEM", '
-                         f'gephi_omitted="true", gephi_unspecified="true", fontsize="11", fillcolor="{o_fill}", '
-                         f'color="{o_border}", style="{o_style}", shape="{o_shape}"{source_attr}];\n\n')
-            dot_file.write(node_line)
-            written_lines.append(node_line)
+            node_line = _format_omitted_node(pseudo_node_id, label, "ELEM", o_fill, o_border, o_style, o_shape, source_attr, unspecified=True)
+            _write(node_line)
+            _append(node_line)
             
             # Create employed node if needed
-            if employed_node_id is None:
-                employed_node_id = f"{element_id}_employed"
-                # Create the common employed pseudo-node with fixed styling:
-                line_to_write = (f'"{employed_node_id}" [label="EMPLOYED IN", gephi_label="in", fontsize="11", '
-                                f'fillcolor="#ffe6cc", color="#d79c02", gephi_omitted="false", shape="ellipse", style="filled"];\n\n')
-                dot_file.write(line_to_write)
-                written_lines.append(line_to_write)
-                # Connect employed node to SUPPORT
-                line_to_write = f'"{employed_node_id}" -> "{element_id}" [color="#d79c02", style="solid"];\n\n'
-                dot_file.write(line_to_write)
-                written_lines.append(line_to_write)
+            employed_node_id = _ensure_employed_node(employed_node_id, element_id, dot_file, written_lines)
             # Edge from omitted node to the common employed node:
             line_to_write = f'"{pseudo_node_id}" -> "{employed_node_id}" [dir=none, color="#d79c02", style="solid"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
+            _write(line_to_write)
+            _append(line_to_write)
             continue
         
         # Handle specified omitted employed elements 
         for child in omitted_employed_elem:
             local_name = child.tag.split('}')[-1]  # e.g. omittedTHESES, omittedMISCS, omittedSUPPORTS
-            if local_name == "omittedTHESES":
-                display_type = "THESIS"
-                # Use explicit THESIS styling:
-                o_fill = "#f0faf0"       # Explicit THESIS fill color
-                o_border = "#82b366"     # Explicit THESIS border
-                o_shape = "box"          # THESIS shape (assumed box)
-                o_style = "rounded,filled"
-            elif local_name == "omittedMISCS":
-                display_type = "MISC"
-                # MISCs styled like explicit CONTEXTUALIZES:
-                o_fill = "#ecd4bb"       # Explicit CONTEXTUALIZES fill
-                o_border = "#b39c84"     # Explicit CONTEXTUALIZES border
-                o_shape = "cylinder"     # CONTEXTUALIZES shape
-                o_style = "filled"
-            elif local_name == "omittedSUPPORTS":
+            if local_name == "omittedSUPPORTS":
                 display_type = "SUPPORT"
-                # For omitted SUPPORTS, use omittedSupportsFunctions if available:
-                func_elem = child.find('.//thesu:omittedSupportsFunctions', namespaces=namespaces)
-                # Default: all functions rank 4
-                ranks = {"JUSTIFIES": 4, "EXPLAINS": 4, "EXPANDS ON": 4, "CONTEXTUALIZES": 4}
-                if func_elem is not None:
-                    arg_rank = func_elem.get('{http://alchemeast.eu/thesu/ns/1.0}omittedArgumentationRank')
-                    exp_rank = func_elem.get('{http://alchemeast.eu/thesu/ns/1.0}omittedExpositionRank')
-                    expa_rank = func_elem.get('{http://alchemeast.eu/thesu/ns/1.0}omittedExpansionRank')
-                    cont_rank = func_elem.get('{http://alchemeast.eu/thesu/ns/1.0}omittedContextualisationRank')
-                    if arg_rank and arg_rank.isdigit():
-                        ranks["JUSTIFIES"] = int(arg_rank)
-                    if exp_rank and exp_rank.isdigit():
-                        ranks["EXPLAINS"] = int(exp_rank)
-                    if expa_rank and expa_rank.isdigit():
-                        ranks["EXPANDS ON"] = int(expa_rank)
-                    if cont_rank and cont_rank.isdigit():
-                        ranks["CONTEXTUALIZES"] = int(cont_rank)
-                dominant_function = min(ranks, key=ranks.get)
-                explicit_mapping = function_attributes.get(dominant_function)
-                if explicit_mapping is not None:
-                    o_fill = explicit_mapping['false']['fill']
-                    o_border = explicit_mapping['false']['peripheries']
-                    o_style = "rounded,filled"
-                    o_shape = "ellipse"  # For omitted SUPPORT nodes, force elliptical shape:
-                else:
-                    o_fill = "#dae8fc"
-                    o_border = "#7c9ac7"
-                    o_shape = "ellipse"
-                    o_style = "rounded,filled"
+                o_fill, o_border, o_style, o_shape = _resolve_omitted_support_style(
+                    child, function_styles, namespaces
+                )
             else:
-                continue
+                type_style = _OMITTED_TYPE_STYLES.get(local_name)
+                if type_style is None:
+                    continue  # Skip unrecognized element types
+                display_type, o_fill, o_border, o_shape, o_style = type_style
+            gephi_label = display_type[:4]
 
-            count_attr = child.get('{http://alchemeast.eu/thesu/ns/1.0}number')
+            count_attr = child.get(_NS_NUMBER)
             if count_attr and count_attr.isdigit():
                 # Specified number of omitted elements
                 count = int(count_attr)
                 for i in range(count):
                     pseudo_node_id = generate_unique_pseudo_node_id_targets(written_lines, element_id, f"omitted_{display_type}", i+1)
                     label = f"<b>{display_type}</b><br/><i>(omitted)</i>"
-                    source_attr = f', source="{source_id}"' if source_id else ''
-                    node_line = (f'"{pseudo_node_id}" [label=<{label}>, gephi_label="{display_type[:4]}", '
-                                 f'gephi_omitted="true", fontsize="11", fillcolor="{o_fill}", '
-                                 f'color="{o_border}", style="{o_style}", shape="{o_shape}"{source_attr}];\n\n')
-                    dot_file.write(node_line)
-                    written_lines.append(node_line)
+                    node_line = _format_omitted_node(pseudo_node_id, label, gephi_label, o_fill, o_border, o_style, o_shape, source_attr)
+                    _write(node_line)
+                    _append(node_line)
                     
                     # Ensure employed node exists
-                    if employed_node_id is None:
-                        employed_node_id = f"{element_id}_employed"
-                        # Create the common employed pseudo-node with fixed styling:
-                        line_to_write = (f'"{employed_node_id}" [label="EMPLOYED IN", gephi_label="in", fontsize="11", '
-                                        f'fillcolor="#ffe6cc", color="#d79c02", gephi_omitted="false", shape="ellipse", style="filled"];\n\n')
-                        dot_file.write(line_to_write)
-                        written_lines.append(line_to_write)
-                        # Connect employed node to SUPPORT
-                        line_to_write = f'"{employed_node_id}" -> "{element_id}" [color="#d79c02", style="solid"];\n\n'
-                        dot_file.write(line_to_write)
-                        written_lines.append(line_to_write)
+                    employed_node_id = _ensure_employed_node(employed_node_id, element_id, dot_file, written_lines)
                     
                     # Connect omitted element to employed node
                     line_to_write = f'"{pseudo_node_id}" -> "{employed_node_id}" [dir=none, color="#d79c02", style="solid"];\n\n'
-                    dot_file.write(line_to_write)
-                    written_lines.append(line_to_write)
+                    _write(line_to_write)
+                    _append(line_to_write)
             else:
                 # Unspecified number of omitted elements
                 pseudo_node_id = generate_unique_pseudo_node_id_targets(written_lines, element_id, f"omitted_{display_type}", "unspecified")
                 label = f"<b>{display_type}</b><br/><i>(omitted,<br/>one or more)</i>"
                 # Use dotted style to indicate unspecified quantity (communicates vagueness)
                 o_style = "dotted,filled"
-                source_attr = f', source="{source_id}"' if source_id else ''
-                node_line = (f'"{pseudo_node_id}" [label=<{label}>, gephi_label="{display_type[:4]}", '
-                             f'gephi_omitted="true", gephi_unspecified="true", fontsize="11", fillcolor="{o_fill}", '
-                             f'color="{o_border}", style="{o_style}", shape="{o_shape}"{source_attr}];\n\n')
-                dot_file.write(node_line)
-                written_lines.append(node_line)
+                node_line = _format_omitted_node(pseudo_node_id, label, gephi_label, o_fill, o_border, o_style, o_shape, source_attr, unspecified=True)
+                _write(node_line)
+                _append(node_line)
                 
                 # Ensure employed node exists
-                if employed_node_id is None:
-                    employed_node_id = f"{element_id}_employed"
-                    # Create the common employed pseudo-node with fixed styling:
-                    line_to_write = (f'"{employed_node_id}" [label="EMPLOYED IN", gephi_label="in", fontsize="11", '
-                                    f'fillcolor="#ffe6cc", color="#d79c02", gephi_omitted="false", shape="ellipse", style="filled"];\n\n')
-                    dot_file.write(line_to_write)
-                    written_lines.append(line_to_write)
-                    # Connect employed node to SUPPORT
-                    line_to_write = f'"{employed_node_id}" -> "{element_id}" [color="#d79c02", style="solid"];\n\n'
-                    dot_file.write(line_to_write)
-                    written_lines.append(line_to_write)
+                employed_node_id = _ensure_employed_node(employed_node_id, element_id, dot_file, written_lines)
                 
                 # Connect omitted element to employed node
                 line_to_write = f'"{pseudo_node_id}" -> "{employed_node_id}" [dir=none, color="#d79c02", style="solid"];\n\n'
-                dot_file.write(line_to_write)
-                written_lines.append(line_to_write)
+                _write(line_to_write)
+                _append(line_to_write)
     
-    return employed_node_id, processed_propositions
+    return employed_node_id
 
 def process_support_element(element, element_type, namespaces, dot_file, written_lines, retrieved_text, retrieved_text_snippet, locus, processed_propositions, source_id=None):
     """
@@ -497,10 +466,12 @@ def process_support_element(element, element_type, namespaces, dot_file, written
     2. Delegates target and employed element processing to specialized functions
     3. Creates the SUPPORT node itself
     """
-    
-    element_id = element.get('{http://alchemeast.eu/thesu/ns/1.0}id')
+    # Bind the element accessors once; they are used for every lookup below
+    eget = element.get
+
+    element_id = eget(_NS_ID)
     if element_id is None:
-        element_id = element.get('{http://www.w3.org/XML/1998/namespace}id')
+        element_id = eget('{http://www.w3.org/XML/1998/namespace}id')
     
     # --- Initialize node IDs and styling variables ---
     func_node_id = None
@@ -520,109 +491,81 @@ def process_support_element(element, element_type, namespaces, dot_file, written
     # --- Process basic element info ---
     
     # Get all speakers from speakersGroup
-    speaker_elements = element.findall('.//thesu:speakersGroup/thesu:speaker', namespaces=namespaces)
-    
-    # Process speakers according to rank
-    element_speaker = ""
-    if speaker_elements:
-        # Get rank for each speaker (default is 1 if not specified)
-        speakers_with_rank = []
-        for spk in speaker_elements:
-            name_val = spk.get('{http://alchemeast.eu/thesu/ns/1.0}name')
-            if name_val:
-                speaker_name = name_val.split('#')[-1]
-                rank_val = spk.get('{http://alchemeast.eu/thesu/ns/1.0}rank')
-                rank = int(rank_val) if rank_val and rank_val.isdigit() else 1
-                speakers_with_rank.append((speaker_name, rank))
-        
-        if speakers_with_rank:
-            # Find minimum rank (highest priority)
-            min_rank = min(rank for _, rank in speakers_with_rank)
-            
-            # Get all speakers with this highest priority rank
-            top_speakers = [name for name, rank in speakers_with_rank if rank == min_rank]
-            
-            # Join speaker names with commas
-            element_speaker = ", ".join(top_speakers)
-    
-    # Get paraphrasis
-    paraphrasis_elem = element.find("./thesu:paraphrasis", namespaces=namespaces)
-    if paraphrasis_elem is not None:
-        paraphrasis = extract_paraphrasis_text(paraphrasis_elem)
-        paraphrasis = re.sub(r'\s+', ' ', paraphrasis)
-        paraphrasis = re.sub(r'(.{1,50})(?:\s|$)', r'\1<br/>', paraphrasis)
-        paraphrasis = paraphrasis.replace('"', r'\"')
+    speaker_elements = _XP_SPEAKERS(element)
+    
+    # Process speakers according to rank: keep those with the minimum rank (highest priority)
+    # in a single pass; rank defaults to 1 if not specified
+    min_rank = None
+    top_speakers = []
+    for spk in speaker_elements:
+        name_val = spk.get(_NS_NAME)
+        if not name_val:
+            continue
+        rank = parse_rank(spk.get(_NS_RANK))
+        if min_rank is None or rank < min_rank:
+            min_rank = rank
+            top_speakers = [name_val.rsplit('#', 1)[-1]]
+        elif rank == min_rank:
+            top_speakers.append(name_val.rsplit('#', 1)[-1])
+
+    # Join speaker names with commas (empty when no named speaker)
+    element_speaker = ", ".join(top_speakers)
+    
+    # Get paraphrasis (only used as a node attribute, so it is never wrapped with <br/>).
+    # Non-empty text keeps the trailing space the former wrap-then-unwrap round trip produced.
+    paraphrasis_match = _XP_PARAPHRASIS(element)
+    if paraphrasis_match:
+        paraphrasis_norm = extract_paraphrasis_text(paraphrasis_match[0])  # whitespace already collapsed
+        paraphrasis_attr = paraphrasis_norm.replace('"', r'\"') + ' ' if paraphrasis_norm else ''
     else:
-        paraphrasis = "/"
+        paraphrasis_attr = "/"
     
     # Get support function and form
     function, aim = get_function_and_aim(element, namespaces)
-    form_elem = element.find('.//thesu:supportType/thesu:supportForm[1]', namespaces=namespaces)
-    if form_elem is not None:
-        formTag = form_elem.get('{http://alchemeast.eu/thesu/ns/1.0}formTag')
-        form = formTag.split('#')[-1] if formTag else None
+    form_match = _XP_FORM(element)
+    if form_match:
+        form_elem = form_match[0]
+        formTag = form_elem.get(_NS_FORMTAG)
+        form = formTag.rsplit('#', 1)[-1] if formTag else None
     else:
         form = None
     
     # --- Determine styling based on function ---
     
     # Check implicit and extrinsic status
-    extrinsic_att = element.get('{http://alchemeast.eu/thesu/ns/1.0}extrinsic')
-    implicit_att = element.get('{http://alchemeast.eu/thesu/ns/1.0}implicit')
+    extrinsic_att = eget(_NS_EXTRINSIC)
+    implicit_att = eget(_NS_IMPLICIT)
     
-    if extrinsic_att == "true":
-        implicit_style = "dashed,filled"
+    # implicit_att is normalised to the interned flags so the style lookup compares by identity
+    if extrinsic_att == _TRUE:
+        implicit_style = _DASHED_FILLED
         element_type_label = f"extr. {element_type}"
         manifestation = "extrinsic"
-        implicit_att = "true"
-    elif implicit_att == "true":
-        implicit_style = "dashed,filled"
+        implicit_att = _TRUE
+    elif implicit_att == _TRUE:
+        implicit_style = _DASHED_FILLED
         element_type_label = f"impl. {element_type}"
         manifestation = "implicit"
+        implicit_att = _TRUE
     else:
-        implicit_style = "filled"
-        element_type_label = f"{element_type}"
+        implicit_style = _FILLED
+        element_type_label = element_type
         manifestation = "explicit"
-        implicit_att = "false"
-    
-    # Function attribute mappings for styling
-    function_attributes = {
-        'JUSTIFIES': {'false': {'gephi_label':'jus','fill': '#dae8fc', 'peripheries': '#7c9ac7', 'shape': 'diamond'},
-                      'true':  {'gephi_label':'(jus)','fill': '#f5f8fd', 'peripheries': '#949ebf', 'shape': 'diamond'}},
-        'REFUTES': {'false': {'gephi_label':'ref','fill': '#f8cecc', 'peripheries': '#b95753', 'shape': 'diamond'},
-                    'true':  {'gephi_label':'(ref)','fill': '#fdf6f6', 'peripheries': '#a89794', 'shape': 'diamond'}},
-        'DISCUSSES': {'false': {'gephi_label':'dis','fill': '#ffff99', 'peripheries': '#b3b300', 'shape': 'diamond'},
-                      'true':  {'gephi_label':'(dis)','fill': '#ffffe6', 'peripheries': '#999966', 'shape': 'diamond'}},
-        'EXPLAINS': {'false': {'gephi_label':'exp','fill': '#edffc4', 'peripheries': '#927b89', 'shape': 'parallelogram'},
-                     'true':  {'gephi_label':'(exp)','fill': '#f9facb', 'peripheries': '#a59ba1', 'shape': 'parallelogram'}},
-        'EXPANDS ON': {'false': {'gephi_label':'exc','fill': '#999999', 'peripheries': '#4d4d4d', 'shape': 'invhouse'},
-                       'true':  {'gephi_label':'(exc)','fill': '#cccccc', 'peripheries': '#828282', 'shape': 'invhouse'}},
-        'CONTEXTUALIZES': {'false': {'gephi_label':'con','fill': '#ecd4bb', 'peripheries': '#b39c84', 'shape': 'cylinder'},
-                           'true':  {'gephi_label':'(con)','fill': '#f6ede6', 'peripheries': '#b3a89a', 'shape': 'cylinder'}}
-    }
-    
-    # --- Compute styling for the SUPPORT node ---
-    support_attr = function_attributes.get(function)
-    if support_attr is not None:
-        support_fill = support_attr[implicit_att]['fill']
-        support_border = support_attr[implicit_att]['peripheries']
-        support_shape = "ellipse"  # For the SUPPORT node itself
-        support_style = implicit_style
+        implicit_att = _FALSE
+    
+    # --- Compute SUPPORT node and target styling from a single lookup ---
+    # Target styling must be ready BEFORE processing targets: t_border is the edge color
+    support_shape = "ellipse"  # For the SUPPORT node itself
+    support_style = implicit_style
+    function_style = _FN_STYLES.get((function, implicit_att))
+    if function_style is not None:
+        support_fill = t_fill = function_style.fill
+        support_border = t_border = function_style.peripheries
+        t_gephi_label = function_style.gephi_label
+        t_shape = function_style.shape
     else:
         support_fill = "#f0faf0"
         support_border = "#82b366"
-        support_shape = "ellipse"
-        support_style = implicit_style
-
-    # --- CRITICAL: Compute target styling BEFORE processing targets ---
-    # This ensures the proper blue color (t_border) is used for connections
-    function_attribute = function_attributes.get(function)
-    if function_attribute is not None:
-        t_gephi_label = function_attribute[implicit_att]['gephi_label']
-        t_fill = function_attribute[implicit_att]['fill']
-        t_border = function_attribute[implicit_att]['peripheries']  # Blue color for target edges comes from here!
-        t_shape = function_attribute[implicit_att]['shape']
-    else:
         t_gephi_label = "tar"
         t_fill = "#ffffff"
         t_border = "#000000"
@@ -630,31 +573,40 @@ def process_support_element(element, element_type, namespaces, dot_file, written
     
     # --- Process targets and employed elements using the specialized functions ---
     
+    # Collect this SUPPORT's target/employed lines in a local buffer and flush them in one write
+    support_buffer = StringIO()
     result = process_support_targets(
-        element, function, implicit_style, function_attributes,
+        element, function, implicit_style, _FN_STYLES,
         t_gephi_label, support_fill, support_border, support_style,
         t_border,
-        namespaces, dot_file, written_lines, element_id, processed_propositions, source_id
+        namespaces, support_buffer, written_lines, element_id, source_id
     )
 
     
     # Unpack the result
-    func_node_id, written_lines, processed_propositions = result
+    func_node_id, written_lines = result
 
     # Add source_id attribute if available
     source_attr = f', source="{source_id}"' if source_id else ''
 
-    # Write the SUPPORT node itself with its styling
-    support_node_str = (
-        f'"{element_id}" [label=<<b>{element_type_label}</b><br/>{pad_short_string(element_speaker, 30)}'
-        f'<br/>{locus}<br/><i>form: {"unspecified" if form is None else form}</i>'
+    # Attribute values derived from the label parts, computed once
+    gephi_type_label = element_type[:4]
+    speaker_label = pad_short_string(element_speaker, 30)
+    speaker_attr = element_speaker.strip()
+    form_label = "unspecified" if form is None else form
+    locus_attr = _LOCUS_DELETE_RE.sub('', locus.replace(" (of ", "_"))
+
+    # Write the SUPPORT node itself with its styling, after its target/employed lines
+    support_buffer.write(
+        f'"{element_id}" [label=<<b>{element_type_label}</b><br/>{speaker_label}'
+        f'<br/>{locus}<br/><i>form: {form_label}</i>'
         f'<br/><font point-size="12">"{retrieved_text_snippet}"</font>>, '
-        f'gephi_label="{element_type[:4]}", '
+        f'gephi_label="{gephi_type_label}", '
         f'text="{retrieved_text}", '
-        f'locus="{locus.replace(" (of ", "_").replace(")", "").replace("<i>", "").replace("</i>", "")}", '
-        f'speaker="{element_speaker.strip()}", '
+        f'locus="{locus_attr}", '
+        f'speaker="{speaker_attr}", '
         f'form="{form}", '
-        f'paraphrasis="{paraphrasis.replace("<br/>", " ")}", '
+        f'paraphrasis="{paraphrasis_attr}", '
         f'manifestation="{manifestation}", '
         f'fillcolor="{support_fill}", '
         f'color="{support_border}", '
@@ -664,6 +616,6 @@ def process_support_element(element, element_type, namespaces, dot_file, written
         f'{source_attr}];\n\n'
     )
 
-    dot_file.write(support_node_str)
+    dot_file.write(support_buffer.getvalue())
     
     return written_lines, processed_propositions
@@ -4,10 +4,17 @@ Key functions: process_thesis_element, write_thesis_and_process_included_element
 get_thesis_entailments, get_thesis_etiologies, get_thesis_analogies, get_thesis_references,
 get_thesis_matching_propositions, process_matching_propositions, get_thesis_sequences,
 process_thesis_sequences, process_matching_prop_sequences, draw_edges_with_prop_sequences
+Per-run lookup tables: ThesisIndexes
 """
-from bootstrap.primary_imports import re
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+from bootstrap.primary_imports import re, sys
+from bootstrap.delayed_imports import ET
+from config.runtime_settings import XML_NAMESPACE
+from config import runtime_settings as _rt
 from xml_processing.extractors import extract_paraphrasis_text
-from utils.text import pad_short_string
+from utils.text import pad_short_string, parse_rank
 from dot.pseudo_nodes import (
     generate_unique_pseudo_node_id_entailments,
     generate_unique_pseudo_node_id_etiologies,
@@ -16,24 +23,210 @@ from dot.pseudo_nodes import (
     generate_unique_pseudo_node_id_matching_propositions,
     generate_unique_pseudo_node_id_matching_sequences,
 )
-from dot.propositions import get_proposition_sequences, process_proposition_sequences, parse_phases_ref
+from dot.propositions import get_proposition_node_line, get_proposition_sequences, process_proposition_sequences, parse_phases_ref
+
+# Precompiled XPath lookups on THESIS, sequence and phase elements
+_XP_NAMESPACES = {'thesu': XML_NAMESPACE}
+_XP_SPEAKERS = ET.XPath('.//thesu:speakersGroup/thesu:speaker', namespaces=_XP_NAMESPACES)
+_XP_ENTAILMENT = ET.XPath('./thesu:entailment', namespaces=_XP_NAMESPACES)
+_XP_ETIOLOGIES_GROUP = ET.XPath('./thesu:thesisType/thesu:etiologiesGroup', namespaces=_XP_NAMESPACES)
+_XP_ETIOLOGY = ET.XPath('./thesu:etiology', namespaces=_XP_NAMESPACES)
+_XP_ANALOGIES_GROUP = ET.XPath('./thesu:thesisType/thesu:analogiesGroup', namespaces=_XP_NAMESPACES)
+_XP_ANALOGY = ET.XPath('./thesu:analogy', namespaces=_XP_NAMESPACES)
+_XP_ELEMENT_REF = ET.XPath('./thesu:elementRef', namespaces=_XP_NAMESPACES)
+_XP_INCLUDED_REF = ET.XPath('.//thesu:includedRef', namespaces=_XP_NAMESPACES)
+_XP_MACRO_THEMES_GROUP = ET.XPath('./thesu:thesisType/thesu:macroThemesGroup', namespaces=_XP_NAMESPACES)
+_XP_MATCHING_PROPOSITIONS_GROUP = ET.XPath('./thesu:matchingPropositionsGroup', namespaces=_XP_NAMESPACES)
+_XP_SEQUENCES_GROUP = ET.XPath('.//thesu:thesisType/thesu:sequencesGroup', namespaces=_XP_NAMESPACES)
+_XP_SEQUENCE = ET.XPath('.//thesu:sequence', namespaces=_XP_NAMESPACES)
+_XP_MAY_SUBSTITUTE = ET.XPath('.//thesu:maySubstitute', namespaces=_XP_NAMESPACES)
+_XP_PHASES_GROUP = ET.XPath('.//thesu:phasesGroup', namespaces=_XP_NAMESPACES)
+_XP_PARAPHRASIS = ET.XPath('./thesu:paraphrasis', namespaces=_XP_NAMESPACES)
+_XP_MICRO_THEMED_FREE_TEXT = ET.XPath('./thesu:microThemedFreeText', namespaces=_XP_NAMESPACES)
+_XP_FREE_TEXT = ET.XPath('./thesu:freeText', namespaces=_XP_NAMESPACES)
+_XP_MATCHING_PROPOSITION_PHASES = ET.XPath('.//thesu:matchingPropositionPhases', namespaces=_XP_NAMESPACES)
+_XP_CHILD_MATCHING_PROPOSITION_PHASES = ET.XPath('./thesu:matchingPropositionPhases', namespaces=_XP_NAMESPACES)
+
+_XML_ID = sys.intern('{http://www.w3.org/XML/1998/namespace}id')
+_NS_THESU_Q = f'{{{XML_NAMESPACE}}}'
+
+# Interned namespace-qualified attribute keys for element.get()
+_K_ID = sys.intern(_NS_THESU_Q + 'id')
+_K_REF = sys.intern(_NS_THESU_Q + 'ref')
+_K_PHASES_REF = sys.intern(_NS_THESU_Q + 'phasesRef')
+_K_EXTRINSIC = sys.intern(_NS_THESU_Q + 'extrinsic')
+_K_IMPLICIT = sys.intern(_NS_THESU_Q + 'implicit')
+_K_NAME = sys.intern(_NS_THESU_Q + 'name')
+_K_RANK = sys.intern(_NS_THESU_Q + 'rank')
+_K_CAUSE = sys.intern(_NS_THESU_Q + 'cause')
+_K_END = sys.intern(_NS_THESU_Q + 'end')
+_K_COMPARANS = sys.intern(_NS_THESU_Q + 'comparans')
+_K_ENTAILED_AS = sys.intern(_NS_THESU_Q + 'entailedAs')
+_K_PROP_REF = sys.intern(_NS_THESU_Q + 'propRef')
+_K_SEQUENCE_REF = sys.intern(_NS_THESU_Q + 'sequenceRef')
+
+_TAG_ENTAILED_BY = _NS_THESU_Q + 'entailedBy'
+_TAG_ETIOLOGY_MEMBER = _NS_THESU_Q + 'etiologyMember'
+_TAG_ANALOGY_MEMBER = _NS_THESU_Q + 'analogyMember'
+_TAG_ELEMENT_REF = _NS_THESU_Q + 'elementRef'
+_TAG_MATCHING_PROPOSITION = _NS_THESU_Q + 'matchingProposition'
+_TAG_PHASE = _NS_THESU_Q + 'phase'
+_TAG_SEQUENCE = _NS_THESU_Q + 'sequence'
+
+# DOT line templates for thesis sequence phases and the edges between them
+_PHASE_TMPL = ('"%s" [label=<<b>%s</b><br/><i>%s</i>>, gephi_label="ph.", phase_number="%s", '
+               'paraphrasis="%s", shape="box", fillcolor="%s", color="%s", style="%s"%s];\n\n')
+_PHASE_EDGE_TMPL = '"%s" -> "%s" [dir=none, color="%s", style="%s"];\n\n'
+
+# Dotted edge from a matching PROPOSITION phase to a thesis phase: (source, target, xlabel, gephi_label)
+_CONN_EDGE_TMPL = '"%s" -> "%s" [xlabel=<%s>, fontsize=10, fontcolor="#9673a6", fontname="bold", color="#9673a6", style="dotted", penwidth=1.25, gephi_label=%s];\n\n'
+
+# Relation pseudo-nodes and the two edges routing a referenced element through them to the THESIS
+_ENTAILMENT_NODE_TMPL = '"%s" [label=<by %s,<br/>ENTAILS>, fontsize="11", style="%s", fillcolor="%s", color="%s", shape="house"];\n\n'
+_DIAMOND_NODE_TMPL = '"%s" [label=<%s>, fontsize="11", style="%s", fillcolor="%s", color="%s", shape="diamond"];\n\n'
+_REFERENCE_NODE_TMPL = '"%s" [label=<IS REFERENCED IN>, fontsize="11", style="rounded,filled", fillcolor="%s", color="%s", shape="note"];\n\n'
+_REL_IN_EDGE_TMPL = '"%s" -> "%s" [dir=none, color="%s"];\n\n'
+_REL_OUT_EDGE_TMPL = '"%s" -> "%s" [color="%s"];\n\n'
+
+# Matching attributes in output order: (Clark name, phrase used in MATCHES labels)
+_MATCH_ATTRS = (
+    (_NS_THESU_Q + 'extended', 'extending'),
+    (_NS_THESU_Q + 'partial', 'being part of'),
+    (_NS_THESU_Q + 'generalized', 'generalizing'),
+    (_NS_THESU_Q + 'specified', 'specifying'),
+    (_NS_THESU_Q + 'quoted', 'being quoted'),
+    (_NS_THESU_Q + 'altered', 'altering'),
+)
+# Matching attribute -> (edge verb, gephi_label) for PROPOSITION-phase connections, in output order
+_MATCH_LABELS = {
+    'extended': ('extends', 'exts'),
+    'partial': ('is part of', 'part'),
+    'generalized': ('generalizes', 'gens'),
+    'specified': ('specifies', 'spec'),
+    'quoted': ('is quoted in', 'qted'),
+    'altered': ('alters', 'alts'),
+}
+_BY_PHASE_NUMBER_IN_GROUP = itemgetter('phase_number_in_group')
+
+# (attribute name, Clark name) pairs for building matching_attributes dicts
+_MATCH_ATTR_KEYS = tuple((attr, _NS_THESU_Q + attr) for attr in ('extended', 'partial', 'generalized', 'specified', 'quoted', 'altered'))
+
+_WRAP50 = re.compile(r'(.{1,50})(?:\s|$)')
+_WRAP30 = re.compile(r'(.{1,30})(?:\s|$)')
+
+class ThesisIndexes:
+    """
+    Lookup tables for THESIS processing, built on first use and kept for one DOT build.
+    
+    One instance is created per run (see initialize_elements_clusters) and passed down
+    to the THESIS processors, so no parsed document outlives the run that loaded it.
+    """
+    __slots__ = ('_documents', '_sequence_ids_source', '_sequence_ids')
+
+    def __init__(self):
+        # Document root -> (xml:id -> element index, element -> preorder (enter, exit) span)
+        self._documents = {}
+        # xml:ids of every sequence inside the run's all_propositions mapping
+        self._sequence_ids_source = None
+        self._sequence_ids = frozenset()
+
+    def document(self, root):
+        """Return the xml:id index and DFS spans of root's elements, building them once."""
+        tables = self._documents.get(root)
+        if tables is None:
+            tables = self._documents[root] = _index_document(root)
+        return tables
+
+    def proposition_sequence_ids(self, all_propositions):
+        """Return the xml:ids of all thesu:sequence descendants of the given propositions."""
+        if all_propositions is not self._sequence_ids_source:
+            self._sequence_ids = frozenset(
+                seq_id
+                for proposition_element in all_propositions.values()
+                for seq in proposition_element.iterdescendants(_TAG_SEQUENCE)
+                if (seq_id := seq.get(_XML_ID)) is not None
+            )
+            self._sequence_ids_source = all_propositions
+        return self._sequence_ids
+
+def _index_document(root):
+    """Build the xml:id index (first occurrence wins) and DFS spans for root's elements."""
+    id_index = {}
+    elements = list(root.iter(ET.Element))
+    enter = {el: i for i, el in enumerate(elements)}
+    spans = {}
+    # Reverse preorder visits children before parents, so a parent's span ends
+    # where its last element child's span ends
+    for el in reversed(elements):
+        last_child = None
+        for last_child in el.iterchildren(ET.Element, reversed=True):
+            break
+        spans[el] = (enter[el], spans[last_child][1] if last_child is not None else enter[el])
+    for el in elements[1:]:
+        xml_id = el.get(_XML_ID)
+        if xml_id is not None and xml_id not in id_index:
+            id_index[xml_id] = el
+    return id_index, spans
+
+def _is_ancestor(spans, ancestor, element):
+    """Constant-time test whether ancestor strictly contains element, given their document's DFS spans."""
+    ancestor_enter, ancestor_exit = spans[ancestor]
+    return ancestor_enter < spans[element][0] <= ancestor_exit
+
+def _wrapped_paraphrasis(paraphrasis_elem):
+    """Return the paraphrasis text wrapped at 50 characters."""
+    # extract_paraphrasis_text already collapses whitespace
+    return _WRAP50.sub(r'\1<br/>', extract_paraphrasis_text(paraphrasis_elem))
+
+@lru_cache(maxsize=None)
+def _hex_to_rgb(hex_color):
+    """Convert '#rrggbb' to an (r, g, b) tuple of ints."""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+@lru_cache(maxsize=None)
+def _canonical_hex(hex_color):
+    """Return hex_color as lowercase '#rrggbb', exactly as _interpolate_color would output it."""
+    return '#%02x%02x%02x' % _hex_to_rgb(hex_color)
+
+@lru_cache(maxsize=4096)
+def _interpolate_color(color1, color2, ratio):
+    """Blend color1 towards color2 by sqrt(ratio), biasing partial matches towards color2."""
+    biased_ratio = ratio ** 0.5
+    rgb1 = _hex_to_rgb(color1)
+    rgb2 = _hex_to_rgb(color2)
+    r, g, b = (rgb1[i] + (rgb2[i] - rgb1[i]) * biased_ratio for i in range(3))
+    return '#%02x%02x%02x' % (int(r), int(g), int(b))
+
+def _first(xpath, node):
+    """Return the first match of a precompiled XPath on node, or None (like Element.find)."""
+    found = xpath(node)
+    return found[0] if found else None
+
+def _emit_triangle(chunks, written_lines, node_line, referenced_id, pseudo_node_id, element_id, border_color):
+    """Queue a relation pseudo-node plus its referenced->pseudo and pseudo->element edges."""
+    in_edge = _REL_IN_EDGE_TMPL % (referenced_id, pseudo_node_id, border_color)
+    out_edge = _REL_OUT_EDGE_TMPL % (pseudo_node_id, element_id, border_color)
+    chunks += (node_line, in_edge, out_edge)
+    written_lines.extend((node_line, in_edge, out_edge))
 
 def get_thesis_entailments(element, namespaces):
     """Extract entailment references from a THESIS element. Returns {entailed_by_ref: entailed_as}."""
     entailments_dict = {}
-    entailments_group = element.find('./thesu:entailment', namespaces=namespaces)
+    entailments_group = _first(_XP_ENTAILMENT, element)
     if entailments_group is not None:
-        entailments = entailments_group.findall('.//thesu:entailedBy', namespaces=namespaces)
+        entailments = entailments_group.iter(_TAG_ENTAILED_BY)
         for entailment in entailments:
-            entailed_by_ref = entailment.get('{http://alchemeast.eu/thesu/ns/1.0}ref').split('#')[-1]
-            entailed_as = entailment.get('{http://alchemeast.eu/thesu/ns/1.0}entailedAs')
+            entailed_by_ref = entailment.get(_K_REF).rpartition('#')[2]
+            entailed_as = entailment.get(_K_ENTAILED_AS)
             entailments_dict[entailed_by_ref] = entailed_as
     return entailments_dict
 
-def get_thesis_etiologies(element, namespaces, element_id):
+def get_thesis_etiologies(element, namespaces, element_id, indexes=None):
     """
     Extract etiology members from a THESIS element.
     Only includes references to external THESIS elements (not descendants of the current THESIS).
+    indexes is the run's ThesisIndexes; without it the document is indexed for this call only.
     
     Returns:
         dict: {referenced_element_id: {"is_cause": True/False, "is_end": True/False, "has_cause_siblings": True/False, "has_end_siblings": True/False}}
@@ -41,58 +234,54 @@ def get_thesis_etiologies(element, namespaces, element_id):
     etiologies_dict = {}
     
     # Find etiologiesGroup in thesisType
-    etiologies_group = element.find('./thesu:thesisType/thesu:etiologiesGroup', namespaces=namespaces)
+    etiologies_group = _first(_XP_ETIOLOGIES_GROUP, element)
     
     if etiologies_group is not None:
-        etiologies = etiologies_group.findall('./thesu:etiology', namespaces=namespaces)
+        etiologies = _XP_ETIOLOGY(etiologies_group)
+        # Resolve the document's xml:id index once rather than per member
+        if indexes is None:
+            indexes = ThesisIndexes()
+        id_index, spans = indexes.document(element.getroottree().getroot())
         
         for etiology in etiologies:
             # Process each etiology member
-            etiology_members = etiology.findall('./thesu:etiologyMember', namespaces=namespaces)
+            etiology_members = list(etiology.iterchildren(_TAG_ETIOLOGY_MEMBER))
             
-            # Analyze siblings to determine relationship context
-            has_cause_siblings = any(member.get('{http://alchemeast.eu/thesu/ns/1.0}cause') == "true" 
-                                   for member in etiology_members)
-            has_end_siblings = any(member.get('{http://alchemeast.eu/thesu/ns/1.0}end') == "true" 
-                                  for member in etiology_members)
+            # Analyze siblings to determine relationship context (both flags in one pass)
+            has_cause_siblings = has_end_siblings = False
+            for member in etiology_members:
+                if member.get(_K_CAUSE) == "true":
+                    has_cause_siblings = True
+                if member.get(_K_END) == "true":
+                    has_end_siblings = True
+                if has_cause_siblings and has_end_siblings:
+                    break
             
             for member in etiology_members:
                 # Get the cause and end attributes
-                is_cause = member.get('{http://alchemeast.eu/thesu/ns/1.0}cause') == "true"
-                is_end = member.get('{http://alchemeast.eu/thesu/ns/1.0}end') == "true"
+                is_cause = member.get(_K_CAUSE) == "true"
+                is_end = member.get(_K_END) == "true"
                 
                 # Find element references
-                element_ref = member.find('./thesu:elementRef', namespaces=namespaces)
+                element_ref = _first(_XP_ELEMENT_REF, member)
                 if element_ref is not None:
                     # Get the complete reference
-                    full_ref = element_ref.get('{http://alchemeast.eu/thesu/ns/1.0}ref')
-                    referenced_id = full_ref.split('#')[-1]
+                    full_ref = element_ref.get(_K_REF)
+                    referenced_id = full_ref.rpartition('#')[2]
                     
                     # Skip self-references
                     if referenced_id == element_id:
                         continue
                     
-                    # Find the referenced element in the XML tree
-                    # First get the root of the document
-                    root = element.getroottree().getroot()
-                    
-                    # Find the referenced element by its ID
-                    xpath_query = f".//*[@xml:id='{referenced_id}']"
-                    referenced_elements = root.xpath(xpath_query, namespaces={'xml': 'http://www.w3.org/XML/1998/namespace'})
+                    # Find the referenced element by its ID in the document index
+                    referenced_element = id_index.get(referenced_id)
                     
                     # If the referenced element exists and is not a descendant of the current element
-                    if referenced_elements:
-                        referenced_element = referenced_elements[0]
+                    if referenced_element is not None:
                         
                         # Check if current element is an ancestor of the referenced element
                         # If it is, skip this reference as it's internal
-                        is_ancestor = False
-                        parent = referenced_element.getparent()
-                        while parent is not None:
-                            if parent == element:
-                                is_ancestor = True
-                                break
-                            parent = parent.getparent()
+                        is_ancestor = _is_ancestor(spans, element, referenced_element)
                         
                         # Only add external references (not descendants)
                         if not is_ancestor:
@@ -115,23 +304,23 @@ def get_thesis_analogies(element, namespaces):
     analogies_dict = {}
     
     # Use thesu: namespace prefix consistently
-    analogies_group = element.find('./thesu:thesisType/thesu:analogiesGroup', namespaces=namespaces)
+    analogies_group = _first(_XP_ANALOGIES_GROUP, element)
     
     if analogies_group is not None:
-        analogies = analogies_group.findall('./thesu:analogy', namespaces=namespaces)
+        analogies = _XP_ANALOGY(analogies_group)
         
         for analogy in analogies:
             # Process each analogy member
-            analogy_members = analogy.findall('./thesu:analogyMember', namespaces=namespaces)
+            analogy_members = analogy.iterchildren(_TAG_ANALOGY_MEMBER)
             
             for member in analogy_members:
                 # Get the comparans attribute
-                is_comparans = member.get('{http://alchemeast.eu/thesu/ns/1.0}comparans') == "true"
+                is_comparans = member.get(_K_COMPARANS) == "true"
                 
                 # Find element references
-                element_ref = member.find('./thesu:elementRef', namespaces=namespaces)
+                element_ref = _first(_XP_ELEMENT_REF, member)
                 if element_ref is not None:
-                    referenced_id = element_ref.get('{http://alchemeast.eu/thesu/ns/1.0}ref').split('#')[-1]
+                    referenced_id = element_ref.get(_K_REF).rpartition('#')[2]
                     analogies_dict[referenced_id] = {"is_comparans": is_comparans}
                 
     return analogies_dict
@@ -144,60 +333,44 @@ def get_thesis_references(element, namespaces):
     
     Returns:
         dict: {referenced_element_id: source_location}
-        where source_location is either "includedRef" or "macroThemes"
+        where source_location is either "includedRef" or "macroThemes"; an ID found in
+        both keeps the first location recorded ("includedRef")
     """
     references_dict = {}
     
     # Case 1: Find elementRef within includedRef elements
-    included_refs = element.findall('.//thesu:includedRef', namespaces=namespaces)
+    included_refs = _XP_INCLUDED_REF(element)
     for included_ref in included_refs:
-        element_refs = included_ref.findall('.//thesu:elementRef', namespaces=namespaces)
+        element_refs = included_ref.iter(_TAG_ELEMENT_REF)
         for elem_ref in element_refs:
-            ref_id = elem_ref.get('{http://alchemeast.eu/thesu/ns/1.0}ref')
+            ref_id = elem_ref.get(_K_REF)
             if ref_id:
                 # Extract the ID portion after the # symbol
-                referenced_id = ref_id.split('#')[-1]
-                references_dict[referenced_id] = "includedRef"
+                referenced_id = ref_id.rpartition('#')[2]
+                references_dict.setdefault(referenced_id, "includedRef")
     
     # Case 2: Find elementRef within macroThemesGroup
-    macro_themes_group = element.find('./thesu:thesisType/thesu:macroThemesGroup', namespaces=namespaces)
+    macro_themes_group = _first(_XP_MACRO_THEMES_GROUP, element)
     if macro_themes_group is not None:
-        element_refs = macro_themes_group.findall('.//thesu:elementRef', namespaces=namespaces)
+        element_refs = macro_themes_group.iter(_TAG_ELEMENT_REF)
         for elem_ref in element_refs:
-            ref_id = elem_ref.get('{http://alchemeast.eu/thesu/ns/1.0}ref')
+            ref_id = elem_ref.get(_K_REF)
             if ref_id:
                 # Extract the ID portion after the # symbol
-                referenced_id = ref_id.split('#')[-1]
-                references_dict[referenced_id] = "macroThemes"
+                referenced_id = ref_id.rpartition('#')[2]
+                references_dict.setdefault(referenced_id, "macroThemes")
     
     return references_dict
 
 def get_thesis_matching_propositions(element, namespaces):
     """Extract matching proposition references and their types from a THESIS element."""
     matching_propositions_dict = {}
-    matching_propositions_group = element.find('./thesu:matchingPropositionsGroup', namespaces=namespaces)
+    matching_propositions_group = _first(_XP_MATCHING_PROPOSITIONS_GROUP, element)
     if matching_propositions_group is not None:
-        matching_propositions = matching_propositions_group.findall('.//thesu:matchingProposition', namespaces=namespaces)
+        matching_propositions = matching_propositions_group.iter(_TAG_MATCHING_PROPOSITION)
         for matching_proposition in matching_propositions:
-            prop_ref = matching_proposition.get('{http://alchemeast.eu/thesu/ns/1.0}propRef').split('#')[-1]
-            matching_type = []
-
-            attributes = ['extended', 'partial', 'generalized', 'specified', 'quoted', 'altered']
-            for attr in attributes:
-                attr_value = matching_proposition.get(f'{{http://alchemeast.eu/thesu/ns/1.0}}{attr}')
-                if attr_value == 'true':
-                    if attr == 'extended':
-                        matching_type.append('extending')
-                    elif attr == 'partial':
-                        matching_type.append('being part of')
-                    elif attr == 'generalized':
-                        matching_type.append('generalizing')
-                    elif attr == 'specified':
-                        matching_type.append('specifying')
-                    elif attr == 'quoted':
-                        matching_type.append('being quoted')
-                    elif attr == 'altered':
-                        matching_type.append('altering')
+            prop_ref = matching_proposition.get(_K_PROP_REF).rpartition('#')[2]
+            matching_type = [phrase for qname, phrase in _MATCH_ATTRS if matching_proposition.get(qname) == 'true']
 
             matching_type_str = ',<br/>'.join(matching_type) if matching_type else None
             matching_propositions_dict[prop_ref] = matching_type_str
@@ -208,6 +381,9 @@ def process_matching_propositions(element, element_id, namespaces, all_propositi
     """Process matching propositions: create nodes, pseudo-nodes, and store edges for later writing."""
     matching_propositions_dict = get_thesis_matching_propositions(element, namespaces)
 
+    # Lines are collected here and written in batches; written_lines is still updated
+    # immediately because the pseudo-node ID generators scan it
+    out = []
     if matching_propositions_dict:
         for prop_ref in matching_propositions_dict:
             # Only process the proposition node if it hasn't been processed before
@@ -219,15 +395,9 @@ def process_matching_propositions(element, element_id, namespaces, all_propositi
                     # Mark as processed
                     processed_propositions.add(prop_ref)
                     
-                    # Retrieve the paraphrasis of the PROPOSITION element
-                    paraphrasis_elem = proposition_element.find("./thesu:paraphrasis", namespaces=namespaces)
-                    paraphrasis = extract_paraphrasis_text(paraphrasis_elem)
-                    paraphrasis = re.sub(r'\s+', ' ', paraphrasis)
-                    paraphrasis = re.sub(r'(.{1,50})(?:\s|$)', r'\1<br/>', paraphrasis)
-
-                    # Create the node and write it to the dot file
-                    node_line = f'"{prop_ref}" [label=<<b>PROPOSITION</b><br/><i>{paraphrasis}</i>>, gephi_label="PROP", shape="doubleoctagon", style="rounded,filled", fillcolor="#f9edff", color="#9673a6"];\n\n'
-                    dot_file.write(node_line)
+                    # Create the node (cached per PROPOSITION) and write it to the dot file
+                    node_line = get_proposition_node_line(prop_ref, proposition_element)
+                    out.append(node_line)
 
                     # Append the node line to written_lines
                     written_lines.append(node_line)  
@@ -235,6 +405,9 @@ def process_matching_propositions(element, element_id, namespaces, all_propositi
                     # Iterate through the PROPOSITION's sequences
                     sequences_dict = get_proposition_sequences(proposition_element, namespaces, prop_id)
                     if sequences_dict:
+                        # process_proposition_sequences writes directly, so flush first to keep order
+                        dot_file.writelines(out)
+                        out.clear()
                         written_lines = process_proposition_sequences(sequences_dict, prop_id, dot_file, written_lines, written_prop_phases)
                         
             # Create a pseudo-node with its own ID
@@ -244,7 +417,7 @@ def process_matching_propositions(element, element_id, namespaces, all_propositi
                 pseudo_node_id, 
                 "MATCHES<br/><i>{}</i>".format(matching_type_str) if matching_type_str else "MATCHES"
             )
-            dot_file.write(line_to_write)
+            out.append(line_to_write)
             written_lines.append(line_to_write)
 
             # Store the edges to write them later
@@ -254,6 +427,7 @@ def process_matching_propositions(element, element_id, namespaces, all_propositi
             line_to_write = f'"{pseudo_node_id}" -> "{element_id}" [color="#9673a6"];\n\n'
             stored_edges.append(line_to_write)
 
+    dot_file.writelines(out)
     return written_lines, processed_propositions
 
 def get_thesis_sequences(element, namespaces, element_id):
@@ -263,15 +437,15 @@ def get_thesis_sequences(element, namespaces, element_id):
     Each phase may include matchingPropositionPhases data (phasesRef, matching attributes) if present.
     """
     sequences_dict = {}
-    sequences_group = element.find('.//thesu:thesisType/thesu:sequencesGroup', namespaces=namespaces)
+    sequences_group = _first(_XP_SEQUENCES_GROUP, element)
     if sequences_group is not None:
         # Get all sequences
-        all_sequences = sequences_group.findall('.//thesu:sequence', namespaces=namespaces)
+        all_sequences = _XP_SEQUENCE(sequences_group)
         
         # Filter out sequences that contain 'maySubstitute' as child element
         filtered_sequences = []
         for seq in all_sequences:
-            if seq.find('.//thesu:maySubstitute', namespaces=namespaces) is None:
+            if not _XP_MAY_SUBSTITUTE(seq):
                 filtered_sequences.append(seq)
         
         # Only process the first filtered sequence (if any exist)
@@ -281,28 +455,28 @@ def get_thesis_sequences(element, namespaces, element_id):
             sequence_number += 50000
             phase_absolute_number = sequence_number
             phase_relative_to_seq_number = 0
-            sequence_id = sequence.get('{http://alchemeast.eu/thesu/ns/1.0}id')
+            sequence_id = sequence.get(_K_ID)
             if sequence_id is None:
-                xml_id = sequence.get('{http://www.w3.org/XML/1998/namespace}id')
+                xml_id = sequence.get(_XML_ID)
                 if xml_id is not None:
                     sequence_id = xml_id
                 else:
                     sequence_id = f"{element_id}_Q{sequence_number}"
             else:
                 sequence_id = f"{element_id}_{sequence_id}"
-            phasesGroups = sequence.findall('.//thesu:phasesGroup', namespaces=namespaces)
+            # Map each phase to the number of the first phasesGroup containing it
+            phase_to_group = {}
+            for group_number, phasesGroup in enumerate(_XP_PHASES_GROUP(sequence), 1):
+                for group_phase in phasesGroup.iter(_TAG_PHASE):
+                    phase_to_group.setdefault(group_phase, group_number)
             phase_relative_to_group_number = 0
             last_phase_group_number = None
-            phases = sequence.findall('.//thesu:phase', namespaces=namespaces)
+            phases = sequence.iter(_TAG_PHASE)
             
             for phase in phases:
                 phase_absolute_number += 1
                 phase_relative_to_seq_number += 1
-                phase_group_number = None
-                for i, phasesGroup in enumerate(phasesGroups):
-                    if phase in phasesGroup.findall('.//thesu:phase', namespaces=namespaces):
-                        phase_group_number = i + 1
-                        break
+                phase_group_number = phase_to_group.get(phase)
                 if last_phase_group_number == phase_group_number:
                     phase_relative_to_group_number += 1
                 else:
@@ -312,18 +486,18 @@ def get_thesis_sequences(element, namespaces, element_id):
                 # Replace Q with q in the ID and add 3 more digits for phase number
                 phase_id = sequence_id.replace("Q", "q") + f"{phase_relative_to_seq_number:03d}"
 
-                original_xml_id = phase.get('{http://www.w3.org/XML/1998/namespace}id')
+                original_xml_id = phase.get(_XML_ID)
                 
                 # Look for direct paraphrasis child (not descendant)
-                paraphrasis_elem = phase.find('./thesu:paraphrasis', namespaces=namespaces)
+                paraphrasis_elem = _first(_XP_PARAPHRASIS, phase)
                 if paraphrasis_elem is not None:
                     phase_paraphrasis = extract_paraphrasis_text(paraphrasis_elem)
-                    phase_paraphrasis = re.sub(r'\s+', ' ', phase_paraphrasis.strip())
+                    phase_paraphrasis = ' '.join(phase_paraphrasis.split())
                 else:
                     # Try to find microThemedFreeText and then freeText
-                    micro_themed = phase.find('./thesu:microThemedFreeText', namespaces=namespaces)
+                    micro_themed = _first(_XP_MICRO_THEMED_FREE_TEXT, phase)
                     if micro_themed is not None:
-                        free_text_elem = micro_themed.find('./thesu:freeText', namespaces=namespaces)
+                        free_text_elem = _first(_XP_FREE_TEXT, micro_themed)
                         if free_text_elem is not None:
                             # Extract the text, including any tail text
                             phase_paraphrasis = free_text_elem.text or ""
@@ -333,28 +507,23 @@ def get_thesis_sequences(element, namespaces, element_id):
                                 if child.tail:
                                     phase_paraphrasis += child.tail
                                     
-                            phase_paraphrasis = re.sub(r'\s+', ' ', phase_paraphrasis.strip())
+                            phase_paraphrasis = ' '.join(phase_paraphrasis.split())
                         else:
                             phase_paraphrasis = "/"  # No freeText element found
                     else:
                         phase_paraphrasis = "/"  # No microThemedFreeText element found
                 
-                phase_paraphrasis = re.sub(r'(.{1,30})(?:\s|$)', r'\1<br/>', phase_paraphrasis)
+                phase_paraphrasis = _WRAP30.sub(r'\1<br/>', phase_paraphrasis)
                 
-                prop_phases_ref = phase.find('.//thesu:matchingPropositionPhases', namespaces=namespaces)
+                prop_phases_ref = _first(_XP_MATCHING_PROPOSITION_PHASES, phase)
                 attr_dict = {}
                 parsed_phases_ref = None
                 if prop_phases_ref is not None:
-                    phases_ref = prop_phases_ref.get('{http://alchemeast.eu/thesu/ns/1.0}phasesRef')
+                    phases_ref = prop_phases_ref.get(_K_PHASES_REF)
                     parsed_phases_ref = parse_phases_ref(phases_ref)
                     
-                    attributes = ['extended', 'partial', 'generalized', 'specified', 'quoted', 'altered']
-                    for attr in attributes:
-                        attr_value = prop_phases_ref.get(f'{{http://alchemeast.eu/thesu/ns/1.0}}{attr}')
-                        if attr_value == 'true':
-                            attr_dict[attr] = 'true'
-                        else:
-                            attr_dict[attr] = 'false'
+                    element_attrib = prop_phases_ref.attrib
+                    attr_dict = {attr: ('true' if element_attrib.get(qname) == 'true' else 'false') for attr, qname in _MATCH_ATTR_KEYS}
                 
                 sequences_dict[phase_absolute_number] = {
                     'phase_id' : phase_id,
@@ -372,19 +541,27 @@ def get_thesis_sequences(element, namespaces, element_id):
                 }
     return sequences_dict
 
-def process_thesis_sequences(element, element_id, namespaces, dot_file, written_lines, all_propositions, written_prop_phases, implicit, color_fill, color_peripheries, style, filter_propositions, filter_matching_proposition_sequences):
+def process_thesis_sequences(element, element_id, namespaces, dot_file, written_lines, all_propositions, written_prop_phases, implicit, color_fill, color_peripheries, style, filter_propositions, filter_matching_proposition_sequences, indexes=None):
     """Process thesis sequences: write phase nodes, clusters, and edges to the DOT file."""
     sequences_dict = get_thesis_sequences(element, namespaces, element_id)
     if sequences_dict:
-        unique_sequence_ids = set([value['sequence_id'] for value in sequences_dict.values()])
+        unique_sequence_ids = {value['sequence_id'] for value in sequences_dict.values()}
 
         for sequence_id in unique_sequence_ids:
-            # Filter the phases belonging to the same sequence_id
-            sequence_dict_filtered = {k: v for k, v in sequences_dict.items() if v['sequence_id'] == sequence_id}
+            # Filter the phases belonging to the same sequence_id (get_thesis_sequences
+            # currently yields a single sequence, in which case no filtering is needed)
+            if len(unique_sequence_ids) == 1:
+                sequence_dict_filtered = sequences_dict
+            else:
+                sequence_dict_filtered = {k: v for k, v in sequences_dict.items() if v['sequence_id'] == sequence_id}
             
             cluster_id = f"{element_id}_{sequence_id}".replace('.', '_')
             cluster_label = f"<font color='{color_peripheries}'>Sequence</font>"
             cluster_lines = []
+
+            # All phases here share one sequence element; count its matchingPropositionSequence children once
+            sequence_element = next(iter(sequence_dict_filtered.values()))['sequence_element']
+            expected_matches = len(sequence_element.findall('./thesu:matchingPropositionSequence', namespaces=namespaces))
             
             # Add nodes for each phase in the sequence
             for phase_number, phase_data in sequence_dict_filtered.items():
@@ -393,35 +570,15 @@ def process_thesis_sequences(element, element_id, namespaces, dot_file, written_
                 phase_paraphrasis = phase_data['phase_paraphrasis']
                 label = f"{phase_data['phase_number']}"
 
-                sequence_element = phase_data['sequence_element']
                 phase_element = phase_data['phase_element']
 
                 # Color calculation logic
                 if filter_propositions or filter_matching_proposition_sequences:
                     fillcolor = color_fill
                     node_color = color_peripheries
-                elif sequence_element.find('thesu:matchingPropositionSequence', namespaces) is not None:
+                elif expected_matches:
                     # Get all matchingPropositionPhases elements for this phase
-                    matching_prop_phases_elements = phase_element.findall('thesu:matchingPropositionPhases', namespaces=namespaces)
-                    
-                    # Get the matching proposition sequence elements that are direct children of the sequence
-                    matching_prop_sequences = sequence_element.findall('./thesu:matchingPropositionSequence', namespaces=namespaces)
-                    expected_matches = len(matching_prop_sequences)
-                    
-                    # Helper functions remain the same
-                    def hex_to_rgb(hex_color):
-                        hex_color = hex_color.lstrip('#')
-                        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-                    
-                    def rgb_to_hex(rgb):
-                        return '#{:02x}{:02x}{:02x}'.format(int(rgb[0]), int(rgb[1]), int(rgb[2]))
-                    
-                    def interpolate_color(color1, color2, ratio):
-                        biased_ratio = ratio ** 0.5
-                        rgb1 = hex_to_rgb(color1)
-                        rgb2 = hex_to_rgb(color2)
-                        result = tuple(rgb1[i] + (rgb2[i] - rgb1[i]) * biased_ratio for i in range(3))
-                        return rgb_to_hex(result)
+                    matching_prop_phases_elements = _XP_CHILD_MATCHING_PROPOSITION_PHASES(phase_element)
                     
                     # Count valid matchingPropositionPhases, but only up to expected_matches
                     valid_matches = 0
@@ -432,7 +589,7 @@ def process_thesis_sequences(element, element_id, namespaces, dot_file, written_
                             if i >= expected_matches:
                                 break
                                 
-                            phases_ref = matching_prop_phases.get('{http://alchemeast.eu/thesu/ns/1.0}phasesRef')
+                            phases_ref = matching_prop_phases.get(_K_PHASES_REF)
                             if phases_ref and phases_ref != "/" and phases_ref.strip():
                                 # Try to parse it to validate
                                 try:
@@ -452,9 +609,14 @@ def process_thesis_sequences(element, element_id, namespaces, dot_file, written_
                         light_green_fill = color_fill  # Light green fill (all valid matches)
                         light_green_border = color_peripheries  # Light green border (all valid matches)
                         
-                        # Interpolate colors based on ratio
-                        fillcolor = interpolate_color(dark_green_fill, light_green_fill, ratio)
-                        node_color = interpolate_color(dark_green_border, light_green_border, ratio)
+                        # Interpolate colors based on ratio; none or all valid need no blending
+                        if valid_matches == 0:
+                            fillcolor, node_color = dark_green_fill, dark_green_border
+                        elif valid_matches == expected_matches:
+                            fillcolor, node_color = _canonical_hex(light_green_fill), _canonical_hex(light_green_border)
+                        else:
+                            fillcolor = _interpolate_color(dark_green_fill, light_green_fill, ratio)
+                            node_color = _interpolate_color(dark_green_border, light_green_border, ratio)
                     else:
                         # No matching sequences expected, use standard colors
                         fillcolor = color_fill
@@ -465,7 +627,8 @@ def process_thesis_sequences(element, element_id, namespaces, dot_file, written_
                                                                                                         
                 # Add paraphrasis as a separate attribute
                 original_id_attr = f', original_xml_id="{phase_data["original_xml_id"]}"' if phase_data.get("original_xml_id") else ""
-                node_line = f'"{phase_id}" [label=<<b>{label}</b><br/><i>{phase_paraphrasis}</i>>, gephi_label="ph.", phase_number="{label}", paraphrasis="{phase_paraphrasis.replace("<br/>", " ")}", shape="box", fillcolor="{fillcolor}", color="{node_color}", style="{style}"{original_id_attr}];\n\n'
+                plain_paraphrasis = phase_paraphrasis.replace("<br/>", " ")
+                node_line = _PHASE_TMPL % (phase_id, label, phase_paraphrasis, label, plain_paraphrasis, fillcolor, node_color, style, original_id_attr)
                 cluster_lines.append(node_line)
 
             # Add the cluster_id to the corresponding phase in sequences_dict
@@ -477,28 +640,27 @@ def process_thesis_sequences(element, element_id, namespaces, dot_file, written_
                 source_phase_id = sequence_dict_filtered[sorted_phase_numbers[i]]['phase_id']
                 target_phase_id = sequence_dict_filtered[sorted_phase_numbers[i + 1]]['phase_id']
                 edge_style = "dashed" if implicit == "true" else "solid"
-                edge_line = f'"{source_phase_id}" -> "{target_phase_id}" [dir=none, color="{node_color}", style="{edge_style}"];\n\n'
+                edge_line = _PHASE_EDGE_TMPL % (source_phase_id, target_phase_id, node_color, edge_style)
                 cluster_lines.append(edge_line)
 
-            # Add lines for the sequence cluster
-            dot_file.write(f'\nsubgraph cluster_{cluster_id} {{\n')
-            dot_file.write(f'label=<{cluster_label}>;\n\n')
-            dot_file.write(f'peripheries=1;\n\n')
-            for cluster_line in cluster_lines:
-                dot_file.write(cluster_line)
-            dot_file.write('}\n\n')
-            written_lines.extend(cluster_lines)
-            
-            # Add edge from THESIS to the first phase
+            # Write the sequence cluster and the edge from THESIS to its first phase in one call
             first_phase_id = sequence_dict_filtered[min(sequence_dict_filtered.keys())]['phase_id']
-            dot_file.write(f'"{element_id}" -> "{first_phase_id}" [dir=none, lhead="cluster_{cluster_id}", color="{node_color}"];\n\n')    
+            dot_file.write(''.join([
+                f'\nsubgraph cluster_{cluster_id} {{\n',
+                f'label=<{cluster_label}>;\n\n',
+                'peripheries=1;\n\n',
+                *cluster_lines,
+                '}\n\n',
+                f'"{element_id}" -> "{first_phase_id}" [dir=none, lhead="cluster_{cluster_id}", color="{node_color}"];\n\n',
+            ]))
+            written_lines.extend(cluster_lines)
             
             # Check for matching sequences in PROPOSITIONs to process them
-            written_lines = process_matching_prop_sequences(element, namespaces, all_propositions, sequence_dict_filtered, written_prop_phases, cluster_id, first_phase_id, written_lines, dot_file)
+            written_lines = process_matching_prop_sequences(element, namespaces, all_propositions, sequence_dict_filtered, written_prop_phases, cluster_id, first_phase_id, written_lines, dot_file, indexes)
 
     return written_lines
 
-def process_matching_prop_sequences(element, namespaces, all_propositions, sequence_dict_filtered, written_prop_phases, cluster_id, first_phase_id, written_lines, dot_file):
+def process_matching_prop_sequences(element, namespaces, all_propositions, sequence_dict_filtered, written_prop_phases, cluster_id, first_phase_id, written_lines, dot_file, indexes=None):
     """Process matching proposition sequences: write phase nodes and connect them to the thesis cluster."""
     # Track processed sequence references to avoid duplication
     processed_sequences = set()
@@ -512,8 +674,8 @@ def process_matching_prop_sequences(element, namespaces, all_propositions, seque
             matching_sequences = sequence_element.findall('.//thesu:matchingPropositionSequence[@thesu:sequenceRef]', namespaces=namespaces)
             
             for match_seq in matching_sequences:
-                prop_sequence_ref = match_seq.get('{http://alchemeast.eu/thesu/ns/1.0}sequenceRef')
-                matching_sequence_id = prop_sequence_ref.split('#')[-1]
+                prop_sequence_ref = match_seq.get(_K_SEQUENCE_REF)
+                matching_sequence_id = prop_sequence_ref.rpartition('#')[2]
                 
                 # Only add if not already processed
                 if matching_sequence_id not in processed_sequences:
@@ -521,196 +683,149 @@ def process_matching_prop_sequences(element, namespaces, all_propositions, seque
                     processed_sequences.add(matching_sequence_id)
         
         # Now process each matching sequence
+        if indexes is None:
+            indexes = ThesisIndexes()
+        proposition_sequence_ids = indexes.proposition_sequence_ids(all_propositions)
+        # Each phase's matchingPropositionPhases do not depend on the sequence, so look them up
+        # once and bucket them by position: the n-th element pairs with the n-th sequence ref
+        matching_phases_by_index = [[] for _ in sequence_refs]
+        for phase_data in (sequence_dict_filtered.values() if sequence_refs else ()):
+            for index, matching_phases_element in enumerate(_XP_MATCHING_PROPOSITION_PHASES(phase_data['phase_element'])[:len(sequence_refs)]):
+                matching_phases_by_index[index].append((phase_data, matching_phases_element))
         for seq_index, matching_sequence_id in enumerate(sequence_refs):
             # Find the matching proposition for this sequence
             first_prop_phase_id = None
             prop_cluster_id = None
             matching_prop_phases = {}
             
-            for prop_id, proposition_element in all_propositions.items():
-                matching_sequence = proposition_element.find(f'.//thesu:sequence[@xml:id="{matching_sequence_id}"]', namespaces=namespaces)
-                
-                if matching_sequence is not None:
-                    # Find all proposition phases for this sequence
-                    for prop_phase_id, prop_phase_data in written_prop_phases.items():
-                        if matching_sequence_id in prop_phase_data.get('sequence_id', ''):
-                            matching_prop_phases[prop_phase_id] = prop_phase_data
-                            
-                            # Store the first phase ID and cluster ID if not already set
-                            if first_prop_phase_id is None:
-                                first_prop_phase_id = prop_phase_data['phase_id']
-                                prop_cluster_id = prop_phase_data.get('cluster_id')
+            # Only sequences defined in some proposition are connected
+            if matching_sequence_id in proposition_sequence_ids:
+                # Find all proposition phases for this sequence
+                for prop_phase_id, prop_phase_data in written_prop_phases.phases_for_sequence(matching_sequence_id):
+                    matching_prop_phases[prop_phase_id] = prop_phase_data
                     
-                    # If we found valid phases, process the connection
-                    if first_prop_phase_id is not None and prop_cluster_id is not None:
-                        # Update the sequence_dict_filtered to include information about which matchingPropositionPhases to use
-                        for phase_data in sequence_dict_filtered.values():
-                            phase_element = phase_data['phase_element']
-                            matching_phases_elements = phase_element.findall('.//thesu:matchingPropositionPhases', namespaces=namespaces)
-                            
-                            # Check if we have a matching matchingPropositionPhases element for this sequence
-                            if seq_index < len(matching_phases_elements):
-                                # Get the phasesRef for the corresponding index
-                                matching_phases_element = matching_phases_elements[seq_index]
-                                phases_ref = matching_phases_element.get('{http://alchemeast.eu/thesu/ns/1.0}phasesRef')
-                                parsed_phases_ref = parse_phases_ref(phases_ref)
-                                
-                                # Also get the attributes
-                                attrs = {}
-                                for attr in ['extended', 'partial', 'generalized', 'specified', 'quoted', 'altered']:
-                                    attr_value = matching_phases_element.get(f'{{http://alchemeast.eu/thesu/ns/1.0}}{attr}')
-                                    if attr_value == 'true':
-                                        attrs[attr] = 'true'
-                                    else:
-                                        attrs[attr] = 'false'
-                                
-                                # Temporarily override the phase data for this particular sequence matching
-                                phase_data_copy = phase_data.copy()
-                                phase_data_copy['parsed_phases_ref'] = parsed_phases_ref
-                                phase_data_copy['matching_attributes'] = attrs
-                                
-                                # Process this specific match
-                                written_lines = draw_edges_with_prop_sequences(
-                                    {phase_data['phase_absolute_number']: phase_data_copy}, 
-                                    matching_prop_phases, 
-                                    cluster_id, 
-                                    prop_cluster_id, 
-                                    first_phase_id, 
-                                    first_prop_phase_id, 
-                                    written_lines, 
-                                    dot_file
-                                )
-                            else:
-                                # Silent mode - no warning messages
-                                pass
+                    # Store the first phase ID and cluster ID if not already set
+                    if first_prop_phase_id is None:
+                        first_prop_phase_id = prop_phase_data['phase_id']
+                        prop_cluster_id = prop_phase_data.get('cluster_id')
+                
+                # If we found valid phases, process the connection
+                if first_prop_phase_id is not None and prop_cluster_id is not None:
+                    # Only phases with a matchingPropositionPhases element at this sequence's index take part
+                    for phase_data, matching_phases_element in matching_phases_by_index[seq_index]:
+                        # Get the phasesRef for the corresponding index
+                        phases_ref = matching_phases_element.get(_K_PHASES_REF)
+                        parsed_phases_ref = parse_phases_ref(phases_ref)
+                        
+                        # Also get the attributes
+                        element_attrib = matching_phases_element.attrib
+                        attrs = {attr: ('true' if element_attrib.get(qname) == 'true' else 'false') for attr, qname in _MATCH_ATTR_KEYS}
                         
-                        break # Found the proposition, no need to continue looking
+                        # Process this specific match, passing this sequence's phasesRef and attributes
+                        written_lines = draw_edges_with_prop_sequences(
+                            phase_data['phase_id'],
+                            parsed_phases_ref,
+                            attrs,
+                            matching_prop_phases, 
+                            cluster_id, 
+                            prop_cluster_id, 
+                            first_phase_id, 
+                            first_prop_phase_id, 
+                            written_lines, 
+                            dot_file
+                        )
             
             # Silent mode - no warning if sequence not found
     
     return written_lines
 
-def draw_edges_with_prop_sequences(sequence_dict_filtered, written_prop_phases, cluster_id, prop_cluster_id, first_phase_id, first_prop_phase_id, written_lines, dot_file):
-    """Draw invisible edges connecting thesis phases to matching proposition phases."""
-    # Use a counter to ensure unique pseudo-node IDs even across different sequence matches
-    node_counter = 1
-    while True:
-        pseudo_node_id = generate_unique_pseudo_node_id_matching_sequences(written_lines, cluster_id, prop_cluster_id, node_counter)
-        # Check if this exact ID already exists in the written lines
-        if not any(f'"{pseudo_node_id}"' in line for line in written_lines):
-            break
-        node_counter += 1
+def draw_edges_with_prop_sequences(phase_id, parsed_phases_ref, matching_attributes, written_prop_phases, cluster_id, prop_cluster_id, first_phase_id, first_prop_phase_id, written_lines, dot_file):
+    """Draw invisible edges connecting a thesis phase to its matching proposition phases."""
+    # The generator bumps the counter past IDs already written (an O(1) set lookup on
+    # WrittenLines), so the ID is unique even across different sequence matches
+    pseudo_node_id = generate_unique_pseudo_node_id_matching_sequences(written_lines, cluster_id, prop_cluster_id, 1)
     
+    # Lines are collected and written with a single writelines() at the end
+    local_chunks = []
     line_to_write = f'"{pseudo_node_id}" [shape="point", style="invis", gephi_invis="true"];\n\n'
-    dot_file.write(line_to_write)
+    local_chunks.append(line_to_write)
     written_lines.append(line_to_write)
 
     # Create the two edges
     line_to_write = f'"{pseudo_node_id}" -> "{first_prop_phase_id}" [dir=none, lhead="cluster_{prop_cluster_id}", style="invis", gephi_invis="true"];\n\n'
-    dot_file.write(line_to_write)
+    local_chunks.append(line_to_write)
     written_lines.append(line_to_write)
 
     line_to_write = f'"{pseudo_node_id}" -> "{first_phase_id}" [dir=none, lhead="cluster_{cluster_id}", style="invis", gephi_invis="true"];\n\n'
-    dot_file.write(line_to_write)
+    local_chunks.append(line_to_write)
     written_lines.append(line_to_write)
     
-    # Map proposition phases by both their group number and their overall number
-    prop_phases_by_group = {}
-    prop_phases_by_number = {}
-    
-    # First, organize by group
-    for phase_id, phase_data in written_prop_phases.items():
-        group_num = phase_data.get('phase_group_number')
-        if group_num not in prop_phases_by_group:
-            prop_phases_by_group[group_num] = []
-        prop_phases_by_group[group_num].append(phase_data)
-    
-    # Sort phases within each group by phase_number_in_group
-    for group_num in prop_phases_by_group:
-        prop_phases_by_group[group_num].sort(key=lambda x: x.get('phase_number_in_group', 0))
-        
-        # Now map by their sequence position (1-indexed within group)
-        for i, phase in enumerate(prop_phases_by_group[group_num]):
-            prop_phases_by_number[(group_num, i+1)] = phase
+    # Group proposition phases by their group number in one pass; each group is sorted by
+    # phase_number_in_group only when a phasesRef first refers to it
+    prop_phases_by_group = defaultdict(list)
+    for prop_phase_data in written_prop_phases.values():
+        prop_phases_by_group[prop_phase_data.get('phase_group_number')].append(prop_phase_data)
+    sorted_groups = {}
 
-    # Store edges to write at the end for better z-ordering
-    connection_edges = []
+    def sorted_group(group_num):
+        group = sorted_groups.get(group_num)
+        if group is None:
+            group = sorted_groups[group_num] = sorted(prop_phases_by_group[group_num], key=_BY_PHASE_NUMBER_IN_GROUP)
+        return group
 
-    # Add connections for phases with matchingPropositionPhases
-    for phase_data in sequence_dict_filtered.values():
-        phase_id = phase_data.get('phase_id')
-        parsed_phases_ref = phase_data.get('parsed_phases_ref')
+    # Connection edges follow the pseudo-node lines in local_chunks for better z-ordering
+    # Add connections for the phase's matchingPropositionPhases
+    if parsed_phases_ref is not None:
+        # Get matching types for this phase
+        matching_type = []
+        gephi_label = "matc"  # Default; the last true attribute wins
         
-        if parsed_phases_ref is not None:
-            # Get matching types for this phase data
-            matching_type = []
-            matching_attributes = phase_data.get('matching_attributes', {})
-            attributes = ['extended', 'partial', 'generalized', 'specified', 'quoted', 'altered']
-            gephi_label = "matc"  # Default
-            
-            for attr in attributes:
-                attr_value = matching_attributes.get(attr)
-                if attr_value == 'true':
-                    if attr == 'extended':
-                        matching_type.append('extends')
-                        gephi_label = "exts"
-                    elif attr == 'partial':
-                        matching_type.append('is part of')
-                        gephi_label = "part"
-                    elif attr == 'generalized':
-                        matching_type.append('generalizes')
-                        gephi_label = "gens"
-                    elif attr == 'specified':
-                        matching_type.append('specifies')
-                        gephi_label = "spec"
-                    elif attr == 'quoted':
-                        matching_type.append('is quoted in')
-                        gephi_label = "qted"
-                    elif attr == 'altered':
-                        matching_type.append('alters')
-                        gephi_label = "alts"
-            
-            matching_type_str = ',<br/>'.join(matching_type) if matching_type else 'matches'
-            
-            # Process each phase group reference
-            connections_created = 0
-            for group_num, phase_nums in parsed_phases_ref.items():
-                if not phase_nums:
-                    # If no specific phases mentioned, include all phases in the group
-                    if group_num in prop_phases_by_group:
-                        for matching_prop_phase in prop_phases_by_group[group_num]:
-                            # Use simpler edge styling that won't create visual artifacts
-                            line_to_write = f'"{matching_prop_phase["phase_id"]}" -> "{phase_id}" [xlabel=<{matching_type_str}>, fontsize=10, fontcolor="#9673a6", fontname="bold", color="#9673a6", style="dotted", penwidth=1.25, gephi_label={gephi_label}];\n\n'
-                            connection_edges.append(line_to_write)
-                            connections_created += 1
-                else:
-                    # Find specific phases in this group
-                    for phase_num in phase_nums:
-                        key = (group_num, phase_num)
-                        if key in prop_phases_by_number:
-                            matching_specific_phase = prop_phases_by_number[key]
-                            # Use simpler edge styling that won't create visual artifacts
-                            line_to_write = f'"{matching_specific_phase["phase_id"]}" -> "{phase_id}" [xlabel=<{matching_type_str}>, fontsize=10, fontcolor="#9673a6", fontname="bold", color="#9673a6", style="dotted", penwidth=1.25, gephi_label={gephi_label}];\n\n'
-                            connection_edges.append(line_to_write)
-                            connections_created += 1
-                            
-    # Write all the connection edges at the end
-    for edge in connection_edges:
-        dot_file.write(edge)
-        written_lines.append(edge)
+        for attr, (verb, label) in _MATCH_LABELS.items():
+            if matching_attributes.get(attr) == 'true':
+                matching_type.append(verb)
+                gephi_label = label
+        
+        matching_type_str = ',<br/>'.join(matching_type) if matching_type else 'matches'
+        
+        # Process each phase group reference
+        connections_created = 0
+        for group_num, phase_nums in parsed_phases_ref.items():
+            if group_num not in prop_phases_by_group:
+                continue
+            if not phase_nums:
+                # If no specific phases mentioned, include all phases in the group
+                for matching_prop_phase in sorted_group(group_num):
+                    # Use simpler edge styling that won't create visual artifacts
+                    line_to_write = _CONN_EDGE_TMPL % (matching_prop_phase["phase_id"], phase_id, matching_type_str, gephi_label)
+                    local_chunks.append(line_to_write)
+                    written_lines.append(line_to_write)
+                    connections_created += 1
+            else:
+                # Find specific phases in this group (phase_num is 1-indexed within the group)
+                group = sorted_group(group_num)
+                for phase_num in phase_nums:
+                    if 1 <= phase_num <= len(group):
+                        matching_specific_phase = group[phase_num - 1]
+                        # Use simpler edge styling that won't create visual artifacts
+                        line_to_write = _CONN_EDGE_TMPL % (matching_specific_phase["phase_id"], phase_id, matching_type_str, gephi_label)
+                        local_chunks.append(line_to_write)
+                        written_lines.append(line_to_write)
+                        connections_created += 1
+                        
+    dot_file.writelines(local_chunks)
     
     return written_lines
 
-def write_thesis_and_process_included_elements(element, element_id, element_type, element_speaker, paraphrasis, namespaces, dot_file, written_lines, retrieved_text, retrieved_text_snippet, locus, processed_propositions, source_id=None):
+def write_thesis_and_process_included_elements(element, element_id, element_type, element_speaker, paraphrasis, namespaces, dot_file, written_lines, retrieved_text, retrieved_text_snippet, locus, processed_propositions, source_id=None, indexes=None):
     """Write the thesis node and process all included elements (entailments, analogies, references, sequences)."""
     # Get both entailments and analogies
     entailments_dict = get_thesis_entailments(element, namespaces)
-    etiologies_dict = get_thesis_etiologies(element, namespaces, element_id)
+    etiologies_dict = get_thesis_etiologies(element, namespaces, element_id, indexes)
     analogies_dict = get_thesis_analogies(element, namespaces)
     
     # Checks for attributes and color
-    extrinsic_att = element.get('{http://alchemeast.eu/thesu/ns/1.0}extrinsic')
-    implicit_att = element.get('{http://alchemeast.eu/thesu/ns/1.0}implicit')
+    extrinsic_att = element.get(_K_EXTRINSIC)
+    implicit_att = element.get(_K_IMPLICIT)
     
     if extrinsic_att == "true":
         color_fill = "#fcfffd"
@@ -740,7 +855,7 @@ def write_thesis_and_process_included_elements(element, element_id, element_type
     # Prepare node attributes
     label_content = (
         f'<<b>{element_type_label}</b><br/>'
-        f'{pad_short_string(element_speaker, 30)}<br/>'
+        f'{element_speaker}<br/>'  # already padded to 30 by process_thesis_element
         f'{locus}<br/>'
         f'<i>{paraphrasis}</i>'
         f'<font point-size="12">"{retrieved_text_snippet}"</font>>'
@@ -767,52 +882,41 @@ def write_thesis_and_process_included_elements(element, element_id, element_type
         f'margin="0.30,0.1"];\n\n'
     )
 
+    # Lines are collected and written with a single writelines() at the end
+    local_chunks = []
+
     # Determine if we need a cluster for the thesis
     needs_cluster = bool(entailments_dict)
-    cluster_created = False
     
     # Create cluster if needed (for entailments)
     if needs_cluster:
         cluster_id = f"{element_id}_ENTAILED".replace('.', '_')
         cluster_label = "Entailed"
-        dot_file.write(f'\nsubgraph cluster_{cluster_id} {{\n')
-        dot_file.write(f'label=<<font color="{color_peripheries}">{cluster_label}</font>>\n')
-        dot_file.write(f'style="dotted";\n\n')
+        local_chunks.append(f'\nsubgraph cluster_{cluster_id} {{\n')
+        local_chunks.append(f'label=<<font color="{color_peripheries}">{cluster_label}</font>>\n')
+        local_chunks.append(f'style="dotted";\n\n')
         
         # Write the thesis node INSIDE the cluster
-        dot_file.write(node_str)
+        local_chunks.append(node_str)
         
         # Close the cluster
-        dot_file.write('}\n\n\n')
-        cluster_created = True
+        local_chunks.append('}\n\n\n')
     else:
         # Write the thesis node (not in a cluster)
-        dot_file.write(node_str)
-            
-    # Close the cluster if one was created
-    if cluster_created:
-        dot_file.write('}\n\n\n')
+        local_chunks.append(node_str)
     
     # Process entailments if present
     if entailments_dict:
         for entailment in entailments_dict.items():
             entailed_by_ref = entailment[0]
-            entailed_as = entailment[1].split('#')[-1]
+            entailed_as = entailment[1].rpartition('#')[2]
             
             # Create a pseudo-node with its own ID
             pseudo_node_id = generate_unique_pseudo_node_id_entailments(written_lines, entailed_by_ref, element_id, 1)
-            line_to_write = f'"{pseudo_node_id}" [label=<by {entailed_as},<br/>ENTAILS>, fontsize="11", style="{style}", fillcolor="{color_fill}", color="{color_peripheries}", shape="house"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-
-            # Create the two edges
-            line_to_write = f'"{entailed_by_ref}" -> "{pseudo_node_id}" [dir=none, color="{color_peripheries}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-
-            line_to_write = f'"{pseudo_node_id}" -> "{element_id}" [color="{color_peripheries}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
+            # Create the pseudo-node and its two edges
+            _emit_triangle(local_chunks, written_lines,
+                           _ENTAILMENT_NODE_TMPL % (pseudo_node_id, entailed_as, style, color_fill, color_peripheries),
+                           entailed_by_ref, pseudo_node_id, element_id, color_peripheries)
     
     # Process etiologies if present
     if etiologies_dict:
@@ -845,19 +949,10 @@ def write_thesis_and_process_included_elements(element, element_id, element_type
             etiology_fill_color = "#e0ffff"  # Light cyan fill
             etiology_border_color = "#008b8b"  # Dark cyan border
             
-            # Create the pseudo-node with teal coloring
-            line_to_write = f'"{pseudo_node_id}" [label=<{etiology_label}>, fontsize="11", style="{style}", fillcolor="{etiology_fill_color}", color="{etiology_border_color}", shape="diamond"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-
-            # Create the two edges - from referenced element to pseudo-node and from pseudo-node to current element
-            line_to_write = f'"{referenced_id}" -> "{pseudo_node_id}" [dir=none, color="{etiology_border_color}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-
-            line_to_write = f'"{pseudo_node_id}" -> "{element_id}" [color="{etiology_border_color}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
+            # Create the pseudo-node with teal coloring and its two edges
+            _emit_triangle(local_chunks, written_lines,
+                           _DIAMOND_NODE_TMPL % (pseudo_node_id, etiology_label, style, etiology_fill_color, etiology_border_color),
+                           referenced_id, pseudo_node_id, element_id, etiology_border_color)
 
     # Process analogies if present
     if analogies_dict:
@@ -877,19 +972,10 @@ def write_thesis_and_process_included_elements(element, element_id, element_type
             analogy_fill_color = "#ffffd0"  # Light yellow fill
             analogy_border_color = "#d4d400"  # Darker yellow border
             
-            # Create the pseudo-node with yellow coloring
-            line_to_write = f'"{pseudo_node_id}" [label=<{analogy_label}>, fontsize="11", style="{style}", fillcolor="{analogy_fill_color}", color="{analogy_border_color}", shape="diamond"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-
-            # Create the two edges - from referenced element to pseudo-node and from pseudo-node to current element
-            line_to_write = f'"{referenced_id}" -> "{pseudo_node_id}" [dir=none, color="{analogy_border_color}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-
-            line_to_write = f'"{pseudo_node_id}" -> "{element_id}" [color="{analogy_border_color}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
+            # Create the pseudo-node with yellow coloring and its two edges
+            _emit_triangle(local_chunks, written_lines,
+                           _DIAMOND_NODE_TMPL % (pseudo_node_id, analogy_label, style, analogy_fill_color, analogy_border_color),
+                           referenced_id, pseudo_node_id, element_id, analogy_border_color)
 
     # Process references if present
     references_dict = get_thesis_references(element, namespaces)
@@ -902,74 +988,62 @@ def write_thesis_and_process_included_elements(element, element_id, element_type
             reference_fill_color = "#f0f3e0"  # Very light olive fill
             reference_border_color = "#708238"  # Olive border
             
-            # Create the pseudo-node
-            line_to_write = f'"{pseudo_node_id}" [label=<IS REFERENCED IN>, fontsize="11", style="rounded,filled", fillcolor="{reference_fill_color}", color="{reference_border_color}", shape="note"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-
-            # Create the two edges - from referenced element to pseudo-node and from pseudo-node to current element
-            line_to_write = f'"{referenced_id}" -> "{pseudo_node_id}" [dir=none, color="{reference_border_color}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
-
-            line_to_write = f'"{pseudo_node_id}" -> "{element_id}" [color="{reference_border_color}"];\n\n'
-            dot_file.write(line_to_write)
-            written_lines.append(line_to_write)
+            # Create the pseudo-node and its two edges
+            _emit_triangle(local_chunks, written_lines,
+                           _REFERENCE_NODE_TMPL % (pseudo_node_id, reference_fill_color, reference_border_color),
+                           referenced_id, pseudo_node_id, element_id, reference_border_color)
             
+    dot_file.writelines(local_chunks)
     return written_lines, implicit, color_fill, color_peripheries, style, processed_propositions
 
-def process_thesis_element(element, element_type, namespaces, all_propositions, dot_file, written_lines, stored_edges, written_prop_phases, retrieved_text, retrieved_text_snippet, locus, processed_propositions, source_id=None):
-    """Main entry: process a THESIS element and delegate to write_thesis_and_process_included_elements."""
+def process_thesis_element(element, element_type, namespaces, all_propositions, dot_file, written_lines, stored_edges, written_prop_phases, retrieved_text, retrieved_text_snippet, locus, processed_propositions, source_id=None, indexes=None):
+    """
+    Main entry: process a THESIS element and delegate to write_thesis_and_process_included_elements.
+    indexes is the run's ThesisIndexes, shared by every THESIS of one DOT build.
+    """
+    if indexes is None:
+        indexes = ThesisIndexes()
 
     
-    element_id = element.get('{http://alchemeast.eu/thesu/ns/1.0}id')
+    element_id = element.get(_K_ID)
     if element_id is None:
-        element_id = element.get('{http://www.w3.org/XML/1998/namespace}id')
+        element_id = element.get(_XML_ID)
     
     # Get all speakers from speakersGroup
-    speaker_elements = element.findall('.//thesu:speakersGroup/thesu:speaker', namespaces=namespaces)
+    speaker_elements = _XP_SPEAKERS(element)
     
-    # Process speakers according to rank
-    element_speaker = ""
-    if speaker_elements:
-        # Get rank for each speaker (default is 1 if not specified)
-        speakers_with_rank = []
-        for spk in speaker_elements:
-            name_val = spk.get('{http://alchemeast.eu/thesu/ns/1.0}name')
-            if name_val:
-                speaker_name = name_val.split('#')[-1]
-                rank_val = spk.get('{http://alchemeast.eu/thesu/ns/1.0}rank')
-                rank = int(rank_val) if rank_val and rank_val.isdigit() else 1
-                speakers_with_rank.append((speaker_name, rank))
-        
-        if speakers_with_rank:
-            # Find minimum rank (highest priority)
-            min_rank = min(rank for _, rank in speakers_with_rank)
-            
-            # Get all speakers with this highest priority rank
-            top_speakers = [name for name, rank in speakers_with_rank if rank == min_rank]
-            
-            # Join speaker names with commas
-            element_speaker = ", ".join(top_speakers)
+    # Process speakers according to rank: keep those with the minimum rank (highest priority)
+    # in a single pass; rank defaults to 1 if not specified
+    min_rank = None
+    top_speakers = []
+    for spk in speaker_elements:
+        name_val = spk.get(_K_NAME)
+        if not name_val:
+            continue
+        rank = parse_rank(spk.get(_K_RANK))
+        if min_rank is None or rank < min_rank:
+            min_rank = rank
+            top_speakers = [name_val.rpartition('#')[2]]
+        elif rank == min_rank:
+            top_speakers.append(name_val.rpartition('#')[2])
+    
+    # Join speaker names with commas (empty when no named speaker)
+    element_speaker = ", ".join(top_speakers)
     
-    paraphrasis_elem = element.find("./thesu:paraphrasis", namespaces=namespaces)
+    paraphrasis_elem = _first(_XP_PARAPHRASIS, element)
     if paraphrasis_elem is not None:
-        paraphrasis = extract_paraphrasis_text(paraphrasis_elem)
-        paraphrasis = re.sub(r'\s+', ' ', paraphrasis)
-        paraphrasis = re.sub(r'(.{1,50})(?:\s|$)', r'\1<br/>', paraphrasis)
-        paraphrasis = paraphrasis.replace('"', r'\"')
+        paraphrasis = _wrapped_paraphrasis(paraphrasis_elem).replace('"', r'\"')
     else:
         paraphrasis = "/"
 
     # Write thesis and process entailments
     # write_thesis_and_process_included_elements is now in this module, so it can be called directly
-    written_lines, implicit, color_fill, color_peripheries, style, processed_propositions = write_thesis_and_process_included_elements(element, element_id, element_type, pad_short_string(element_speaker, 30), paraphrasis, namespaces, dot_file, written_lines, retrieved_text, retrieved_text_snippet, locus, processed_propositions, source_id)
+    written_lines, implicit, color_fill, color_peripheries, style, processed_propositions = write_thesis_and_process_included_elements(element, element_id, element_type, pad_short_string(element_speaker, 30), paraphrasis, namespaces, dot_file, written_lines, retrieved_text, retrieved_text_snippet, locus, processed_propositions, source_id, indexes)
         
     # Check for matching PROPOSITION elements
     written_lines, processed_propositions = process_matching_propositions(element, element_id, namespaces, all_propositions, dot_file, written_lines, stored_edges, written_prop_phases, processed_propositions)
         
     # Iterate through the THESIS's sequences
-    from config.runtime_settings import filter_propositions, filter_matching_proposition_sequences
-    written_lines = process_thesis_sequences(element, element_id, namespaces, dot_file, written_lines, all_propositions, written_prop_phases, implicit, color_fill, color_peripheries, style, filter_propositions, filter_matching_proposition_sequences)
+    written_lines = process_thesis_sequences(element, element_id, namespaces, dot_file, written_lines, all_propositions, written_prop_phases, implicit, color_fill, color_peripheries, style, _rt.filter_propositions, _rt.filter_matching_proposition_sequences, indexes)
 
     return written_lines, processed_propositions
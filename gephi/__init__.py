@@ -8,13 +8,17 @@ Individual functions are organized into:
 - edges: Edge processing and creation
 - content: DOT content processing
 - io: File I/O
-- file_cleanup: File cleanup functions (duplicate edges, attributes, invisible elements)
+- file_cleanup: File cleanup functions (edge attributes, invisible elements)
 - sources: Source handling
 - colors: Color utilities
 - postprocess: Post-processing
 """
+from io import StringIO
+from itertools import chain
+
 from .phases import process_phases_only
 from .nodes import (
+    find_gephi_pseudo_nodes,
     find_gephi_matching_proposition_nodes,
     find_gephi_employed_nodes,
     find_gephi_function_nodes,
@@ -24,6 +28,7 @@ from .nodes import (
     find_gephi_reference_nodes,
 )
 from .edges import (
+    process_gephi_edges_for_all_pseudonodes,
     process_gephi_edges_for_entailment_nodes,
     process_gephi_edges_for_etiology_nodes,
     process_gephi_edges_for_analogy_nodes,
@@ -39,7 +44,7 @@ from .edges import (
 )
 from .content import process_gephi_dot_content
 from .io import write_gephi_dot_file
-from .file_cleanup import remove_duplicate_gephi_edges, clean_edge_attributes
+from .file_cleanup import clean_edge_attributes
 from .sources import (
     find_gephi_source_subgraphs,
     create_gephi_source_nodes,
@@ -51,22 +56,25 @@ def create_gephi_dot(dot_filename, gephi_dot_filename):
     """Create a DOT file optimized for Gephi by removing invisible elements and simplifying the graph."""
     print(f"Creating Gephi-optimized DOT file: {gephi_dot_filename}")
     
-    # Phase 1: Process only phase nodes and their connections
-    temp_phase_processed_file = f"{dot_filename}.phase_processed.dot"
-    process_phases_only(dot_filename, temp_phase_processed_file)
+    # Phase 1: Process only phase nodes and their connections (kept in memory)
+    phase_buffer = StringIO()
+    process_phases_only(dot_filename, phase_buffer)
     
-    # Phase 2: Process all other elements using the phase-processed file as input
-    with open(temp_phase_processed_file, 'r', encoding='utf-8') as f:
-        dot_content = f.read()
+    # Phase 2: Process all other elements using the phase-processed content as input
+    dot_content = phase_buffer.getvalue()
+    phase_buffer.close()
     
-    # Find different types of pseudo-nodes
-    matching_nodes = find_gephi_matching_proposition_nodes(dot_content)
-    employed_nodes = find_gephi_employed_nodes(dot_content)
-    function_nodes = find_gephi_function_nodes(dot_content)
-    entailment_nodes = find_gephi_entailment_nodes(dot_content)
-    analogy_nodes = find_gephi_analogy_nodes(dot_content)
-    reference_nodes = find_gephi_reference_nodes(dot_content)
-    etiology_nodes = find_gephi_etiology_nodes(dot_content)
+    # Find different types of pseudo-nodes in one pass over the content
+    pseudo_nodes = find_gephi_pseudo_nodes(dot_content)
+    matching_nodes = pseudo_nodes['matching']
+    employed_nodes = pseudo_nodes['employed']
+    function_nodes = pseudo_nodes['function']
+    entailment_nodes = pseudo_nodes['entailment']
+    analogy_nodes = pseudo_nodes['analogy']
+    reference_nodes = pseudo_nodes['reference']
+    etiology_nodes = pseudo_nodes['etiology']
+    # The pseudo-node IDs are fixed from here on; only the per-node data is filled in later
+    pseudo_node_ids = frozenset().union(*pseudo_nodes.values())
 
     # Find source subgraphs and their associated nodes
     source_subgraphs = find_gephi_source_subgraphs(dot_content)
@@ -76,11 +84,9 @@ def create_gephi_dot(dot_filename, gephi_dot_filename):
     source_edges = create_gephi_source_edges(source_subgraphs, dot_content)
     
     # Process edges connected to pseudo-nodes
-    process_gephi_edges_for_pseudonodes(dot_content, matching_nodes, employed_nodes, function_nodes)
-    process_gephi_edges_for_entailment_nodes(dot_content, entailment_nodes)
-    process_gephi_edges_for_analogy_nodes(dot_content, analogy_nodes)
+    process_gephi_edges_for_all_pseudonodes(dot_content, matching_nodes, employed_nodes, function_nodes,
+                                            entailment_nodes, etiology_nodes, analogy_nodes)
     process_gephi_edges_for_reference_nodes(dot_content, reference_nodes)
-    process_gephi_edges_for_etiology_nodes(dot_content, etiology_nodes)
 
     # Create direct edges that replace pseudo-nodes
     direct_matching_edges = create_gephi_direct_matching_edges(matching_nodes)
@@ -91,37 +97,28 @@ def create_gephi_dot(dot_filename, gephi_dot_filename):
     direct_reference_edges = create_gephi_direct_reference_edges(reference_nodes)
     direct_etiology_edges = create_gephi_direct_etiology_edges(etiology_nodes)
 
-    # Combine all direct edges
-    direct_edges = (direct_matching_edges + direct_employed_edges + 
-                   direct_function_edges + direct_entailment_edges + 
-                   direct_analogy_edges + direct_reference_edges +
-                   direct_etiology_edges)
-    
-    # Add source connections to direct edges (only once)
-    direct_edges.extend(source_edges)
+    # Combine all direct edges, plus the source connections, deduplicated in first-seen order
+    direct_edges = dict.fromkeys(chain(direct_matching_edges, direct_employed_edges,
+                                       direct_function_edges, direct_entailment_edges,
+                                       direct_analogy_edges, direct_reference_edges,
+                                       direct_etiology_edges, source_edges))
 
     # Process the DOT content to simplify and optimize - phases are already processed
     # We pass empty phase_to_cluster and cluster_parents since phases are already handled
     processed_lines, _ = process_gephi_dot_content(
         dot_content,
         matching_nodes, employed_nodes, function_nodes, 
-        entailment_nodes, analogy_nodes, reference_nodes, etiology_nodes
+        entailment_nodes, analogy_nodes, reference_nodes, etiology_nodes,
+        pseudo_ids=pseudo_node_ids
     )
 
     # Add source nodes to processed lines BEFORE writing the file
     processed_lines.extend(source_nodes)
 
-    # Write the processed DOT content to the Gephi DOT file
+    # Write the processed DOT content to the Gephi DOT file, dropping duplicate edge definitions
     # No need to pass new_phase_edges since they're already in the dot_content
     write_gephi_dot_file(gephi_dot_filename, processed_lines, direct_edges)
     
-    # Clean up temporary file
-    import os
-    os.remove(temp_phase_processed_file)
-        
-    # Remove duplicate edge definitions before final cleanup
-    remove_duplicate_gephi_edges(gephi_dot_filename)
-    
     # Additional post-processing
     clean_edge_attributes(gephi_dot_filename)
     post_process_gephi_dot(gephi_dot_filename)
@@ -1,6 +1,8 @@
 """
 Color conversion utilities for Gephi.
 """
+from functools import lru_cache
+
 import webcolors
 
 from config.runtime_settings import color_mapping
@@ -8,7 +10,12 @@ from config.runtime_settings import color_mapping
 
 def hex_to_closest_color(match):
     """Converts a HEX color code to the closest HTML color name."""
-    hex_code = match.group(1)
+    return _hex_to_name(match.group(1).lower())
+
+
+@lru_cache(maxsize=4096)
+def _hex_to_name(hex_code):
+    """Map a lowercase '#rrggbb' code to its (custom-mapped) closest HTML color name."""
     try:
         # Convert hex to RGB
         r = int(hex_code[1:3], 16)
@@ -23,32 +30,82 @@ def hex_to_closest_color(match):
         return "black"  # Safe fallback
 
 
-def closest_web_color(rgb_color):
-    """Find the closest web color name to the given RGB values."""
+def _load_css3_palette():
+    """Return ((name, r, g, b), ...) for the CSS3 named colors, in webcolors' order."""
     try:
         # Try newer webcolors API first
         try:
-            color_names = webcolors.names("css3")
-            min_colors = {}
-            for name in color_names:
-                r_c, g_c, b_c = webcolors.name_to_rgb(name)
-                rd = (r_c - rgb_color[0]) ** 2
-                gd = (g_c - rgb_color[1]) ** 2
-                bd = (b_c - rgb_color[2]) ** 2
-                min_colors[(rd + gd + bd)] = name
-            return min_colors[min(min_colors.keys())]
+            return tuple((name, *webcolors.name_to_rgb(name)) for name in webcolors.names("css3"))
         except AttributeError:
-            # Fall back to older API
-            color_dict = webcolors.names("css3")
-            min_colors = {}
-            for hex_val, name in color_dict.items():
-                r_c, g_c, b_c = webcolors.hex_to_rgb(hex_val)
-                rd = (r_c - rgb_color[0]) ** 2
-                gd = (g_c - rgb_color[1]) ** 2
-                bd = (b_c - rgb_color[2]) ** 2
-                min_colors[(rd + gd + bd)] = name
-            return min_colors[min(min_colors.keys())]
+            # Fall back to older API, which exposes a hex -> name mapping
+            return tuple((name, *webcolors.hex_to_rgb(hex_val)) for hex_val, name in webcolors.CSS3_HEX_TO_NAMES.items())
+    except Exception as e:
+        print(f"Warning: Error loading web color palette: {e}")
+        return ()
+
+
+# Built once at import and split per channel for the distance computations
+_CSS3_PALETTE = _load_css3_palette()
+_CSS3_NAMES = tuple(entry[0] for entry in _CSS3_PALETTE)
+_CSS3_CHANNELS = tuple(tuple(entry[channel] for entry in _CSS3_PALETTE) for channel in (1, 2, 3))
+# (index, r, g, b) for every palette color, the record the distance loop unpacks
+_CSS3_ENTRIES = tuple((index, *entry[1:]) for index, entry in enumerate(_CSS3_PALETTE))
+# Exact palette colors need no search; later names overwrite earlier ones, matching the tie rule below
+_CSS3_BY_RGB = {(r, g, b): name for name, r, g, b in _CSS3_PALETTE}
+
+
+@lru_cache(maxsize=1 << 15)
+def _bucket_candidates(r_bucket, g_bucket, b_bucket):
+    """
+    Palette entries, as (index, r, g, b), that can be nearest to some color in a 5:5:5
+    RGB bucket (8x8x8 values).
+    
+    An entry is kept when its distance to the closest point of the bucket does not exceed
+    the smallest distance any entry has to the bucket's farthest point, so every color in
+    the bucket finds its nearest palette entries (ties included) among the candidates.
+    """
+    box = tuple((bucket << 3, (bucket << 3) + 7) for bucket in (r_bucket, g_bucket, b_bucket))
+    nearest = []
+    farthest = []
+    for index in range(len(_CSS3_NAMES)):
+        near = far = 0
+        for (low, high), channel in zip(box, _CSS3_CHANNELS):
+            c = channel[index]
+            if c < low:
+                near += (low - c) ** 2
+            elif c > high:
+                near += (c - high) ** 2
+            far += max((c - low) ** 2, (c - high) ** 2)
+        nearest.append(near)
+        farthest.append(far)
+    bound = min(farthest, default=0)
+    return tuple(_CSS3_ENTRIES[index] for index, near in enumerate(nearest) if near <= bound)
+
+
+def closest_web_color(rgb_color):
+    """Find the closest web color name to the given RGB values."""
+    try:
+        r, g, b = rgb_color
+        exact = _CSS3_BY_RGB.get((r, g, b))
+        if exact is not None:
+            return exact
+        # Only the bucket's candidates can be nearest; other values fall back to the whole palette
+        if isinstance(r, int) and isinstance(g, int) and isinstance(b, int):
+            candidates = _bucket_candidates(r >> 3, g >> 3, b >> 3)
+            # A lone candidate is the nearest color for the whole bucket
+            if len(candidates) == 1:
+                return _CSS3_NAMES[candidates[0][0]]
+        else:
+            candidates = _CSS3_ENTRIES
+        closest_index = None
+        min_distance = None
+        for index, palette_r, palette_g, palette_b in candidates:
+            distance = (palette_r - r) ** 2 + (palette_g - g) ** 2 + (palette_b - b) ** 2
+            # On ties the later name wins, as with the former distance-keyed dict
+            if min_distance is None or distance <= min_distance:
+                min_distance = distance
+                closest_index = index
+        return _CSS3_NAMES[closest_index]
     except Exception as e:
         print(f"Warning: Error finding closest web color: {e}")
         return "black"  # Safe fallback
-
@@ -4,75 +4,66 @@ DOT content processing for Gephi transformation.
 import re
 from .colors import hex_to_closest_color
 
+# Patterns used on every line of the DOT content, compiled once
+_RE_PROP_LABEL = re.compile(r'label=<.*?<i>(.*?)</i>.*?>')
+_RE_BR = re.compile(r'<br/>')
+_RE_TAGS = re.compile(r'<[^>]+>')
+_RE_LABEL_HAS = re.compile(r'\blabel=.*,')
+_RE_GEPHI_LABEL_HAS = re.compile(r'\bgephi_label=.*,')
+_RE_LABEL_STRIP = re.compile(r'\blabel=.*?(?:,\s*)?(?=\bgephi_label)')
+_RE_GEPHI_LABEL_WORD = re.compile(r'\bgephi_label=')
+_RE_XLABEL_PLAIN = re.compile(r'xlabel="([^"]+)"')
+_RE_GEPHI_LABEL = re.compile(r'gephi_label=')
+_RE_GEPHI_LABEL_ATTR = re.compile(r',\s*gephi_label=[^,\]]+')
+_RE_GEPHI_INVIS = re.compile(r'gephi_invis="true"')
+_RE_FILLCOLOR = re.compile(r'\bfillcolor="(#[0-9a-fA-F]{6})"')
+_RE_COLOR = re.compile(r'\bcolor="(#[0-9a-fA-F]{6})"')
+_RE_HEX = re.compile(r'(#[0-9a-fA-F]{6})')
+_RE_ANGLE_BRACKET = re.compile(r'[<>]')
+# Any of the bracket/comma spacing issues fixed by the final cleanup replacements
+_RE_SYNTAX_CLEANUP = re.compile(r'\[ | \]|,,|, ,')
+
 def process_gephi_dot_content(dot_content, 
                              matching_nodes, employed_nodes, function_nodes, 
-                             entailment_nodes, analogy_nodes, reference_nodes, etiology_nodes):
+                             entailment_nodes, analogy_nodes, reference_nodes, etiology_nodes,
+                             pseudo_ids=None):
     """
     Process the DOT content line by line, skipping pseudo-nodes.
     Phase nodes and edges are expected to be already processed.
     
+    pseudo_ids may pass the IDs of every pseudo-node kind when the caller already has them;
+    otherwise they are collected from the node dictionaries.
+    
     Returns:
         tuple: (processed_lines, empty_list)
     """
     processed_lines = []
+    
+    # IDs of every pseudo-node kind; their lines (node definitions and edges) are skipped
+    if pseudo_ids is None:
+        pseudo_ids = frozenset().union(matching_nodes, employed_nodes, function_nodes, entailment_nodes,
+                                       analogy_nodes, reference_nodes, etiology_nodes)
 
     for line in dot_content.split('\n'):
-        skip_line = False
-        
-        # Skip lines related to matching proposition pseudo-nodes
-        for pseudo_id in matching_nodes:
-            if f'"{pseudo_id}"' in line or f'-> "{pseudo_id}"' in line or f'"{pseudo_id}" ->' in line:
-                skip_line = True
-                break
-                
-        # Skip lines related to employed pseudo-nodes
-        for employed_id in employed_nodes:
-            if f'"{employed_id}"' in line or f'-> "{employed_id}"' in line or f'"{employed_id}" ->' in line:
-                skip_line = True
-                break
-                
-        # Skip lines related to function pseudo-nodes
-        for func_id in function_nodes:
-            if f'"{func_id}"' in line or f'-> "{func_id}"' in line or f'"{func_id}" ->' in line:
-                skip_line = True
-                break
-                
-        # Skip lines related to entailment pseudo-nodes
-        for entailment_id in entailment_nodes:
-            if f'"{entailment_id}"' in line or f'-> "{entailment_id}"' in line or f'"{entailment_id}" ->' in line:
-                skip_line = True
-                break
-                
-        # Skip lines related to analogy pseudo-nodes
-        for analogy_id in analogy_nodes:
-            if f'"{analogy_id}"' in line or f'-> "{analogy_id}"' in line or f'"{analogy_id}" ->' in line:
-                skip_line = True
-                break
-
-        # Skip lines related to reference pseudo-nodes
-        for reference_id in reference_nodes:
-            if f'"{reference_id}"' in line or f'-> "{reference_id}"' in line or f'"{reference_id}" ->' in line:
-                skip_line = True
-                break
-                
-        # Skip lines related to etiology pseudo-nodes
-        for etiology_id in etiology_nodes:
-            if f'"{etiology_id}"' in line or f'-> "{etiology_id}"' in line or f'"{etiology_id}" ->' in line:
-                skip_line = True
-                break
+        # Blank lines and bare braces need none of the processing below
+        if line.strip() in ('', '{', '}'):
+            processed_lines.append(line)
+            continue
         
-        if skip_line:
+        # Pseudo IDs contain no quotes, so '"<id>"' occurs in the line exactly when <id> is
+        # one of the segments enclosed between two consecutive quotes
+        if not pseudo_ids.isdisjoint(line.split('"')[1:-1]):
             continue
-                
+        
         # Process proposition nodes to extract paraphrasis before replacing the label
         if 'gephi_label="PROP"' in line and 'label=<' in line:
             # Extract paraphrasis from HTML label
-            label_match = re.search(r'label=<.*?<i>(.*?)</i>.*?>', line)
+            label_match = _RE_PROP_LABEL.search(line)
             if label_match:
                 paraphrasis_text = label_match.group(1)
                 # Clean HTML from paraphrasis
-                paraphrasis_text = re.sub(r'<br/>', ' ', paraphrasis_text)
-                paraphrasis_text = re.sub(r'<[^>]+>', '', paraphrasis_text)
+                paraphrasis_text = _RE_BR.sub(' ', paraphrasis_text)
+                paraphrasis_text = _RE_TAGS.sub('', paraphrasis_text)
                 # Escape quotes
                 paraphrasis_text = paraphrasis_text.replace('"', '\\"')
                 # Add paraphrasis attribute if not already present
@@ -80,9 +71,9 @@ def process_gephi_dot_content(dot_content,
                     line = line.replace(']', f', paraphrasis="{paraphrasis_text}"]')
         
         # Process remaining lines as before
-        if re.search(r'\blabel=.*,', line) and re.search(r'\bgephi_label=.*,', line):
-            line = re.sub(r'\blabel=.*?(?:,\s*)?(?=\bgephi_label)', '', line)
-            line = re.sub(r'\bgephi_label=', 'label=', line)
+        if 'gephi_label=' in line and _RE_LABEL_HAS.search(line) and _RE_GEPHI_LABEL_HAS.search(line):
+            line = _RE_LABEL_STRIP.sub('', line)
+            line = _RE_GEPHI_LABEL_WORD.sub('label=', line)
         
         # Handle xlabel attributes with HTML content
         if 'xlabel=<' in line:
@@ -95,15 +86,14 @@ def process_gephi_dot_content(dot_content,
                 content_end = -1
                 bracket_level = 1
                 
-                for i in range(content_start, len(line)):
-                    if line[i] == '<':
+                for bracket in _RE_ANGLE_BRACKET.finditer(line, content_start):
+                    if bracket.group() == '<':
                         bracket_level += 1
-                    elif line[i] == '>':
+                    else:
                         bracket_level -= 1
-                        
-                    if bracket_level == 0:
-                        content_end = i
-                        break
+                        if bracket_level == 0:
+                            content_end = bracket.start()
+                            break
                 
                 if content_end > content_start:
                     # Extract the full HTML content
@@ -111,8 +101,8 @@ def process_gephi_dot_content(dot_content,
                     
                     # Create plain text by removing HTML tags
                     plain_text = html_content
-                    plain_text = re.sub(r'<br/>', ', ', plain_text)  # Replace <br/> with comma+space
-                    plain_text = re.sub(r'<[^>]+>', '', plain_text)  # Remove other HTML tags
+                    plain_text = _RE_BR.sub(', ', plain_text)  # Replace <br/> with comma+space
+                    plain_text = _RE_TAGS.sub('', plain_text)  # Remove other HTML tags
                     plain_text = plain_text.strip()
                     
                     # Replace the entire xlabel attribute
@@ -128,7 +118,7 @@ def process_gephi_dot_content(dot_content,
         
         # Handle plain text xlabel attributes
         elif 'xlabel="' in line:
-            xlabel_match = re.search(r'xlabel="([^"]+)"', line)
+            xlabel_match = _RE_XLABEL_PLAIN.search(line)
             if xlabel_match:
                 label_text = xlabel_match.group(1)
                 # Replace the entire xlabel attribute
@@ -136,26 +126,29 @@ def process_gephi_dot_content(dot_content,
         
         # Handle gephi_label if present
         if 'gephi_label=' in line and 'label=' not in line:
-            line = re.sub(r'gephi_label=', 'label=', line)
+            line = _RE_GEPHI_LABEL.sub('label=', line)
         elif 'gephi_label=' in line and 'label=' in line:
-            line = re.sub(r',\s*gephi_label=[^,\]]+', '', line)
+            line = _RE_GEPHI_LABEL_ATTR.sub('', line)
 
         # Stage 3: Add "label="_" before "gephi_invis="true" 
-        if re.search(r'gephi_invis="true"', line):
-            line = re.sub(r'gephi_invis="true"', 'label="_", gephi_invis="true"', line)
+        if 'gephi_invis="true"' in line:
+            line = _RE_GEPHI_INVIS.sub('label="_", gephi_invis="true"', line)
 
         # Stage 4: Color attributes Gephi adaptation 
-        if re.search(r'\bfillcolor="(#[0-9a-fA-F]{6})"', line):
-            line = re.sub(r'\bcolor="(#[0-9a-fA-F]{6})"', r'label_color="\1"', line)
-            line = re.sub(r'\bfillcolor="(#[0-9a-fA-F]{6})"', r'color="\1"', line)
+        if 'fillcolor="#' in line and _RE_FILLCOLOR.search(line):
+            line = _RE_COLOR.sub(r'label_color="\1"', line)
+            line = _RE_FILLCOLOR.sub(r'color="\1"', line)
 
         # Stage 5: Convert remaining HEX codes to HTML color names
-        line = re.sub(r'(#[0-9a-fA-F]{6})', hex_to_closest_color, line)
+        if '#' in line:
+            line = _RE_HEX.sub(hex_to_closest_color, line)
         
-        # Clean up any syntax issues
-        line = line.replace('[ ', '[').replace(' ]', ']')
-        line = line.replace(',,', ',').replace(', ,', ',')
-        line = line.replace(', ]', ']')
+        # Clean up any syntax issues (one scan decides whether any replacement applies;
+        # ', ]' always contains ' ]', so it needs no separate check)
+        if _RE_SYNTAX_CLEANUP.search(line):
+            line = line.replace('[ ', '[').replace(' ]', ']')
+            line = line.replace(',,', ',').replace(', ,', ',')
+            line = line.replace(', ]', ']')
         
         processed_lines.append(line)
         
@@ -3,24 +3,76 @@ Edge processing and creation functions for Gephi transformation.
 """
 import re
 
-def process_gephi_edges_for_entailment_nodes(dot_content, entailment_nodes):
+# Any edge between two quoted IDs: (source, target)
+_RE_EDGE = re.compile(r'"([^"]+)" -> "([^"]+)"')
+# Complete edge statement: (source, target, attributes)
+_RE_EDGE_WITH_ATTRS = re.compile(r'"([^"]+)" -> "([^"]+)" \[([^\]]*)\];')
+_RE_BR = re.compile(r'<br/>')
+# Verb forms of the matching types, converted for the direct matching edge labels
+_MATCHING_VERB_FORMS = {
+    'extending': 'extends',
+    'being part of': 'is part of',
+    'generalizing': 'generalizes',
+    'specifying': 'specifies',
+    'being quoted': 'is quoted in',
+    'altering': 'alters',
+}
+_RE_MATCHING_VERB = re.compile('|'.join(re.escape(verb) for verb in _MATCHING_VERB_FORMS))
+
+def process_gephi_edges_for_all_pseudonodes(dot_content, matching_nodes=None, employed_nodes=None, function_nodes=None,
+                                             entailment_nodes=None, etiology_nodes=None, analogy_nodes=None):
     """
-    Find and process edges connected to entailment pseudo-nodes.
+    Find and process edges connected to matching, employed, function, entailment, etiology
+    and analogy pseudo-nodes in a single scan of the DOT content.
     Updates the input dictionaries with connection information.
     """
-    # Find edges connected to entailment pseudo-nodes
-    edge_pattern = re.compile(r'"([^"]+)" -> "([^"]+)"')
-    for match in edge_pattern.finditer(dot_content):
+    matching_nodes = matching_nodes if matching_nodes is not None else {}
+    employed_nodes = employed_nodes if employed_nodes is not None else {}
+    function_nodes = function_nodes if function_nodes is not None else {}
+    entailment_nodes = entailment_nodes if entailment_nodes is not None else {}
+    etiology_nodes = etiology_nodes if etiology_nodes is not None else {}
+    analogy_nodes = analogy_nodes if analogy_nodes is not None else {}
+    
+    # Edges touching no pseudo-node at all are skipped with a single set lookup per endpoint
+    pseudo_ids = frozenset().union(matching_nodes, employed_nodes, function_nodes, entailment_nodes,
+                                   etiology_nodes, analogy_nodes)
+    if not pseudo_ids:
+        return
+    
+    for match in _RE_EDGE.finditer(dot_content):
         source = match.group(1)
         target = match.group(2)
+        if source not in pseudo_ids and target not in pseudo_ids:
+            continue
         
-        # Check if target is an entailment pseudo-node
-        if target in entailment_nodes:
-            entailment_nodes[target]['source'] = source
+        # Matching, employed and function nodes share one chain: the first hit wins
+        if target in matching_nodes:
+            matching_nodes[target]['source'] = source
+        elif source in matching_nodes:
+            matching_nodes[source]['target'] = target
+        elif target in employed_nodes:
+            employed_nodes[target]['sources'].append(source)
+        elif source in employed_nodes:
+            employed_nodes[source]['target'] = target
+        elif target in function_nodes:
+            function_nodes[target]['source'] = source
+        elif source in function_nodes:
+            function_nodes[source]['targets'].append(target)
         
-        # Check if source is an entailment pseudo-node
-        elif source in entailment_nodes:
-            entailment_nodes[source]['target'] = target
+        # Entailment, etiology and analogy nodes are each checked independently
+        for nodes in (entailment_nodes, etiology_nodes, analogy_nodes):
+            if target in nodes:
+                nodes[target]['source'] = source
+            elif source in nodes:
+                nodes[source]['target'] = target
+
+
+def process_gephi_edges_for_entailment_nodes(dot_content, entailment_nodes):
+    """
+    Find and process edges connected to entailment pseudo-nodes.
+    Updates the input dictionaries with connection information.
+    """
+    process_gephi_edges_for_all_pseudonodes(dot_content, entailment_nodes=entailment_nodes)
 
 
 def process_gephi_edges_for_etiology_nodes(dot_content, etiology_nodes):
@@ -28,19 +80,7 @@ def process_gephi_edges_for_etiology_nodes(dot_content, etiology_nodes):
     Find and process edges connected to etiology pseudo-nodes.
     Updates the input dictionary with connection information.
     """
-    # Find edges connected to etiology pseudo-nodes
-    edge_pattern = re.compile(r'"([^"]+)" -> "([^"]+)"')
-    for match in edge_pattern.finditer(dot_content):
-        source = match.group(1)
-        target = match.group(2)
-        
-        # Check if target is an etiology pseudo-node
-        if target in etiology_nodes:
-            etiology_nodes[target]['source'] = source
-        
-        # Check if source is an etiology pseudo-node
-        elif source in etiology_nodes:
-            etiology_nodes[source]['target'] = target
+    process_gephi_edges_for_all_pseudonodes(dot_content, etiology_nodes=etiology_nodes)
 
 
 def process_gephi_edges_for_analogy_nodes(dot_content, analogy_nodes):
@@ -48,19 +88,7 @@ def process_gephi_edges_for_analogy_nodes(dot_content, analogy_nodes):
     Find and process edges connected to analogy pseudo-nodes.
     Updates the input dictionaries with connection information.
     """
-    # Find edges connected to analogy pseudo-nodes
-    edge_pattern = re.compile(r'"([^"]+)" -> "([^"]+)"')
-    for match in edge_pattern.finditer(dot_content):
-        source = match.group(1)
-        target = match.group(2)
-        
-        # Check if target is an analogy pseudo-node
-        if target in analogy_nodes:
-            analogy_nodes[target]['source'] = source
-        
-        # Check if source is an analogy pseudo-node
-        elif source in analogy_nodes:
-            analogy_nodes[source]['target'] = target
+    process_gephi_edges_for_all_pseudonodes(dot_content, analogy_nodes=analogy_nodes)
 
 
 def process_gephi_edges_for_reference_nodes(dot_content, reference_nodes):
@@ -68,21 +96,24 @@ def process_gephi_edges_for_reference_nodes(dot_content, reference_nodes):
     Process edges connected to reference pseudo-nodes to extract the actual 
     reference relationships. Also handles cases where node definitions are missing.
     """
-    # For each reference node, find its incoming and outgoing edges
+    # Scan the edges once, keeping the first incoming (source -> pseudo-node) and the first
+    # outgoing (pseudo-node -> target) edge of every reference node
+    incoming = {}
+    outgoing = {}
+    for match in _RE_EDGE_WITH_ATTRS.finditer(dot_content):
+        source, target = match.group(1), match.group(2)
+        if target in reference_nodes and target not in incoming:
+            incoming[target] = match
+        if source in reference_nodes and source not in outgoing:
+            outgoing[source] = match
+    
     for node_id in reference_nodes:
-        # Pattern for incoming edge (source -> pseudo-node)
-        in_pattern = r'"([^"]+)" -> "' + re.escape(node_id) + r'" \[([^\]]*)\];'
-        
-        # Pattern for outgoing edge (pseudo-node -> target)
-        out_pattern = r'"' + re.escape(node_id) + r'" -> "([^"]+)" \[([^\]]*)\];'
-        
-        # Find the source and target nodes
-        in_match = re.search(in_pattern, dot_content)
-        out_match = re.search(out_pattern, dot_content)
+        in_match = incoming.get(node_id)
+        out_match = outgoing.get(node_id)
         
         if in_match and out_match:
             source_node = in_match.group(1)
-            target_node = out_match.group(1)
+            target_node = out_match.group(2)
             
             # Store source and target in the node info
             if reference_nodes[node_id] is None:
@@ -109,35 +140,7 @@ def process_gephi_edges_for_pseudonodes(dot_content, matching_nodes, employed_no
     Find and process edges connected to all types of pseudo-nodes.
     Updates the input dictionaries with connection information.
     """
-    # Find edges connected to pseudo-nodes (matching, employed, and function nodes)
-    edge_pattern = re.compile(r'"([^"]+)" -> "([^"]+)"')
-    for match in edge_pattern.finditer(dot_content):
-        source = match.group(1)
-        target = match.group(2)
-        
-        # Check if target is a matching pseudo-node
-        if target in matching_nodes:
-            matching_nodes[target]['source'] = source
-        
-        # Check if source is a matching pseudo-node
-        elif source in matching_nodes:
-            matching_nodes[source]['target'] = target
-            
-        # Check if target is an employed pseudo-node
-        elif target in employed_nodes:
-            employed_nodes[target]['sources'].append(source)
-        
-        # Check if source is an employed pseudo-node
-        elif source in employed_nodes:
-            employed_nodes[source]['target'] = target
-        
-        # Check if target is a function pseudo-node
-        elif target in function_nodes:
-            function_nodes[target]['source'] = source
-        
-        # Check if source is a function pseudo-node
-        elif source in function_nodes:
-            function_nodes[source]['targets'].append(target)
+    process_gephi_edges_for_all_pseudonodes(dot_content, matching_nodes, employed_nodes, function_nodes)
 
 
 def create_gephi_direct_entailment_edges(entailment_nodes):
@@ -177,13 +180,9 @@ def create_gephi_direct_etiology_edges(etiology_nodes):
             # Get the relation type for the attribute
             relation_type = data['relation_type']
             
-            # Use a consistent label for all etiology edges
-            label = "IN ETIOLOGY"
-            
-            # Use HTML color name instead of hex code
-            etiology_color = "darkcyan"
-            
-            direct_edges.append(f'"{data["source"]}" -> "{data["target"]}" [label="{label}", relation_type="{relation_type}", color="{etiology_color}", fontcolor="{etiology_color}", penwidth=1.5];\n\n')
+            # Use a consistent label ("IN ETIOLOGY") for all etiology edges, and the
+            # HTML color name "darkcyan" instead of a hex code; both are part of the literal
+            direct_edges.append(f'"{data["source"]}" -> "{data["target"]}" [label="IN ETIOLOGY", relation_type="{relation_type}", color="darkcyan", fontcolor="darkcyan", penwidth=1.5];\n\n')
             
     return direct_edges
 
@@ -226,15 +225,10 @@ def create_gephi_direct_matching_edges(matching_nodes):
             # Clean up the matching type text - remove HTML tags and convert verb forms
             matching_type = data['type']
             # Remove HTML tags
-            matching_type = re.sub(r'<br/>', ' ', matching_type)
+            matching_type = _RE_BR.sub(' ', matching_type)
             
-            # Convert verb forms
-            matching_type = matching_type.replace('extending', 'extends')
-            matching_type = matching_type.replace('being part of', 'is part of')
-            matching_type = matching_type.replace('generalizing', 'generalizes')
-            matching_type = matching_type.replace('specifying', 'specifies')
-            matching_type = matching_type.replace('being quoted', 'is quoted in')
-            matching_type = matching_type.replace('altering', 'alters')
+            # Convert verb forms in one scan
+            matching_type = _RE_MATCHING_VERB.sub(lambda m: _MATCHING_VERB_FORMS[m.group(0)], matching_type)
             
             # Use "indigo" for dark purple color
             direct_edges.append(f'"{data["source"]}" -> "{data["target"]}" [label="{matching_type}", color="indigo", fontcolor="indigo", penwidth=1.5];\n\n')
@@ -277,10 +271,8 @@ def create_gephi_direct_reference_edges(reference_nodes):
     
     for pseudo_id, data in reference_nodes.items():
         if data['source'] and data['target']:
-            # Create direct edge with standard styling
-            reference_color = "olivedrab"
-            
-            direct_edges.append(f'"{data["source"]}" -> "{data["target"]}" [label="REFERENCED IN", color="{reference_color}", fontcolor="{reference_color}", penwidth=1.5];\n\n')
+            # Create direct edge with standard styling ("olivedrab")
+            direct_edges.append(f'"{data["source"]}" -> "{data["target"]}" [label="REFERENCED IN", color="olivedrab", fontcolor="olivedrab", penwidth=1.5];\n\n')
             
     return direct_edges
 
@@ -1,44 +1,19 @@
 """
 Cleanup functions for Gephi DOT files.
 """
+import os
 import re
 
-def remove_duplicate_gephi_edges(filename):
-    """
-    Reads a DOT file and removes duplicate edge definitions.
-    Keeps the first occurrence of any edge between a specific source and target.
-    """
-    with open(filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    seen_edges = set() # Stores tuples of (source_id, target_id)
-    output_lines = []
-
-    edge_pattern = re.compile(r'^\s*"([^"\\]*(?:\\.[^"\\]*)*)"\s*->\s*"([^"\\]*(?:\\.[^"\\]*)*)".*')
-
-    duplicates_removed = 0
-    for line in lines:
-        match = edge_pattern.match(line)
-        if match:
-            source_id = match.group(1)
-            target_id = match.group(2)
-            edge_tuple = (source_id, target_id)
-
-            if edge_tuple in seen_edges:
-                duplicates_removed += 1
-                continue # Skip this duplicate edge line
-            else:
-                seen_edges.add(edge_tuple)
-                output_lines.append(line) # Keep the first occurrence
-        else:
-            output_lines.append(line) # Keep non-edge lines
-
-    if duplicates_removed > 0:
-        print(f"  Removed {duplicates_removed} duplicate edge definition(s).")
-        # Write the cleaned content back to the file
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.writelines(output_lines)
-
+# Edge attributes dropped for Gephi and the separator fix-ups after removing them
+_RE_ORIGINAL_HTML = re.compile(r',\s*original_html="[^"]*"')
+_RE_FONTSIZE_AFTER = re.compile(r',\s*fontsize=\d+')
+_RE_FONTSIZE_BEFORE = re.compile(r'fontsize=\d+,\s*')
+_RE_FONTNAME_AFTER = re.compile(r',\s*fontname="[^"]*"')
+_RE_FONTNAME_BEFORE = re.compile(r'fontname="[^"]*",\s*')
+_RE_DOUBLE_COMMA = re.compile(r',,')
+_RE_TRAILING_COMMA = re.compile(r',\s*\]')
+_RE_LEADING_COMMA = re.compile(r'\[\s*,')
+_RE_QUOTED = re.compile(r'"([^"]+)"')
 
 def clean_edge_attributes(gephi_dot_filename):
     """
@@ -49,36 +24,48 @@ def clean_edge_attributes(gephi_dot_filename):
     
     These modifications are applied before the general post-processing function.
     """
-    with open(gephi_dot_filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    cleaned_lines = []
-    
-    for line in lines:
-        # Check if this line represents an edge (contains " -> ")
-        if " -> " in line and "[" in line and "]" in line:
-            # Remove original_html attribute
-            line = re.sub(r',\s*original_html="[^"]*"', '', line)
-            
-            # Remove fontsize attribute
-            line = re.sub(r',\s*fontsize=\d+', '', line)
-            line = re.sub(r'fontsize=\d+,\s*', '', line)
-            
-            # Remove fontname attribute
-            line = re.sub(r',\s*fontname="[^"]*"', '', line)
-            line = re.sub(r'fontname="[^"]*",\s*', '', line)
-            
-            # Fix any double commas or trailing commas before closing bracket
-            line = re.sub(r',,', ',', line)
-            line = re.sub(r',\s*\]', ']', line)
+    # Stream line by line into a temporary file that then replaces the original
+    temp_filename = f"{gephi_dot_filename}.tmp"
+    try:
+        with open(gephi_dot_filename, 'r', encoding='utf-8') as src, \
+             open(temp_filename, 'w', encoding='utf-8') as dst:
+            for line in src:
+                # Check if this line represents an edge (contains " -> ")
+                if " -> " in line and "[" in line and "]" in line:
+                    # Each substitution only runs when its attribute (or separator) is present;
+                    # the order matters, as removing one attribute can decide how the next is matched
+                    # Remove original_html attribute
+                    if 'original_html' in line:
+                        line = _RE_ORIGINAL_HTML.sub('', line)
+                
+                    # Remove fontsize attribute
+                    if 'fontsize=' in line:
+                        line = _RE_FONTSIZE_AFTER.sub('', line)
+                        line = _RE_FONTSIZE_BEFORE.sub('', line)
+                
+                    # Remove fontname attribute
+                    if 'fontname=' in line:
+                        line = _RE_FONTNAME_AFTER.sub('', line)
+                        line = _RE_FONTNAME_BEFORE.sub('', line)
+                
+                    # Fix any double commas or trailing commas before closing bracket
+                    if ',' in line:
+                        line = _RE_DOUBLE_COMMA.sub(',', line)
+                        line = _RE_TRAILING_COMMA.sub(']', line)
+                    
+                        # Fix case where first attribute was removed, leaving a leading comma
+                        line = _RE_LEADING_COMMA.sub('[', line)
             
-            # Fix case where first attribute was removed, leaving a leading comma
-            line = re.sub(r'\[\s*,', '[', line)
-        
-        cleaned_lines.append(line)
+                dst.write(line)
     
-    with open(gephi_dot_filename, 'w', encoding='utf-8') as f:
-        f.writelines(cleaned_lines)
+        os.replace(temp_filename, gephi_dot_filename)
+    except BaseException:
+        # Leave no partial .tmp file behind in the output directory
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+        raise
 
 
 def remove_invisible_elements(dot_content):
@@ -86,16 +73,15 @@ def remove_invisible_elements(dot_content):
     lines = dot_content.split('\n')
     filtered_lines = []
     
-    # Keep track of invisible nodes to also remove their edges
-    invisible_nodes = []
-    
-    # First pass: identify invisible nodes
-    for line in lines:
-        if 'gephi_invis="true"' in line:
-            # Extract node ID if this is a node definition
-            node_match = re.search(r'"([^"]+)"', line)
-            if node_match and '[' in line:
-                invisible_nodes.append(node_match.group(1))
+    # First pass: identify invisible nodes (the first quoted ID of each invisible definition),
+    # to also remove their edges
+    invisible_nodes = {
+        node_match.group(1)
+        for line in lines
+        if 'gephi_invis="true"' in line and '[' in line
+        for node_match in (_RE_QUOTED.search(line),)
+        if node_match
+    }
     
     # Second pass: filter out lines with invisible elements and their edges
     skip_next = False
@@ -115,17 +101,16 @@ def remove_invisible_elements(dot_content):
                 skip_next = True
                 continue
         
-        # Skip edges connected to invisible nodes
-        skip_line = False
-        for node in invisible_nodes:
-            edge_pattern = f'"{node}" -> '
-            reverse_edge_pattern = f' -> "{node}"'
-            if edge_pattern in line or reverse_edge_pattern in line:
-                skip_line = True
-                break
+        # Skip edges connected to invisible nodes: node IDs contain no quotes, so
+        # '"<node>" -> ' / ' -> "<node>"' occur exactly when a segment between two
+        # consecutive quotes is an invisible node followed / preceded by ' -> '
+        if invisible_nodes and ' -> ' in line:
+            parts = line.split('"')
+            if any(parts[i] in invisible_nodes and (parts[i + 1].startswith(' -> ') or parts[i - 1].endswith(' -> '))
+                   for i in range(1, len(parts) - 1)):
+                continue
         
-        if not skip_line:
-            filtered_lines.append(line)
+        filtered_lines.append(line)
     
     return '\n'.join(filtered_lines)
 
@@ -1,14 +1,25 @@
 """
 File I/O functions for Gephi DOT files.
 """
+import re
+from itertools import chain, islice
+
+# Edge line with (possibly escaped) quoted source and target IDs
+_RE_EDGE_LINE = re.compile(r'^\s*"([^"\\]*(?:\\.[^"\\]*)*)"\s*->\s*"([^"\\]*(?:\\.[^"\\]*)*)".*')
+
 def write_gephi_dot_file(gephi_dot_filename, processed_lines, direct_edges):
     """
     Write the final Gephi DOT file with all modifications.
     Ensures all new edges are inserted at the end of the graph before the final closing brace.
     Normalizes line breaks for consistent formatting.
+    Duplicate edge definitions are dropped while writing, keeping the first occurrence
+    of any edge between a specific source and target.
     """
-    # Add the direct replacement edges for pseudo-nodes
-    unique_direct_edges = list(set(direct_edges))
+    # Add the direct replacement edges for pseudo-nodes; a dict is already deduplicated,
+    # a list is deduplicated keeping the first occurrence so the output order is stable
+    if not isinstance(direct_edges, dict):
+        direct_edges = dict.fromkeys(direct_edges)
+    unique_direct_edges = list(direct_edges)
     
     # Find the LAST closing brace in the file by searching in reverse
     closing_brace_index = -1
@@ -27,19 +38,33 @@ def write_gephi_dot_file(gephi_dot_filename, processed_lines, direct_edges):
         processed_lines.insert(closing_brace_index, '')
         closing_brace_index += 1  # Adjust index after insertion
     
-    if unique_direct_edges:
-        # Insert direct edges before the final closing brace
-        processed_lines = (processed_lines[:closing_brace_index] + 
-                          unique_direct_edges + 
-                          processed_lines[closing_brace_index:])
+    # Insert direct edges before the final closing brace, streaming rather than copying the lines;
+    # the closing brace then follows the direct edges
+    all_lines = chain(islice(processed_lines, closing_brace_index),
+                      unique_direct_edges,
+                      islice(processed_lines, closing_brace_index, None))
+    closing_brace_index += len(unique_direct_edges)
     
-    # Normalize line breaks
-    normalized_lines = normalize_line_breaks(processed_lines)
+    # Normalize line breaks as the lines are written
+    normalized_lines = _iter_normalized_lines(map(str.rstrip, all_lines), closing_brace_index)
     
-    # Write the modified content to the Gephi DOT file
+    # Write the modified content to the Gephi DOT file, skipping duplicate edges
+    seen_edges = set() # Stores tuples of (source_id, target_id)
+    duplicates_removed = 0
     with open(gephi_dot_filename, 'w', encoding='utf-8') as gephi_file:
         for line in normalized_lines:
+            if '->' in line:
+                match = _RE_EDGE_LINE.match(line)
+                if match:
+                    edge_tuple = match.group(1, 2)
+                    if edge_tuple in seen_edges:
+                        duplicates_removed += 1
+                        continue
+                    seen_edges.add(edge_tuple)
             gephi_file.write(line + '\n')
+    
+    if duplicates_removed > 0:
+        print(f"  Removed {duplicates_removed} duplicate edge definition(s).")
 
 
 def normalize_line_breaks(lines):
@@ -61,31 +86,31 @@ def normalize_line_breaks(lines):
     if closing_brace_index == -1:
         closing_brace_index = len(lines)
     
-    # Process lines up to the closing brace
-    normalized = []
-    i = 0
-    while i < closing_brace_index:
-        current_line = lines[i]
-        normalized.append(current_line)
+    return list(_iter_normalized_lines(lines, closing_brace_index))
+
+
+def _iter_normalized_lines(lines, closing_brace_index):
+    """
+    Yield the normalized lines for normalize_line_breaks, given right-stripped lines
+    and the index of the last closing brace (len(lines) if there is none).
+    """
+    skipping_empty = False
+    for i, line in enumerate(lines):
+        if i == closing_brace_index:
+            # Add the closing brace; anything after it is dropped
+            yield line
+            return
         
-        # If this is a non-empty line, ensure exactly one empty line follows
-        if current_line.strip():
-            # Add exactly one empty line (unless we're just before the closing brace)
-            if i + 1 < closing_brace_index:
-                normalized.append('')
-                
-                # Skip any existing empty lines
-                i += 1
-                while i < closing_brace_index and not lines[i].strip():
-                    i += 1
-                continue
+        # Skip empty lines after the one already added behind a non-empty line
+        if skipping_empty and not line:
+            continue
+        skipping_empty = False
+        yield line
         
-        i += 1
-    
-    # Add the closing brace (if it exists)
-    if closing_brace_index < len(lines):
-        normalized.append(lines[closing_brace_index])
-    
-    return normalized
+        # If this is a non-empty line, ensure exactly one empty line follows
+        # (unless we're just before the closing brace)
+        if line and i + 1 < closing_brace_index:
+            yield ''
+            skipping_empty = True
 
 
@@ -1,135 +1,178 @@
 """
 Node finding functions for Gephi transformation.
+
+find_gephi_pseudo_nodes finds every pseudo-node kind in one scan and is what the
+pipeline uses. The per-kind find_gephi_*_nodes functions (except the reference finder)
+are kept for compatibility only: each runs that full scan and keeps a single kind.
 """
 import re
 
+# One alternation covering every pseudo-node kind, so the DOT content is scanned
+# once instead of once per kind. Each branch mirrors the per-kind pattern it replaces.
+_PSEUDO_NODE_RE = re.compile(
+    r'"(?P<match_id>[^"]+_to_[^"]+_\d+)" \[label=<(?:MATCHES<br/><i>(?P<match_type>.*?)</i>|MATCHES)>'
+    r'|"(?P<ent_id>[^"]+_to_[^"]+_\d+)" \[label=<by (?P<ent_as>[^,]+),<br/>ENTAILS>'
+    r'|"(?P<empl_id>[^"]+_employed)" \[label="EMPLOYED IN"'
+    r'|"(?P<func_id>[^"]+_func)" \[label="(?P<func_label>[^"]+)", gephi_label="[^"]+", gephi_omitted="false"'
+    r'|"(?P<eti_id>[^"]+_in_etiology_in_[^"]+_\d+)" \[label=<(?P<eti_label>ITS EFFECT|ITS MEANS|ITS CAUSE|ITS PURPOSE|ITS CAUSE & PURPOSE|CORRELATED)<br/>in etiology>'
+    r'|"(?P<ana_id>[^"]+_analogy_to_[^"]+_\d+)" \[label=<(?P<ana_comparans><i>as source</i>,<br/>)?COMPARED IN>'
+    r'|"(?P<ref_src>[^"]+_referenced-in_[^"]+)" -> |-> "(?P<ref_tgt>[^"]+_referenced-in_[^"]+)"'
+)
+
+# Etiology labels in the order the relation types were historically collected
+_ETIOLOGY_RELATION_TYPES = {
+    'ITS EFFECT': 'EFFECT',
+    'ITS MEANS': 'MEANS',
+    'ITS CAUSE': 'CAUSE',
+    'ITS PURPOSE': 'PURPOSE',
+    'ITS CAUSE & PURPOSE': 'CAUSE_PURPOSE',
+    'CORRELATED': 'CORRELATED',
+}
+
+
+def find_gephi_pseudo_nodes(dot_content):
+    """
+    Find all pseudo-nodes in the DOT content in a single pass.
+    
+    Returns:
+        dict: {'matching', 'employed', 'function', 'entailment', 'etiology', 'analogy', 'reference'}
+              each mapping to the dict the matching find_gephi_*_nodes function returns
+    """
+    matching_nodes = {}
+    employed_nodes = {}
+    function_nodes = {}
+    entailment_nodes = {}
+    reference_nodes = {}
+    etiology_hits = {relation_type: [] for relation_type in _ETIOLOGY_RELATION_TYPES.values()}
+    comparans_ids = []
+    analogy_ids = []
+    
+    for match in _PSEUDO_NODE_RE.finditer(dot_content):
+        kind = match.lastgroup
+        if kind == 'match_id' or kind == 'match_type':
+            matching_type = match.group('match_type')
+            matching_nodes[match.group('match_id')] = {'type': matching_type if matching_type else "matches", 'source': None, 'target': None}
+        elif kind == 'ent_as':
+            entailment_nodes[match.group('ent_id')] = {'source': None, 'target': None, 'entailed_as': match.group('ent_as')}
+        elif kind == 'empl_id':
+            employed_nodes[match.group('empl_id')] = {'sources': [], 'target': None}
+        elif kind == 'func_label':
+            function_nodes[match.group('func_id')] = {'source': None, 'targets': [], 'function': match.group('func_label')}
+        elif kind == 'eti_label':
+            etiology_hits[_ETIOLOGY_RELATION_TYPES[match.group('eti_label')]].append(match.group('eti_id'))
+        elif kind == 'ana_id' or kind == 'ana_comparans':
+            if match.group('ana_comparans'):
+                comparans_ids.append(match.group('ana_id'))
+            else:
+                analogy_ids.append(match.group('ana_id'))
+        else:
+            node_id = match.group('ref_src') or match.group('ref_tgt')
+            if node_id not in reference_nodes:
+                reference_nodes[node_id] = None
+    
+    # Etiology and analogy nodes keep the grouped order of the per-kind scans
+    etiology_nodes = {}
+    for relation_type, pseudo_ids in etiology_hits.items():
+        for pseudo_id in pseudo_ids:
+            etiology_nodes[pseudo_id] = {'source': None, 'target': None, 'relation_type': relation_type}
+    
+    analogy_nodes = {}
+    for pseudo_id in comparans_ids:
+        analogy_nodes[pseudo_id] = {'source': None, 'target': None, 'is_comparans': True}
+    for pseudo_id in analogy_ids:
+        analogy_nodes[pseudo_id] = {'source': None, 'target': None, 'is_comparans': False}
+    
+    # Then find proper reference node definitions if they exist
+    _attach_reference_node_definitions(dot_content, reference_nodes)
+    
+    return {
+        'matching': matching_nodes,
+        'employed': employed_nodes,
+        'function': function_nodes,
+        'entailment': entailment_nodes,
+        'etiology': etiology_nodes,
+        'analogy': analogy_nodes,
+        'reference': reference_nodes,
+    }
+
+
+def _attach_reference_node_definitions(dot_content, reference_nodes):
+    """Replace each reference node's None value with its node definition, when present."""
+    for node_id in list(reference_nodes.keys()):
+        node_pattern = r'"' + re.escape(node_id) + r'" \[(.*?)label=<IS REFERENCED IN(.*?)\];'
+        node_match = re.search(node_pattern, dot_content, re.DOTALL)
+        if node_match:
+            reference_nodes[node_id] = node_match.group(0)
+
+
+# Compatibility wrappers, matching through analogy: each call runs the full combined scan, so
+# callers that need several kinds should call find_gephi_pseudo_nodes once instead. Nothing in
+# this package uses them.
+
 def find_gephi_matching_proposition_nodes(dot_content):
     """
     Find all matching proposition pseudo-nodes in the DOT content.
+    Compatibility wrapper around find_gephi_pseudo_nodes.
     
     Returns:
         dict: {pseudo_node_id: {'source': prop_id, 'target': element_id, 'type': matching_type_str}}
     """
-    matching_nodes = {}
-    
-    # Find all matching proposition pseudo-nodes
-    matching_node_pattern = re.compile(r'"([^"]+_to_[^"]+_\d+)" \[label=<(?:MATCHES<br/><i>(.*?)</i>|MATCHES)>')
-    for match in matching_node_pattern.finditer(dot_content):
-        pseudo_id = match.group(1)
-        matching_type = match.group(2) if match.group(2) else "matches"
-        matching_nodes[pseudo_id] = {'type': matching_type, 'source': None, 'target': None}
-        
-    return matching_nodes
+    return find_gephi_pseudo_nodes(dot_content)['matching']
 
 
 def find_gephi_employed_nodes(dot_content):
     """
     Find all "EMPLOYED IN" pseudo-nodes in the DOT content.
+    Compatibility wrapper around find_gephi_pseudo_nodes.
     
     Returns:
         dict: {employed_node_id: {'sources': [elements], 'target': support_id}}
     """
-    employed_nodes = {}
-    
-    # Find all "EMPLOYED IN" pseudo-nodes
-    employed_node_pattern = re.compile(r'"([^"]+_employed)" \[label="EMPLOYED IN"')
-    for match in employed_node_pattern.finditer(dot_content):
-        employed_id = match.group(1)
-        employed_nodes[employed_id] = {'sources': [], 'target': None}
-        
-    return employed_nodes
+    return find_gephi_pseudo_nodes(dot_content)['employed']
 
 
 def find_gephi_function_nodes(dot_content):
     """
     Find all function nodes (used for target mediation) in the DOT content.
+    Compatibility wrapper around find_gephi_pseudo_nodes.
     
     Returns:
         dict: {func_node_id: {'source': support_id, 'targets': [target_ids], 'function': function_label}}
     """
-    function_nodes = {}
-    
-    # Find all function nodes (used for target mediation)
-    function_node_pattern = re.compile(r'"([^"]+_func)" \[label="([^"]+)", gephi_label="[^"]+", gephi_omitted="false"')
-    for match in function_node_pattern.finditer(dot_content):
-        func_id = match.group(1)
-        function_label = match.group(2)
-        function_nodes[func_id] = {'source': None, 'targets': [], 'function': function_label}
-        
-    return function_nodes
+    return find_gephi_pseudo_nodes(dot_content)['function']
 
 
 def find_gephi_entailment_nodes(dot_content):
     """
     Find all entailment pseudo-nodes in the DOT content.
+    Compatibility wrapper around find_gephi_pseudo_nodes.
     
     Returns:
         dict: {pseudo_node_id: {'source': entailing_id, 'target': entailed_id, 'entailed_as': entailed_as}}
     """
-    entailment_nodes = {}
-    
-    # Find all entailment pseudo-nodes - they have labels containing "ENTAILS"
-    entailment_pattern = re.compile(r'"([^"]+_to_[^"]+_\d+)" \[label=<by ([^,]+),<br/>ENTAILS>')
-    for match in entailment_pattern.finditer(dot_content):
-        pseudo_id = match.group(1)
-        entailed_as = match.group(2)
-        entailment_nodes[pseudo_id] = {'source': None, 'target': None, 'entailed_as': entailed_as}
-        
-    return entailment_nodes
+    return find_gephi_pseudo_nodes(dot_content)['entailment']
 
 
 def find_gephi_etiology_nodes(dot_content):
     """
     Find all etiology pseudo-nodes in the DOT content.
+    Compatibility wrapper around find_gephi_pseudo_nodes.
     
     Returns:
         dict: {pseudo_node_id: {'source': source_id, 'target': target_id, 'relation_type': str}}
     """
-    etiology_nodes = {}
-    
-    # Find all etiology pseudo-nodes - they have labels containing etiology relationship types
-    patterns = [
-        (r'"([^"]+_in_etiology_in_[^"]+_\d+)" \[label=<ITS EFFECT<br/>in etiology>', 'EFFECT'),
-        (r'"([^"]+_in_etiology_in_[^"]+_\d+)" \[label=<ITS MEANS<br/>in etiology>', 'MEANS'),
-        (r'"([^"]+_in_etiology_in_[^"]+_\d+)" \[label=<ITS CAUSE<br/>in etiology>', 'CAUSE'),
-        (r'"([^"]+_in_etiology_in_[^"]+_\d+)" \[label=<ITS PURPOSE<br/>in etiology>', 'PURPOSE'),
-        (r'"([^"]+_in_etiology_in_[^"]+_\d+)" \[label=<ITS CAUSE & PURPOSE<br/>in etiology>', 'CAUSE_PURPOSE'),
-        (r'"([^"]+_in_etiology_in_[^"]+_\d+)" \[label=<CORRELATED<br/>in etiology>', 'CORRELATED')
-    ]
-    
-    # Find all etiology nodes
-    for pattern, relation_type in patterns:
-        for match in re.finditer(pattern, dot_content):
-            pseudo_id = match.group(1)
-            etiology_nodes[pseudo_id] = {'source': None, 'target': None, 'relation_type': relation_type}
-    
-    return etiology_nodes
+    return find_gephi_pseudo_nodes(dot_content)['etiology']
 
 
 def find_gephi_analogy_nodes(dot_content):
     """
     Find all analogy pseudo-nodes in the DOT content.
+    Compatibility wrapper around find_gephi_pseudo_nodes.
     
     Returns:
         dict: {pseudo_node_id: {'source': source_id, 'target': target_id, 'is_comparans': bool}}
     """
-    analogy_nodes = {}
-    
-    # Find all analogy pseudo-nodes - they have labels containing "compared"
-    comparans_pattern = re.compile(r'"([^"]+_analogy_to_[^"]+_\d+)" \[label=<<i>as source</i>,<br/>COMPARED IN>')
-    normal_pattern = re.compile(r'"([^"]+_analogy_to_[^"]+_\d+)" \[label=<COMPARED IN>')
-    
-    # Find comparans nodes
-    for match in comparans_pattern.finditer(dot_content):
-        pseudo_id = match.group(1)
-        analogy_nodes[pseudo_id] = {'source': None, 'target': None, 'is_comparans': True}
-    
-    # Find regular analogy nodes
-    for match in normal_pattern.finditer(dot_content):
-        pseudo_id = match.group(1)
-        analogy_nodes[pseudo_id] = {'source': None, 'target': None, 'is_comparans': False}
-        
-    return analogy_nodes
+    return find_gephi_pseudo_nodes(dot_content)['analogy']
 
 
 def find_gephi_reference_nodes(dot_content):
@@ -147,11 +190,7 @@ def find_gephi_reference_nodes(dot_content):
             reference_nodes[node_id] = None
     
     # Then find proper node definitions if they exist
-    for node_id in list(reference_nodes.keys()):
-        node_pattern = r'"' + re.escape(node_id) + r'" \[(.*?)label=<IS REFERENCED IN(.*?)\];'
-        node_match = re.search(node_pattern, dot_content, re.DOTALL)
-        if node_match:
-            reference_nodes[node_id] = node_match.group(0)
+    _attach_reference_node_definitions(dot_content, reference_nodes)
     
     return reference_nodes
 
@@ -6,6 +6,8 @@ import re
 def process_phases_only(input_dot, output_dot):
     """
     Process only phase nodes and their connections.
+
+    output_dot may be a file path or an open text stream (e.g. io.StringIO).
     """    
     with open(input_dot, 'r', encoding='utf-8') as f:
         dot_content = f.read()
@@ -73,11 +75,13 @@ def process_phases_only(input_dot, output_dot):
                           unique_phase_edges + 
                           processed_lines[closing_brace_index:])
     
-    # Write the phase-processed content to output file
-    with open(output_dot, 'w', encoding='utf-8') as f:
-        for line in processed_lines:
-            line = line.rstrip()
-            f.write(line + '\n')
+    # Write the phase-processed content to the output file or stream
+    phase_processed = ''.join([line.rstrip() + '\n' for line in processed_lines])
+    if hasattr(output_dot, 'write'):
+        output_dot.write(phase_processed)
+    else:
+        with open(output_dot, 'w', encoding='utf-8') as f:
+            f.write(phase_processed)
     
     return phase_to_cluster, cluster_parents
 
@@ -1,12 +1,20 @@
 """Text utility functions.
 
-Key function: pad_short_string
+Key functions: pad_short_string, parse_rank
 """
+from functools import lru_cache
 
 
+@lru_cache(maxsize=4096)
 def pad_short_string(s, width, pad_char=' '):
     """Center-pad string s to width characters using pad_char. Returns s unchanged if len(s) >= width."""
     padding = width - len(s)
     left_padding = padding // 2
     right_padding = padding - left_padding
     return pad_char * left_padding + s + pad_char * right_padding
+
+
+@lru_cache(maxsize=64)
+def parse_rank(rank_val):
+    """Parse a speaker rank attribute; missing or non-numeric ranks count as 1."""
+    return int(rank_val) if rank_val and rank_val.isdigit() else 1
@@ -40,8 +40,8 @@ def extract_paraphrasis_text(paraphrasis_elem, default_text="/"):
     if not text_content:
         return default_text
     
-    # Normalize whitespace
-    return re.sub(r'\s+', ' ', text_content)
+    # Normalize whitespace (text_content is already stripped, so split/join is equivalent to collapsing \s+)
+    return ' '.join(text_content.split())
 
 
 def retrieve_segment_text(segment, namespaces):
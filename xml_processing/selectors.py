@@ -13,7 +13,7 @@ def get_all_proposition_ids(elements, namespaces):
         if matching_propositions_group is not None:
             matching_propositions = matching_propositions_group.findall('.//thesu:matchingProposition', namespaces=namespaces)
             for matching_proposition in matching_propositions:
-                prop_ref = matching_proposition.get('{http://alchemeast.eu/thesu/ns/1.0}propRef').split('#')[-1]
+                prop_ref = matching_proposition.get('{http://alchemeast.eu/thesu/ns/1.0}propRef').rpartition('#')[2]
                 proposition_ids.add(prop_ref)
     return proposition_ids
 